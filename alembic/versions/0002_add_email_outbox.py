@@ -0,0 +1,39 @@
+"""add email outbox
+
+Revision ID: 0002_add_email_outbox
+Revises: 0001_add_guest_schema
+Create Date: 2026-10-19 09:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002_add_email_outbox'
+down_revision = '0001_add_guest_schema'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('''
+    CREATE TABLE IF NOT EXISTS email_outbox (
+      outbox_id INT AUTO_INCREMENT PRIMARY KEY,
+      to_email VARCHAR(120) NOT NULL,
+      subject VARCHAR(255) NOT NULL,
+      body TEXT NOT NULL,
+      html_body TEXT NULL,
+      status VARCHAR(20) DEFAULT 'pending',
+      attempts INT DEFAULT 0,
+      last_error VARCHAR(255) NULL,
+      next_attempt_at DATETIME NULL,
+      locked_at DATETIME NULL,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+      sent_at DATETIME NULL,
+      INDEX ix_email_outbox_status_next (status, next_attempt_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    ''')
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping tables in production environment.')
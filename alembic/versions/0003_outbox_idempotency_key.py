@@ -0,0 +1,24 @@
+"""add email outbox idempotency key
+
+Revision ID: 0003_outbox_idempotency_key
+Revises: 0002_add_email_outbox
+Create Date: 2026-10-19 10:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003_outbox_idempotency_key'
+down_revision = '0002_add_email_outbox'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("ALTER TABLE email_outbox ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(120) NULL;")
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_email_outbox_idempotency ON email_outbox (idempotency_key);")
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping columns in production environment.')
@@ -0,0 +1,40 @@
+"""add background jobs
+
+Revision ID: 0004_add_background_jobs
+Revises: 0003_outbox_idempotency_key
+Create Date: 2026-10-19 11:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004_add_background_jobs'
+down_revision = '0003_outbox_idempotency_key'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('''
+    CREATE TABLE IF NOT EXISTS background_jobs (
+      job_id INT AUTO_INCREMENT PRIMARY KEY,
+      kind VARCHAR(50) NOT NULL,
+      status VARCHAR(20) DEFAULT 'queued',
+      created_by INT NULL,
+      total INT NULL,
+      processed INT DEFAULT 0,
+      succeeded INT DEFAULT 0,
+      skipped INT DEFAULT 0,
+      message TEXT NULL,
+      result_path VARCHAR(255) NULL,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+      started_at DATETIME NULL,
+      finished_at DATETIME NULL,
+      INDEX ix_background_jobs_kind_created (kind, created_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    ''')
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping tables in production environment.')
@@ -0,0 +1,26 @@
+"""event catalog indexes
+
+Revision ID: 0005_event_catalog_indexes
+Revises: 0004_add_background_jobs
+Create Date: 2026-10-19 13:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005_event_catalog_indexes'
+down_revision = '0004_add_background_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pagination over (event_date, start_time, event_id) for approved events
+    op.execute("CREATE INDEX IF NOT EXISTS ix_events_catalog ON events (status, event_date, start_time, event_id);")
+    # Full-text search on the student catalog
+    op.execute("CREATE FULLTEXT INDEX IF NOT EXISTS ft_events_title_description ON events (title, description);")
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping indexes in production environment.')
@@ -0,0 +1,25 @@
+"""event updated_at row version
+
+Revision ID: 0006_event_updated_at
+Revises: 0005_event_catalog_indexes
+Create Date: 2026-10-19 15:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006_event_updated_at'
+down_revision = '0005_event_catalog_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Row version used for export ETags; microsecond precision
+    op.execute("ALTER TABLE events ADD COLUMN IF NOT EXISTS updated_at DATETIME(6) NULL DEFAULT NULL;")
+    op.execute("UPDATE events SET updated_at = created_at WHERE updated_at IS NULL;")
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping columns in production environment.')
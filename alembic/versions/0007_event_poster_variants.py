@@ -0,0 +1,24 @@
+"""event poster variants
+
+Revision ID: 0007_event_poster_variants
+Revises: 0006_event_updated_at
+Create Date: 2026-10-19 16:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007_event_poster_variants'
+down_revision = '0006_event_updated_at'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # JSON record of the resized AVIF/WebP/JPEG poster variants (utils.poster_pipeline)
+    op.execute("ALTER TABLE events ADD COLUMN IF NOT EXISTS poster_variants TEXT NULL;")
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping columns in production environment.')
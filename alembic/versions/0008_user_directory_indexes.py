@@ -0,0 +1,25 @@
+"""user directory indexes
+
+Revision ID: 0008_user_directory_indexes
+Revises: 0007_event_poster_variants
+Create Date: 2026-10-19 17:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0008_user_directory_indexes'
+down_revision = '0007_event_poster_variants'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Prefix search on the admin users page (email already has a unique index)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_full_name ON users (full_name);")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_username ON users (username);")
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping indexes in production environment.')
@@ -0,0 +1,24 @@
+"""users guest expiry index
+
+Revision ID: 0009_users_guest_expiry_index
+Revises: 0008_user_directory_indexes
+Create Date: 2026-10-19 18:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0009_users_guest_expiry_index'
+down_revision = '0008_user_directory_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Chunked guest expiry sweeps: guest_status = ? AND expiry_date < now
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_guest_expiry ON users (guest_status, expiry_date);")
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping indexes in production environment.')
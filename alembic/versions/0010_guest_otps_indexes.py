@@ -0,0 +1,26 @@
+"""guest otps indexes
+
+Revision ID: 0010_guest_otps_indexes
+Revises: 0009_users_guest_expiry_index
+Create Date: 2026-10-19 19:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0010_guest_otps_indexes'
+down_revision = '0009_users_guest_expiry_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # OTP verification: mobile_number = ? AND code = ? AND used = 0 ORDER BY created_at DESC
+    op.execute("CREATE INDEX IF NOT EXISTS ix_guest_otps_lookup ON guest_otps (mobile_number, code, used, created_at);")
+    # Purge of expired codes: created_at < cutoff
+    op.execute("CREATE INDEX IF NOT EXISTS ix_guest_otps_created_at ON guest_otps (created_at);")
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping indexes in production environment.')
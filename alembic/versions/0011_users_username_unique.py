@@ -0,0 +1,33 @@
+"""users username unique
+
+Revision ID: 0011_users_username_unique
+Revises: 0010_guest_otps_indexes
+Create Date: 2026-10-19 20:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0011_users_username_unique'
+down_revision = '0010_guest_otps_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Guest IDs are allocated by inserting and retrying on a duplicate (utils.guest_ids),
+    # which needs the database to reject duplicate usernames
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT username FROM users WHERE username IS NOT NULL GROUP BY username HAVING COUNT(*) > 1 LIMIT 10"
+    )).scalars().all()
+    if duplicates:
+        # Fail rather than record 0011 without the index; re-run once the duplicates are renamed
+        raise RuntimeError('Cannot create uq_users_username: resolve duplicate usernames first '
+                           f'(e.g. {", ".join(duplicates)})')
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_users_username ON users (username);")
+    # ix_users_username (0008) is now redundant and can be dropped by hand
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping indexes in production environment.')
@@ -0,0 +1,33 @@
+"""add user sessions
+
+Revision ID: 0012_add_user_sessions
+Revises: 0011_users_username_unique
+Create Date: 2026-10-19 21:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0012_add_user_sessions'
+down_revision = '0011_users_username_unique'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('''
+    CREATE TABLE IF NOT EXISTS user_sessions (
+      session_id VARCHAR(64) NOT NULL PRIMARY KEY,
+      user_id INT NULL,
+      data TEXT NOT NULL,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+      expires_at DATETIME NOT NULL,
+      INDEX ix_user_sessions_user_id (user_id),
+      INDEX ix_user_sessions_expires_at (expires_at)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    ''')
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping tables in production environment.')
@@ -0,0 +1,25 @@
+"""team member count
+
+Revision ID: 0013_team_member_count
+Revises: 0012_add_user_sessions
+Create Date: 2026-10-19 22:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0013_team_member_count'
+down_revision = '0012_add_user_sessions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Seat counter for race-free team joins (utils.team_membership), backfilled from registrations
+    op.execute("ALTER TABLE teams ADD COLUMN IF NOT EXISTS member_count INT NOT NULL DEFAULT 0;")
+    op.execute("UPDATE teams SET member_count = (SELECT COUNT(*) FROM registrations r WHERE r.team_id = teams.team_id);")
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping columns in production environment.')
@@ -0,0 +1,37 @@
+"""event seat counter and waitlist
+
+Revision ID: 0014_event_capacity
+Revises: 0013_team_member_count
+Create Date: 2026-10-19 23:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0014_event_capacity'
+down_revision = '0013_team_member_count'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Seat counter checked against the venue capacity (utils.registrations), backfilled from registrations
+    op.execute("ALTER TABLE events ADD COLUMN IF NOT EXISTS registered_count INT NOT NULL DEFAULT 0;")
+    op.execute("UPDATE events SET registered_count = (SELECT COUNT(*) FROM registrations r WHERE r.event_id = events.event_id);")
+    op.execute('''
+    CREATE TABLE IF NOT EXISTS event_waitlist (
+      entry_id INT AUTO_INCREMENT PRIMARY KEY,
+      event_id INT NOT NULL,
+      student_id INT NOT NULL,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+      UNIQUE KEY uq_event_waitlist_student (event_id, student_id),
+      INDEX ix_event_waitlist_queue (event_id, entry_id),
+      CONSTRAINT fk_event_waitlist_event FOREIGN KEY (event_id) REFERENCES events(event_id),
+      CONSTRAINT fk_event_waitlist_student FOREIGN KEY (student_id) REFERENCES users(user_id)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+    ''')
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping tables in production environment.')
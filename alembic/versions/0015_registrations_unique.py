@@ -0,0 +1,33 @@
+"""registrations event/student unique
+
+Revision ID: 0015_registrations_unique
+Revises: 0014_event_capacity
+Create Date: 2026-10-19 23:30:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0015_registrations_unique'
+down_revision = '0014_event_capacity'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Two requests from one student can both pass the "already registered" check;
+    # the database has to reject the second registration (utils.registrations)
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT event_id, student_id FROM registrations GROUP BY event_id, student_id HAVING COUNT(*) > 1 LIMIT 10"
+    )).all()
+    if duplicates:
+        # Fail rather than record 0015 without the index; re-run once the duplicates are removed
+        raise RuntimeError('Cannot create uq_registrations_event_student: remove duplicate registrations first '
+                           f'(event, student: {", ".join(f"{e}/{s}" for e, s in duplicates)}), '
+                           'then reset events.registered_count')
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_registrations_event_student ON registrations (event_id, student_id);")
+
+
+def downgrade():
+    # Downgrade intentionally left as NO-OP to avoid destructive drops in production.
+    print('Downgrade skipped to avoid dropping indexes in production environment.')
@@ -34,6 +34,14 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '280'))
 }
 
+# Behind a reverse proxy (e.g. nginx) take the client address and scheme from
+# the X-Forwarded-* headers the proxy sets; per-IP rate limits need the real
+# client. Set to the number of proxies in front of the app; 0 trusts none.
+trusted_proxies = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+if trusted_proxies > 0:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies, x_proto=trusted_proxies, x_host=trusted_proxies)
+
 # Initialize database
 from models import db
 db.init_app(app)
@@ -62,6 +70,18 @@ def ensure_event_columns():
         SELECT COUNT(*) AS cnt FROM information_schema.COLUMNS
         WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'events' AND COLUMN_NAME = 'certificate_template_id'
     """)
+    check_updated_at = text("""
+        SELECT COUNT(*) AS cnt FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'events' AND COLUMN_NAME = 'updated_at'
+    """)
+    check_poster_variants = text("""
+        SELECT COUNT(*) AS cnt FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'events' AND COLUMN_NAME = 'poster_variants'
+    """)
+    check_registered_count = text("""
+        SELECT COUNT(*) AS cnt FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'events' AND COLUMN_NAME = 'registered_count'
+    """)
     try:
         with app.app_context():
             r1 = db.session.execute(check_mode).scalar()
@@ -69,6 +89,9 @@ def ensure_event_columns():
             r3 = db.session.execute(check_poster).scalar()
             r4 = db.session.execute(check_scan_token).scalar()
             r5 = db.session.execute(check_cert_template).scalar()
+            r6 = db.session.execute(check_updated_at).scalar()
+            r7 = db.session.execute(check_poster_variants).scalar()
+            r8 = db.session.execute(check_registered_count).scalar()
             if r1 == 0:
                 db.session.execute(text("ALTER TABLE events ADD COLUMN mode VARCHAR(20) DEFAULT 'offline';"))
             if r2 == 0:
@@ -79,6 +102,16 @@ def ensure_event_columns():
                 db.session.execute(text("ALTER TABLE events ADD COLUMN scan_token VARCHAR(64) NULL;"))
             if r5 == 0:
                 db.session.execute(text("ALTER TABLE events ADD COLUMN certificate_template_id INT NULL;"))
+            if r6 == 0:
+                db.session.execute(text("ALTER TABLE events ADD COLUMN updated_at DATETIME(6) NULL;"))
+                db.session.execute(text("UPDATE events SET updated_at = created_at;"))
+            if r7 == 0:
+                db.session.execute(text("ALTER TABLE events ADD COLUMN poster_variants TEXT NULL;"))
+            if r8 == 0:
+                db.session.execute(text("ALTER TABLE events ADD COLUMN registered_count INT NOT NULL DEFAULT 0;"))
+                db.session.execute(text(
+                    "UPDATE events SET registered_count = (SELECT COUNT(*) FROM registrations r WHERE r.event_id = events.event_id);"
+                ))
             # Ensure venue_id column allows NULL for online events
             check_venue_nullable = text("""
                 SELECT IS_NULLABLE FROM information_schema.COLUMNS
@@ -116,6 +149,25 @@ def ensure_user_columns():
         db.session.rollback()
 
 
+def ensure_team_columns():
+    from sqlalchemy import text
+    check_member_count = text("""
+        SELECT COUNT(*) AS cnt FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'teams' AND COLUMN_NAME = 'member_count'
+    """)
+    try:
+        with app.app_context():
+            r1 = db.session.execute(check_member_count).scalar()
+            if r1 == 0:
+                db.session.execute(text("ALTER TABLE teams ADD COLUMN member_count INT NOT NULL DEFAULT 0;"))
+                db.session.execute(text(
+                    "UPDATE teams SET member_count = (SELECT COUNT(*) FROM registrations r WHERE r.team_id = teams.team_id);"
+                ))
+            db.session.commit()
+    except Exception:
+        db.session.rollback()
+
+
 # Ensure DB has certificate_templates table (non-destructive)
 def ensure_certificate_template_table():
     from sqlalchemy import text
@@ -163,21 +215,47 @@ app.register_blueprint(principal.bp)
 app.register_blueprint(admin.bp)
 app.register_blueprint(common.bp)
 
+# Role checks for templates, e.g. {% if has_role('admin') %}
+from utils.auth_utils import has_role, current_role, current_user
+app.jinja_env.globals['has_role'] = has_role
+# The logged-in user (role and department loaded), e.g. {{ current_user.full_name }}
+from werkzeug.local import LocalProxy
+app.jinja_env.globals['current_user'] = LocalProxy(current_user)
+
+# Poster <picture>/srcset data for templates/_poster.html
+from utils.poster_pipeline import poster_variants
+app.jinja_env.globals['poster_variants'] = poster_variants
+
+# Fingerprinted CSS/JS: {{ asset_url('css/style.css') }}, cached as immutable
+from utils import assets
+assets.init_app(app)
+
+# gzip/brotli for HTML, JSON and CSV responses
+from utils import compression
+compression.init_app(app)
+
+# Server-side sessions: the cookie carries only an opaque session id
+from utils import server_session
+server_session.init_app(app)
+
+# set_password/check_password outside login shed load with a 503 (see the handler below)
+from utils.password_utils import PasswordServiceBusy
+
 # Home route
 @app.route('/')
 def index():
     """Landing page - redirect based on login status"""
     if 'user_id' in session:
-        role = session.get('role_name')
-        if role == 'Student':
+        role = current_role()
+        if role == 'student':
             return redirect(url_for('student.dashboard'))
-        elif role == 'Event Organizer':
+        elif role == 'organizer':
             return redirect(url_for('organizer.dashboard'))
-        elif role == 'HOD':
+        elif role == 'hod':
             return redirect(url_for('hod.dashboard'))
-        elif role == 'Principal':
+        elif role == 'principal':
             return redirect(url_for('principal.dashboard'))
-        elif role == 'Admin':
+        elif role == 'admin':
             return redirect(url_for('admin.dashboard'))
     return redirect(url_for('auth.login'))
 
@@ -191,6 +269,12 @@ def internal_error(error):
     db.session.rollback()
     return render_template('500.html'), 500
 
+# Hash queue full (utils.password_utils); login handles it itself with its own page
+@app.errorhandler(PasswordServiceBusy)
+def password_service_busy(error):
+    db.session.rollback()
+    return render_template('503.html'), 503, {'Retry-After': '5'}
+
 if __name__ == '__main__':
     with app.app_context():
         # Import models
@@ -202,6 +286,7 @@ if __name__ == '__main__':
         # Ensure new event columns exist (mode, meeting_url)
         ensure_event_columns()
         ensure_user_columns()
+        ensure_team_columns()
         ensure_certificate_template_table()
         
         # Seed database with demo data (only when explicitly enabled)
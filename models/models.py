@@ -5,7 +5,8 @@ Defines all database tables according to schema requirements
 
 from models import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.dialects import mysql
+from utils.password_utils import hash_password, verify_password, needs_rehash
 
 class Role(db.Model):
     """User roles table"""
@@ -40,6 +41,14 @@ class Department(db.Model):
 class User(db.Model):
     """Users table - handles all user types"""
     __tablename__ = 'users'
+    __table_args__ = (
+        # Prefix search on the admin users page (utils.user_directory); email is already unique
+        db.Index('ix_users_full_name', 'full_name'),
+        # Student usernames and guest IDs (utils.guest_ids); NULLs may repeat
+        db.Index('uq_users_username', 'username', unique=True),
+        # Guest expiry sweeps (utils.guest_lifecycle)
+        db.Index('ix_users_guest_expiry', 'guest_status', 'expiry_date'),
+    )
     
     user_id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(100), nullable=False)
@@ -67,11 +76,15 @@ class User(db.Model):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
     
     def check_password(self, password):
         """Verify password"""
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
+
+    def password_needs_rehash(self):
+        """True when the stored hash predates the configured hashing cost"""
+        return needs_rehash(self.password)
     
     def __repr__(self):
         return f'<User {self.email or self.mobile_number}>'
@@ -96,6 +109,12 @@ class Venue(db.Model):
 class Event(db.Model):
     """Events table"""
     __tablename__ = 'events'
+    __table_args__ = (
+        # Keyset pagination for the student catalog (utils.event_catalog)
+        db.Index('ix_events_catalog', 'status', 'event_date', 'start_time', 'event_id'),
+        db.Index('ft_events_title_description', 'title', 'description',
+                 mysql_prefix='FULLTEXT').ddl_if(dialect=('mysql', 'mariadb')),
+    )
     
     event_id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -112,6 +131,8 @@ class Event(db.Model):
     meeting_url = db.Column(db.String(255), nullable=True)
     # Optional event poster image path
     poster_url = db.Column(db.String(255), nullable=True)
+    # JSON written by utils.poster_pipeline: {"width", "height", "formats": {fmt: {width: path}}}
+    poster_variants = db.Column(db.Text, nullable=True)
     # Optional certificate template selection
     certificate_template_id = db.Column(db.Integer, db.ForeignKey('certificate_templates.template_id'), nullable=True)
     # Token for public scan URLs
@@ -119,6 +140,9 @@ class Event(db.Model):
     organizer_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     status = db.Column(db.String(20), default='pending')  # pending, approved, rejected
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Row version for ETags on exports (microseconds so quick successive edits differ)
+    updated_at = db.Column(db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql', 'mariadb'),
+                           default=datetime.utcnow, onupdate=datetime.utcnow)
     # Guest account fields
     is_guest = db.Column(db.Boolean, default=False)
     mobile_number = db.Column(db.String(20), unique=True, nullable=True)
@@ -130,6 +154,8 @@ class Event(db.Model):
     is_team_event = db.Column(db.Boolean, default=False)
     min_team_size = db.Column(db.Integer, default=1)
     max_team_size = db.Column(db.Integer, default=1)
+    # Registrations holding a seat; taken atomically against the venue capacity (utils.registrations)
+    registered_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     # Audience: if True the event is campus-exclusive (students only); otherwise public
     is_campus_exclusive = db.Column(db.Boolean, default=False)
     
@@ -143,6 +169,7 @@ class Event(db.Model):
     feedback = db.relationship('Feedback', backref='event', lazy=True, cascade='all, delete-orphan')
     certificate_template = db.relationship('CertificateTemplate', backref='events', lazy=True)
     teams = db.relationship('Team', backref='event', lazy=True, cascade='all, delete-orphan')
+    waitlist = db.relationship('WaitlistEntry', backref='event', lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Event {self.title}>'
@@ -168,6 +195,11 @@ class Registration(db.Model):
     """Registrations table - student event registrations"""
     __tablename__ = 'registrations'
     
+    __table_args__ = (
+        # One registration per student and event; concurrent sign-ups rely on it (utils.registrations)
+        db.UniqueConstraint('event_id', 'student_id', name='uq_registrations_event_student'),
+    )
+
     registration_id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.event_id'), nullable=False)
     student_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
@@ -188,6 +220,23 @@ class Registration(db.Model):
         return f'<Registration {self.registration_id}>'
 
 
+class WaitlistEntry(db.Model):
+    """Students waiting for a seat at a full event, promoted in entry order (utils.registrations)"""
+    __tablename__ = 'event_waitlist'
+    __table_args__ = (
+        db.UniqueConstraint('event_id', 'student_id', name='uq_event_waitlist_student'),
+        db.Index('ix_event_waitlist_queue', 'event_id', 'entry_id'),
+    )
+
+    entry_id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('events.event_id'), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<WaitlistEntry {self.entry_id} event={self.event_id} student={self.student_id}>'
+
+
 class Team(db.Model):
     """Teams table - for team events like hackathons"""
     __tablename__ = 'teams'
@@ -197,6 +246,8 @@ class Team(db.Model):
     team_name = db.Column(db.String(100), nullable=False)
     leader_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Registrations in the team; taken atomically against max_team_size (utils.team_membership)
+    member_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     # Guest account fields
     is_guest = db.Column(db.Boolean, default=False)
     mobile_number = db.Column(db.String(20), unique=True, nullable=True)
@@ -313,6 +364,11 @@ class Feedback(db.Model):
 class GuestOTP(db.Model):
     """Temporary OTP storage for guest login"""
     __tablename__ = 'guest_otps'
+    __table_args__ = (
+        # Code lookup on verify and the purge sweep (utils.guest_otp)
+        db.Index('ix_guest_otps_lookup', 'mobile_number', 'code', 'used', 'created_at'),
+        db.Index('ix_guest_otps_created_at', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     mobile_number = db.Column(db.String(20), nullable=False, index=True)
@@ -333,3 +389,80 @@ class AppConfig(db.Model):
 
     def __repr__(self):
         return f'<AppConfig {self.key}={self.value}>'
+
+
+class EmailOutbox(db.Model):
+    """Queued outgoing emails, drained by the background mail worker"""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next', 'status', 'next_attempt_at'),
+    )
+
+    outbox_id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    html_body = db.Column(db.Text, nullable=True)
+    status = db.Column(db.String(20), default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.String(255), nullable=True)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    # Set by fan-out jobs so re-runs never queue the same message twice
+    idempotency_key = db.Column(db.String(120), unique=True, nullable=True)
+
+    def __repr__(self):
+        return f'<EmailOutbox {self.outbox_id} {self.to_email} {self.status}>'
+
+
+class UserSession(db.Model):
+    """Server-side sessions keyed by the id in the session cookie (utils.server_session)"""
+    __tablename__ = 'user_sessions'
+
+    session_id = db.Column(db.String(64), primary_key=True)
+    # Plain id like BackgroundJob.created_by; sessions are revoked by user, not cascaded
+    user_id = db.Column(db.Integer, nullable=True, index=True)
+    data = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<UserSession {self.session_id[:8]} user={self.user_id}>'
+
+
+class BackgroundJob(db.Model):
+    """Long-running admin tasks (imports, purges) executed off the request thread"""
+    __tablename__ = 'background_jobs'
+
+    job_id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # student_import, ...
+    status = db.Column(db.String(20), default='queued')  # queued, running, completed, failed
+    # Plain id rather than a foreign key so purging users never blocks on job history
+    created_by = db.Column(db.Integer, nullable=True)
+    total = db.Column(db.Integer, nullable=True)
+    processed = db.Column(db.Integer, default=0)
+    succeeded = db.Column(db.Integer, default=0)
+    skipped = db.Column(db.Integer, default=0)
+    message = db.Column(db.Text, nullable=True)
+    result_path = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed or 0,
+            'succeeded': self.succeeded or 0,
+            'skipped': self.skipped or 0,
+            'message': self.message,
+            'has_result': bool(self.result_path),
+        }
+
+    def __repr__(self):
+        return f'<BackgroundJob {self.job_id} {self.kind} {self.status}>'
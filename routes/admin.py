@@ -2,32 +2,36 @@
 Admin Routes - Analytics, Reports, System Overview
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, send_file
-from models.models import Event, Registration, Attendance, Feedback, User, Department, Venue, Role, AppConfig
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, send_file, jsonify, current_app
+from models.models import Event, Registration, Attendance, Feedback, User, Department, Venue, Role, BackgroundJob, Team
 from models import db
+from utils import reference_cache, search_index, user_directory
+from utils.jobs import submit_job, job_storage_dir
+from utils.user_purge import purge_users
+from utils.server_session import revoke_user_sessions
+from utils import guest_lifecycle
+from utils.settings import get_settings, update_settings
+from utils.student_import import import_students, take_results, purge_expired_results
 from datetime import datetime, date, timedelta
-from functools import wraps
-from sqlalchemy import func, or_, text
+from utils.auth_utils import role_required
+from utils import response_cache
+from utils.response_cache import cached_response
+from utils.conditional import make_etag, not_modified, with_etag
+from sqlalchemy import func, select
 from io import BytesIO
 import io
+import os
 import csv
+import uuid
 from reportlab.lib.pagesizes import landscape, letter
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-from openpyxl import Workbook, load_workbook
+from openpyxl import Workbook
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
 
-def admin_required(f):
-    """Decorator to require admin login"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session or session.get('role_name', '').lower() != 'admin':
-            flash('Access denied', 'error')
-            return redirect(url_for('auth.login'))
-        return f(*args, **kwargs)
-    return decorated_function
+admin_required = role_required('admin')
 
 
 @bp.route('/dashboard')
@@ -57,7 +61,7 @@ def dashboard():
         Event.date >= date.today()
     ).order_by(Event.date).limit(5).all()
     
-    guest_enabled = AppConfig.query.get('guest_enabled')
+    guest_enabled = get_settings().guest_enabled
     return render_template('admin/dashboard.html',
                          total_events=total_events,
                          approved_events=approved_events,
@@ -71,6 +75,28 @@ def dashboard():
                          guest_enabled=guest_enabled)
 
 
+
+@bp.route('/search')
+@admin_required
+def search():
+    """Type-ahead search across events, users, teams and venues (JSON)"""
+    q = (request.args.get('q') or '').strip()
+    limit = min(request.args.get('limit', 10, type=int), 25)
+    results = search_index.search(q, limit=limit) if len(q) >= 2 else []
+
+    team_ids = [r['id'] for r in results if r['kind'] == 'team']
+    team_events = dict(db.session.query(Team.team_id, Team.event_id).filter(Team.team_id.in_(team_ids))) if team_ids else {}
+    for r in results:
+        if r['kind'] == 'event':
+            r['url'] = url_for('admin.view_event', event_id=r['id'])
+        elif r['kind'] == 'user':
+            r['url'] = url_for('admin.edit_user', user_id=r['id'])
+        elif r['kind'] == 'team' and r['id'] in team_events:
+            r['url'] = url_for('admin.view_event', event_id=team_events[r['id']])
+        else:
+            r['url'] = None
+    return jsonify({'q': q, 'results': results})
+
 @bp.route('/events')
 @admin_required
 def events():
@@ -103,13 +129,8 @@ def events():
     events = query.order_by(Event.date.desc()).all()
     
     # Get departments for filter
-    departments = Department.query.all()
-    organizers = User.query.join(User.role).filter(
-        or_(
-            User.role.has(role_name='Event Organizer'),
-            User.role.has(role_name='Organizer')
-        )
-    ).order_by(User.full_name.asc()).all()
+    departments = reference_cache.departments()
+    organizers = reference_cache.organizers()
     
     return render_template('admin/events.html',
                          events=events,
@@ -150,6 +171,12 @@ def export_events():
     if date_to:
         query = query.filter(Event.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
 
+    version = query.with_entities(func.count(Event.event_id), func.max(Event.event_id), func.max(Event.updated_at)).one()
+    etag = make_etag('events-export', sorted(request.args.items()), *version)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     events = query.order_by(Event.date.desc()).all()
 
     if export_format == 'pdf':
@@ -195,12 +222,12 @@ def export_events():
 
         c.save()
         buffer.seek(0)
-        return send_file(
+        return with_etag(send_file(
             buffer,
             as_attachment=True,
             download_name='events_report.pdf',
             mimetype='application/pdf'
-        )
+        ), etag)
 
     wb = Workbook()
     ws = wb.active
@@ -218,16 +245,17 @@ def export_events():
     output = BytesIO()
     wb.save(output)
     output.seek(0)
-    return send_file(
+    return with_etag(send_file(
         output,
         as_attachment=True,
         download_name='events_report.xlsx',
         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    ), etag)
 
 
 @bp.route('/event/<int:event_id>')
 @admin_required
+@cached_response(tags=lambda event_id: (f'event:{event_id}', 'attendance'))
 def view_event(event_id):
     """View detailed event information"""
     event = Event.query.get_or_404(event_id)
@@ -258,6 +286,7 @@ def view_event(event_id):
 
 @bp.route('/reports')
 @admin_required
+@cached_response(tags=('events', 'registrations', 'feedback'))
 def reports():
     """Generate various reports"""
     date_from = request.args.get('date_from', '')
@@ -337,16 +366,31 @@ def reports():
                          organizer_feedback=organizer_feedback,
                          dept_participation=dept_participation,
                          feedback_summary=feedback_summary,
-                         departments=Department.query.order_by(Department.dept_name.asc()).all(),
+                         departments=reference_cache.departments(),
                          date_from=date_from,
                          date_to=date_to,
                          dept_filter=dept_filter)
 
 
+def _reporting_version():
+    """Counters and high-water marks of the rows reports are built from (one query)"""
+    columns = (
+        func.count(Event.event_id), func.max(Event.updated_at),
+        func.count(Registration.registration_id), func.max(Registration.registration_id),
+        func.count(Feedback.feedback_id), func.max(Feedback.feedback_id),
+    )
+    return db.session.query(*(select(column).scalar_subquery() for column in columns)).one()
+
+
 @bp.route('/reports/export')
 @admin_required
 def export_reports():
     """Export reports to Excel or PDF"""
+    etag = make_etag('reports-export', sorted(request.args.items()), *_reporting_version())
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     export_format = (request.args.get('format') or 'xlsx').lower()
     date_from = request.args.get('date_from', '')
     date_to = request.args.get('date_to', '')
@@ -451,12 +495,12 @@ def export_reports():
 
         c.save()
         buffer.seek(0)
-        return send_file(
+        return with_etag(send_file(
             buffer,
             as_attachment=True,
             download_name='reports_analytics.pdf',
             mimetype='application/pdf'
-        )
+        ), etag)
 
     wb = Workbook()
     ws_students = wb.active
@@ -478,16 +522,17 @@ def export_reports():
     output = BytesIO()
     wb.save(output)
     output.seek(0)
-    return send_file(
+    return with_etag(send_file(
         output,
         as_attachment=True,
         download_name='reports_analytics.xlsx',
         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    ), etag)
 
 
 @bp.route('/feedback')
 @admin_required
+@cached_response(tags=('events', 'feedback'))
 def feedback():
     """View feedback summary by event with filters"""
     date_from = request.args.get('date_from', '')
@@ -528,14 +573,9 @@ def feedback():
     total_feedback = Feedback.query.count()
     avg_rating = db.session.query(func.avg(Feedback.rating)).scalar() or 0
 
-    departments = Department.query.order_by(Department.dept_name.asc()).all()
+    departments = reference_cache.departments()
     events = Event.query.order_by(Event.date.desc()).all()
-    organizers = User.query.join(User.role).filter(
-        or_(
-            User.role.has(role_name='Event Organizer'),
-            User.role.has(role_name='Organizer')
-        )
-    ).order_by(User.full_name.asc()).all()
+    organizers = reference_cache.organizers()
 
     return render_template(
         'admin/feedback.html',
@@ -555,6 +595,7 @@ def feedback():
 
 @bp.route('/feedback/event/<int:event_id>')
 @admin_required
+@cached_response(tags=lambda event_id: (f'event:{event_id}',))
 def feedback_event(event_id):
     """View detailed feedback for a specific event"""
     event = Event.query.get_or_404(event_id)
@@ -569,43 +610,40 @@ def feedback_event(event_id):
 @bp.route('/users')
 @admin_required
 def users():
-    """View all users"""
-    search = (request.args.get('q') or '').strip()
-    role_filter = request.args.get('role_id')
-    dept_filter = request.args.get('dept_id')
-
-    query = User.query
-
-    if search:
-        like = f"%{search}%"
-        query = query.filter(or_(User.full_name.ilike(like), User.email.ilike(like), User.username.ilike(like)))
-
-    if role_filter:
-        try:
-            query = query.filter(User.role_id == int(role_filter))
-        except ValueError:
-            pass
-
-    if dept_filter:
-        try:
-            query = query.filter(User.dept_id == int(dept_filter))
-        except ValueError:
-            pass
-
-    users = query.order_by(User.created_at.desc()).all()
-    departments = Department.query.order_by(Department.dept_name.asc()).all()
-    roles = Role.query.order_by(Role.role_name.asc()).all()
+    """View all users (first page; the table loads more from users_data)"""
+    filters = user_directory.parse_filters(request.args)
+    page, next_cursor = user_directory.directory_page(filters)
+    departments = reference_cache.departments()
+    roles = reference_cache.roles()
+    purge_expired_results()
+    import_jobs = BackgroundJob.query.filter_by(kind='student_import').order_by(
+        BackgroundJob.created_at.desc()
+    ).limit(5).all()
     return render_template(
         'admin/users.html',
-        users=users,
+        first_page={
+            'users': [user_directory.user_row(u) for u in page],
+            'next_cursor': next_cursor,
+            'total': user_directory.directory_query(filters).order_by(None).count(),
+        },
         departments=departments,
         roles=roles,
-        search=search,
-        role_filter=role_filter,
-        dept_filter=dept_filter
+        search=filters['q'],
+        role_filter=filters['role_id'],
+        dept_filter=filters['dept_id'],
+        import_jobs=import_jobs
     )
 
 
+@bp.route('/users/data')
+@admin_required
+def users_data():
+    """Next page of the users table as JSON rows (virtualized table)"""
+    filters = user_directory.parse_filters(request.args)
+    page, next_cursor = user_directory.directory_page(filters, cursor=request.args.get('cursor'))
+    return jsonify({'users': [user_directory.user_row(u) for u in page], 'next_cursor': next_cursor})
+
+
 @bp.route('/users/create', methods=['POST'])
 @admin_required
 def create_user():
@@ -648,6 +686,7 @@ def create_user():
     user.set_password(password)
     db.session.add(user)
     db.session.commit()
+    reference_cache.invalidate('organizers')
 
     flash('User created successfully.', 'success')
     return redirect(url_for('admin.users'))
@@ -658,8 +697,8 @@ def create_user():
 def edit_user(user_id):
     """Edit an existing user's profile details."""
     user = User.query.get_or_404(user_id)
-    departments = Department.query.order_by(Department.dept_name.asc()).all()
-    roles = Role.query.order_by(Role.role_name.asc()).all()
+    departments = reference_cache.departments()
+    roles = reference_cache.roles()
 
     if request.method == 'POST':
         full_name = (request.form.get('full_name') or '').strip()
@@ -691,6 +730,7 @@ def edit_user(user_id):
                 flash('Email already exists. Please use a different email.', 'error')
                 return redirect(url_for('admin.edit_user', user_id=user_id))
 
+        role_changed = user.role_id != role.role_id
         user.full_name = full_name
         user.username = username or None
         user.email = email
@@ -698,6 +738,10 @@ def edit_user(user_id):
         user.dept_id = int(dept_id) if dept_id else None
 
         db.session.commit()
+        if role_changed:
+            # Sessions carry the role id: sign the user out so the new role takes effect
+            revoke_user_sessions([user.user_id])
+        reference_cache.invalidate('organizers')
         flash('User updated successfully.', 'success')
         return redirect(url_for('admin.users'))
 
@@ -718,80 +762,23 @@ def delete_user(user_id):
         flash('Admin accounts cannot be deleted.', 'error')
         return redirect(url_for('admin.users'))
 
-    # Prevent deleting other admin accounts
-    if user.role and user.role.role_name and user.role.role_name.lower() == 'admin':
-        flash('Admin accounts cannot be deleted.', 'error')
-        return redirect(url_for('admin.users'))
-
-    # Conservative cleanup of related records to allow deletion
     try:
-        # Delete attendance scanned by user
-        db.session.execute(text('DELETE FROM attendance WHERE scanned_by = :uid'), {'uid': user_id})
-
-        # Delete team invitations where invitee is this user
-        db.session.execute(text('DELETE FROM team_invitations WHERE invitee_id = :uid'), {'uid': user_id})
-
-        # Delete registrations for this user
-        db.session.execute(text('DELETE FROM registrations WHERE student_id = :uid'), {'uid': user_id})
-
-        # Delete teams led by this user
-        db.session.execute(text('DELETE FROM teams WHERE leader_id = :uid'), {'uid': user_id})
-
-        # Delete certificates issued to this user
-        db.session.execute(text('DELETE FROM certificates WHERE student_id = :uid'), {'uid': user_id})
-
-        # Delete feedback by this user
-        db.session.execute(text('DELETE FROM feedback WHERE student_id = :uid'), {'uid': user_id})
-
-        # Delete approvals by this user
-        db.session.execute(text('DELETE FROM approvals WHERE approver_id = :uid'), {'uid': user_id})
-
-        # Delete events organized by this user (this will cascade to registrations/teams if DB is configured)
-        db.session.execute(text('DELETE FROM events WHERE organizer_id = :uid'), {'uid': user_id})
-
-        # Finally delete the user
-        db.session.delete(user)
-        db.session.commit()
+        purge_users([user_id])
         flash('User deleted successfully.', 'success')
-        return redirect(url_for('admin.users'))
     except Exception as e:
         db.session.rollback()
         current_app.logger.exception('Failed to delete user %s', user_id)
         flash(f'Failed to delete user: {e}', 'error')
-        return redirect(url_for('admin.users'))
-
-
-
-
-
-def _normalize_headers(headers):
-    return [str(h or '').strip().lower().replace(' ', '_').replace('-', '_') for h in headers]
-
-
-def _resolve_department(dept_id, dept_name, dept_map):
-    if dept_id:
-        try:
-            return int(dept_id)
-        except (TypeError, ValueError):
-            return None
-    if dept_name:
-        return dept_map.get(str(dept_name).strip().lower())
-    return None
+    return redirect(url_for('admin.users'))
 
 
 @bp.route('/toggle-guest-login', methods=['POST'])
 @admin_required
 def toggle_guest_login():
     """Toggle the global guest login feature on/off via `app_config.guest_enabled`."""
-    cfg = AppConfig.query.get('guest_enabled')
-    if not cfg:
-        cfg = AppConfig(key='guest_enabled', value='1')
-        db.session.add(cfg)
-
-    current = (cfg.value or '').strip()
-    cfg.value = '0' if current == '1' else '1'
-    db.session.commit()
-    flash(f"Guest login {'enabled' if cfg.value == '1' else 'disabled'}.", 'success')
+    enabled = not get_settings().guest_enabled
+    update_settings(guest_enabled=enabled)
+    flash(f"Guest login {'enabled' if enabled else 'disabled'}.", 'success')
     # Return admin to the dashboard where the toggle was available
     return redirect(url_for('admin.dashboard'))
 
@@ -799,9 +786,9 @@ def toggle_guest_login():
 @bp.route('/users/bulk-upload', methods=['POST'])
 @admin_required
 def bulk_upload_students():
-    """Bulk create student users from CSV/XLSX"""
+    """Start a background import of student users from CSV/XLSX"""
     upload = request.files.get('file')
-    default_password = request.form.get('default_password') or ''
+    default_password = (request.form.get('default_password') or '').strip()
 
     if not upload or not upload.filename:
         flash('Please select a CSV or XLSX file to upload.', 'error')
@@ -812,134 +799,51 @@ def bulk_upload_students():
         flash('Unsupported file type. Please upload a CSV or XLSX file.', 'error')
         return redirect(url_for('admin.users'))
 
-    student_role = Role.query.filter_by(role_name='Student').first()
-    if not student_role:
+    if not Role.query.filter_by(role_name='Student').first():
         flash('Student role not found in database.', 'error')
         return redirect(url_for('admin.users'))
 
-    departments = Department.query.all()
-    dept_map = {d.dept_name.strip().lower(): d.dept_id for d in departments}
-    dept_name_map = {d.dept_id: d.dept_name for d in departments}
-
-    created = 0
-    skipped = 0
-    errors = []
-    created_entries = []
-
-    def process_row(row):
-        nonlocal created, skipped, errors, created_entries
-        full_name = (row.get('full_name') or '').strip()
-        username = (row.get('username') or row.get('reg_no') or row.get('registration_no') or '').strip()
-        if not username:
-            username = None
-        email = (row.get('email') or '').strip().lower()
-        password = (row.get('password') or '').strip()
-        dept_id = row.get('dept_id')
-        dept_name = row.get('dept_name') or row.get('department')
-
-        if not full_name or not email:
-            skipped += 1
-            errors.append('Missing full_name or email')
-            return
-
-        if User.query.filter_by(email=email).first():
-            skipped += 1
-            return
-
-        if username and User.query.filter_by(username=username).first():
-            skipped += 1
-            errors.append(f'Duplicate username for {email}')
-            return
-
-        if not password:
-            password = default_password.strip()
-
-        if not password:
-            skipped += 1
-            errors.append(f'Missing password for {email}')
-            return
-
-        resolved_dept_id = _resolve_department(dept_id, dept_name, dept_map)
-
-        user = User(
-            full_name=full_name,
-            username=username or None,
-            email=email,
-            role_id=student_role.role_id,
-            dept_id=resolved_dept_id
-        )
-        user.set_password(password)
-        db.session.add(user)
-        created += 1
-        created_entries.append({
-            'full_name': full_name,
-            'username': username or '',
-            'email': email,
-            'password': password,
-            'dept_name': dept_name_map.get(resolved_dept_id, dept_name or '')
-        })
+    ext = '.csv' if filename.endswith('.csv') else '.xlsx'
+    upload_path = os.path.join(job_storage_dir('imports'), f'upload_{uuid.uuid4().hex}{ext}')
+    upload.save(upload_path)
 
-    try:
-        if filename.endswith('.csv'):
-            content = upload.read().decode('utf-8', errors='ignore')
-            reader = csv.DictReader(io.StringIO(content))
-            for row in reader:
-                process_row(row)
-        else:
-            wb = load_workbook(upload, read_only=True, data_only=True)
-            ws = wb.active
-            rows = ws.iter_rows(values_only=True)
-            headers = next(rows, None)
-            if not headers:
-                flash('The uploaded file is empty.', 'error')
-                return redirect(url_for('admin.users'))
-            normalized = _normalize_headers(headers)
-            for row in rows:
-                row_dict = {normalized[idx]: (row[idx] if idx < len(row) else None) for idx in range(len(normalized))}
-                process_row(row_dict)
-    except Exception as exc:
-        flash(f'Failed to process file: {exc}', 'error')
-        return redirect(url_for('admin.users'))
+    job = submit_job('student_import', import_students, upload_path, default_password,
+                     created_by=session['user_id'])
+    flash('Bulk upload started. Progress is shown below; download the results file when it completes. '
+          'It lists the new passwords, so it can be downloaded once and is deleted if not fetched soon.', 'info')
+    return redirect(url_for('admin.users', job_id=job.job_id))
 
-    db.session.commit()
 
-    if created == 0:
-        message = f'Bulk upload completed. Created: {created}, Skipped: {skipped}.'
-        if errors:
-            message += ' Some rows had issues.'
-        flash(message, 'warning')
-        if errors:
-            flash('Errors: ' + '; '.join(errors[:5]), 'warning')
-        return redirect(url_for('admin.users'))
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = 'Created Students'
-    ws.append(['Full Name', 'Username', 'Email', 'Password', 'Department'])
-    for entry in created_entries:
-        ws.append([
-            entry['full_name'],
-            entry['username'],
-            entry['email'],
-            entry['password'],
-            entry['dept_name']
-        ])
+@bp.route('/cache-stats')
+@admin_required
+def cache_stats():
+    """Response cache hit/miss counters for this worker process"""
+    return jsonify(response_cache.stats())
 
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
 
-    message = f'Bulk upload completed. Created: {created}, Skipped: {skipped}.'
-    if errors:
-        message += ' Some rows had issues.'
-    flash(message, 'success')
-    if errors:
-        flash('Errors: ' + '; '.join(errors[:5]), 'warning')
+@bp.route('/jobs/<int:job_id>')
+@admin_required
+def job_status(job_id):
+    """Progress of a background job (polled by the users page)"""
+    job = BackgroundJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict())
+
 
+@bp.route('/jobs/<int:job_id>/result')
+@admin_required
+def job_result(job_id):
+    """Download the results file produced by a background job"""
+    job = BackgroundJob.query.get_or_404(job_id)
+    # One download only: the file holds the new students' passwords
+    data = take_results(job)
+    if data is None:
+        flash('Results file is not available. It can be downloaded once, shortly after the import.', 'error')
+        return redirect(url_for('admin.users'))
     return send_file(
-        output,
+        BytesIO(data),
         as_attachment=True,
-        download_name='created_student_credentials.xlsx',
+        download_name=f'{job.kind}_{job.job_id}_results.xlsx',
         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
 
@@ -976,37 +880,26 @@ def bulk_template():
     )
 
 # --- Guest management added by feature: time-limited guest accounts ---
-from models.models import AppConfig
 
 @bp.route('/guests')
 @admin_required
 def guests():
     """Guest management dashboard"""
-    guest_enabled = AppConfig.query.get('guest_enabled')
-    guest_validity = AppConfig.query.get('guest_validity_days')
-    cleanup_policy = AppConfig.query.get('guest_cleanup_policy')
+    settings = get_settings()
 
     # Prefer role-based guest detection; join roles to find users with Guest role
     guests = User.query.join(Role).filter(Role.role_name.ilike('guest')).order_by(User.created_at.desc()).all()
-    return render_template('admin/guests.html', guests=guests, guest_enabled=guest_enabled, guest_validity=guest_validity, cleanup_policy=cleanup_policy)
+    return render_template('admin/guests.html', guests=guests, guest_enabled=settings.guest_enabled, guest_validity=settings.guest_validity_days, cleanup_policy=settings.guest_cleanup_policy,
+                           lifecycle_runs=guest_lifecycle.recent_runs())
 
 @bp.route('/guests/update_settings', methods=['POST'])
 @admin_required
 def guests_update_settings():
-    enabled = request.form.get('guest_enabled') or '0'
-    validity = request.form.get('guest_validity_days') or '30'
-    policy = request.form.get('guest_cleanup_policy') or 'archive'
-    def setk(k,v):
-        s = AppConfig.query.get(k)
-        if not s:
-            s = AppConfig(key=k, value=v)
-            db.session.add(s)
-        else:
-            s.value = v
-    setk('guest_enabled', '1' if enabled=='1' else '0')
-    setk('guest_validity_days', str(int(validity)))
-    setk('guest_cleanup_policy', policy)
-    db.session.commit()
+    update_settings(
+        guest_enabled=request.form.get('guest_enabled') == '1',
+        guest_validity_days=request.form.get('guest_validity_days') or '30',
+        guest_cleanup_policy=request.form.get('guest_cleanup_policy') or 'archive',
+    )
     flash('Guest settings updated', 'success')
     return redirect(url_for('admin.guests'))
 
@@ -1031,33 +924,14 @@ def guests_delete(user_id):
     if not is_guest_user:
         flash('Not a guest user', 'error')
         return redirect(url_for('admin.guests'))
-    # Delete related data: registrations, attendance, certificates, feedback
-    Registration.query.filter_by(student_id=user.user_id).delete()
-    Attendance.query.filter(Attendance.scanned_by==user.user_id).delete()
-    Certificate.query.filter_by(student_id=user.user_id).delete()
-    Feedback.query.filter_by(student_id=user.user_id).delete()
-    db.session.delete(user)
-    db.session.commit()
+    purge_users([user.user_id])
     flash('Guest and related data deleted', 'success')
     return redirect(url_for('admin.guests'))
 
 @bp.route('/guests/cleanup', methods=['POST'])
 @admin_required
 def guests_cleanup():
-    # Run cleanup: deactivate expired guests and delete/ archive based on policy
-    from datetime import datetime
-    now = datetime.utcnow()
-    # Find expired users by Guest role (preferred) or legacy flag
-    expired = User.query.join(Role).filter(Role.role_name.ilike('guest'), User.expiry_date!=None, User.expiry_date<now).all()
-    policy = (AppConfig.query.get('guest_cleanup_policy').value if AppConfig.query.get('guest_cleanup_policy') else 'archive')
-    for u in expired:
-        u.guest_status = 'expired'
-        if policy == 'delete':
-            Registration.query.filter_by(student_id=u.user_id).delete()
-            Attendance.query.filter(Attendance.scanned_by==u.user_id).delete()
-            Certificate.query.filter_by(student_id=u.user_id).delete()
-            Feedback.query.filter_by(student_id=u.user_id).delete()
-            db.session.delete(u)
-    db.session.commit()
-    flash('Guest cleanup completed', 'success')
+    # Same run the scheduled lifecycle worker does: expire, then archive/delete per policy
+    job = submit_job(guest_lifecycle.JOB_KIND, guest_lifecycle.run_lifecycle, created_by=session.get('user_id'))
+    flash(f'Guest cleanup started (job #{job.job_id}).', 'info')
     return redirect(url_for('admin.guests'))
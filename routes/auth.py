@@ -3,10 +3,16 @@ Authentication Routes - Login, Logout, Registration
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, current_app
-from models.models import User, Role, Department, AppConfig, GuestOTP
+from models.models import User, Role
 from models import db
+from utils import reference_cache, guest_otp
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
-from utils.email_utils import send_email
+from utils.email_utils import queue_email
+from utils.password_utils import PasswordServiceBusy, UNUSABLE_PASSWORD
+from utils.settings import get_settings
+from utils.guest_ids import save_with_guest_id
+from utils.server_session import start_session, revoke_user_sessions
+from utils.auth_utils import find_login_user, role_key_for_id, has_role, current_user
 import os
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -18,67 +24,48 @@ def login():
         identifier = (request.form.get('identifier') or request.form.get('email') or '').strip()
         password = request.form.get('password')
         
-        # Find user: students by username, others by email
-        user = None
-        user_by_username = User.query.filter_by(username=identifier).first() if identifier else None
-        if user_by_username:
-            role_name = (user_by_username.role.role_name or '').lower() if user_by_username.role else ''
-            if role_name == 'student':
-                user = user_by_username
-            else:
-                flash('Non-students must login with email.', 'error')
-                return redirect(url_for('auth.login'))
+        # Find user: students by username, others by email (one joined query)
+        user, lookup_error = find_login_user(identifier)
+        if lookup_error:
+            flash(lookup_error, 'error')
+            return redirect(url_for('auth.login'))
 
-        if not user:
-            user_by_email = User.query.filter_by(email=identifier).first() if identifier else None
-            if user_by_email:
-                role_name = (user_by_email.role.role_name or '').lower() if user_by_email.role else ''
-                if role_name == 'student' and user_by_email.username:
-                    flash('Students must login using username.', 'error')
-                    return redirect(url_for('auth.login'))
-                user = user_by_email
+        try:
+            password_ok = bool(user) and user.check_password(password)
+        except PasswordServiceBusy:
+            flash('Too many sign-in attempts right now. Please try again in a few seconds.', 'error')
+            response = current_app.make_response(render_template('auth/login.html', guest_enabled=get_settings().guest_enabled))
+            response.status_code = 503
+            response.headers['Retry-After'] = '5'
+            return response
+
+        if password_ok:
+            # Transparently upgrade hashes made with an older method/cost
+            if user.password_needs_rehash():
+                try:
+                    user.set_password(password)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
 
-        if user and user.check_password(password):
             # If this is a guest user, block login when expired/archived.
             # Do not affect other roles.
             from datetime import datetime as _dt
-            role_name_db = (user.role.role_name or '').strip().lower() if user.role else ''
-            is_guest_user = role_name_db == 'guest' or bool(getattr(user, 'is_guest', False))
+            role_raw = role_key_for_id(user.role_id) or ''
+            is_guest_user = role_raw == 'guest' or bool(getattr(user, 'is_guest', False))
             if is_guest_user:
-                # If expiry_date set and in the past, mark expired and prevent login
-                if getattr(user, 'expiry_date', None) and user.expiry_date and _dt.utcnow() > user.expiry_date:
-                    try:
-                        user.guest_status = 'expired'
-                        db.session.commit()
-                    except Exception:
-                        db.session.rollback()
+                # Expired by date (the lifecycle worker records the status later) or already marked
+                if (user.expiry_date and _dt.utcnow() > user.expiry_date) or user.guest_status == 'expired':
                     flash('Guest account expired. Please request a new guest account.', 'error')
                     return redirect(url_for('auth.login'))
 
-            # Set session
-            session.permanent = True
-            session['user_id'] = user.user_id
-            session['full_name'] = user.full_name
-            session['email'] = user.email
-            session['role_id'] = user.role_id
-            # Normalize and canonicalize role name for session and redirects
-            role_raw = (user.role.role_name or '').strip().lower()
-            display_map = {
-                'guest': 'Guest',
-                'student': 'Student',
-                'event organizer': 'Event Organizer',
-                'organizer': 'Event Organizer',
-                'hod': 'HOD',
-                'principal': 'Principal',
-                'admin': 'Admin'
-            }
-            session['role_name'] = display_map.get(role_raw, (user.role.role_name or '').title())
-            session['dept_id'] = user.dept_id
+            # Fresh session id; name, email, department etc. are read from the user row when needed
+            start_session(user)
 
             # Redirect based on normalized role
             if role_raw == 'student':
                 return redirect(url_for('student.dashboard'))
-            elif role_raw in ('event organizer', 'organizer'):
+            elif role_raw == 'organizer':
                 return redirect(url_for('organizer.dashboard'))
             elif role_raw == 'hod':
                 return redirect(url_for('hod.dashboard'))
@@ -89,20 +76,18 @@ def login():
         else:
             flash('Invalid email or password', 'error')
     
-    guest_enabled = AppConfig.query.get('guest_enabled')
+    guest_enabled = get_settings().guest_enabled
     return render_template('auth/login.html', guest_enabled=guest_enabled)
 
 
 
     # --- Guest login flow (mobile OTP only) ---
 from datetime import datetime, timedelta
-import random
 
 @bp.route('/guest', methods=['GET', 'POST'])
 def guest_request():
     """Guest login using mobile number only: send OTP and redirect to verify."""
-    cfg = AppConfig.query.get('guest_enabled')
-    if not cfg or cfg.value != '1':
+    if not get_settings().guest_enabled:
         flash('Guest login is disabled', 'warning')
         return redirect(url_for('auth.login'))
 
@@ -112,17 +97,12 @@ def guest_request():
             flash('Please provide a valid mobile number', 'error')
             return redirect(url_for('auth.guest_request'))
 
-        # Rate limiting: max 5 OTPs in last hour
-        recent = GuestOTP.query.filter(GuestOTP.mobile_number == mobile,
-                                       GuestOTP.created_at >= datetime.utcnow() - timedelta(hours=1)).count()
-        if recent >= 5:
-            flash('Too many OTP requests. Try again later.', 'error')
+        allowed, retry_after = guest_otp.allow('request', mobile, request.remote_addr)
+        if not allowed:
+            flash(f'Too many OTP requests. Try again in {int(retry_after // 60) + 1} minute(s).', 'error')
             return redirect(url_for('auth.login'))
 
-        code = f"{random.randint(100000, 999999)}"
-        otp = GuestOTP(mobile_number=mobile, code=code)
-        db.session.add(otp)
-        db.session.commit()
+        code = guest_otp.issue_otp(mobile)
 
         # Send SMS via configured provider (Twilio) with graceful fallback
         sent = False
@@ -151,14 +131,10 @@ def guest_verify():
 
     if request.method == 'POST':
         code = (request.form.get('code') or '').strip()
-        otp = GuestOTP.query.filter_by(mobile_number=mobile, code=code, used=False).order_by(GuestOTP.created_at.desc()).first()
-        if not otp or (datetime.utcnow() - otp.created_at).total_seconds() > 300:
-            flash('Invalid or expired OTP', 'error')
-            return redirect(url_for('auth.guest_request'))
-
-        otp.used = True
-        db.session.commit()
-
+        allowed, _ = guest_otp.allow('verify', mobile, request.remote_addr)
+        if not allowed:
+            flash('Too many attempts. Please request a new OTP later.', 'error')
+            return redirect(url_for('auth.login'))
         # Prefer users with this mobile who have the Guest role, otherwise match by mobile number
         user = User.query.filter_by(mobile_number=mobile).first()
         if user:
@@ -166,6 +142,10 @@ def guest_verify():
             if role_name_db != 'guest' and not getattr(user, 'is_guest', False):
                 # existing non-guest user with same mobile — treat as no match
                 user = None
+
+        if not guest_otp.verify_otp(mobile, code):
+            flash('Invalid or expired OTP', 'error')
+            return redirect(url_for('auth.guest_request'))
         # Prefer a dedicated 'Guest' role; fall back to 'Student' if not present
         guest_role = Role.query.filter(Role.role_name.ilike('guest')).first()
         # Ensure a dedicated Guest role exists; create if missing
@@ -179,11 +159,7 @@ def guest_verify():
                 guest_role = None
         student_role = Role.query.filter(Role.role_name.ilike('student')).first()
         if not user:
-            validity_days = 30
-            vcfg = AppConfig.query.get('guest_validity_days')
-            if vcfg and vcfg.value and vcfg.value.isdigit():
-                validity_days = int(vcfg.value)
-            expiry = datetime.utcnow() + timedelta(days=validity_days)
+            expiry = datetime.utcnow() + timedelta(days=get_settings().guest_validity_days)
             assigned_role_id = None
             if guest_role:
                 assigned_role_id = guest_role.role_id
@@ -199,58 +175,25 @@ def guest_verify():
                 role_id=assigned_role_id,
                 dept_id=None
             )
-            user.set_password(__import__('uuid').uuid4().hex)
+            # Guests sign in by OTP only: no password, and no slow hash per attempt
+            user.password = UNUSABLE_PASSWORD
             # Rely on role assignment for guest semantics; legacy `is_guest` column left as-is
             user.mobile_number = mobile
-            # generate a short unique guest identifier and store it in `username`
-            import uuid
-            def make_code():
-                return f"G-{uuid.uuid4().hex[:8].upper()}"
-            code = make_code()
-            # ensure uniqueness among usernames
-            from models.models import User as _U
-            while _U.query.filter_by(username=code).first():
-                code = make_code()
-            user.username = code
-            # also store the guest identifier in `username` so it can be used as Guest ID
-            user.username = code
             user.expiry_date = expiry
             user.guest_status = 'active'
-            db.session.add(user)
-            db.session.commit()
+            # The guest identifier lives in `username` (unique); allocated on insert
+            save_with_guest_id(user)
         else:
             # ensure existing guest user has a username we can use as Guest ID
             if not user.username:
-                import uuid
-                def make_code():
-                    return f"G-{uuid.uuid4().hex[:8].upper()}"
-                code = make_code()
-                from models.models import User as _U
-                while _U.query.filter_by(username=code).first():
-                    code = make_code()
-                user.username = code
-                db.session.commit()
-            if user.expiry_date and datetime.utcnow() > user.expiry_date:
-                user.guest_status = 'expired'
-                db.session.commit()
+                save_with_guest_id(user)
+            if (user.expiry_date and datetime.utcnow() > user.expiry_date) or user.guest_status == 'expired':
                 flash('Guest account expired. Please request a new guest account.', 'error')
                 return redirect(url_for('auth.login'))
 
-        session.permanent = True
-        session['user_id'] = user.user_id
-        session['full_name'] = user.full_name
-        # For guest users prefer mobile_number; email may be None
-        session['email'] = user.email
-        session['role_id'] = user.role_id
-        # Use Guest as display role for guest logins
-        session['role_name'] = 'Guest'
-        session['dept_id'] = user.dept_id
-        # Backwards-compatible session flag
-        session['is_guest'] = (user.role and (user.role.role_name or '').strip().lower() == 'guest') or bool(getattr(user, 'is_guest', False))
-        session['mobile_number'] = user.mobile_number
-        # store guest identifier in session (username acts as Guest ID)
-        session['guest_code'] = user.username
-        session['username'] = user.username
+        # The Guest ID (username) and mobile number are read from the user row when needed
+        is_guest = (user.role and (user.role.role_name or '').strip().lower() == 'guest') or bool(getattr(user, 'is_guest', False))
+        start_session(user, is_guest=is_guest)
         return redirect(url_for('student.dashboard'))
 
     return render_template('auth/guest_verify.html', mobile=mobile)
@@ -301,13 +244,14 @@ def register():
         
         db.session.add(user)
         db.session.commit()
+        reference_cache.invalidate('organizers')
         
         flash('Registration successful! Please login.', 'success')
         return redirect(url_for('auth.login'))
     
     # Get roles and departments for form
-    roles = Role.query.all()
-    departments = Department.query.all()
+    roles = reference_cache.roles()
+    departments = reference_cache.departments()
     
     return render_template('auth/register.html', roles=roles, departments=departments)
 
@@ -331,7 +275,7 @@ def change_password():
     if 'user_id' not in session:
         return redirect(url_for('auth.login'))
     # Prevent guest users from using the change-password feature
-    if session.get('is_guest') or (session.get('role_name') or '').strip().lower() == 'guest':
+    if has_role('guest'):
         flash('Guest accounts cannot change password.', 'warning')
         return redirect(url_for('common.profile'))
     
@@ -340,7 +284,7 @@ def change_password():
         new_password = request.form.get('new_password')
         confirm_password = request.form.get('confirm_password')
         
-        user = User.query.get(session['user_id'])
+        user = current_user()
         
         if not user or not user.check_password(old_password):
             flash('Current password is incorrect.', 'danger')
@@ -356,6 +300,8 @@ def change_password():
         
         user.set_password(new_password)
         db.session.commit()
+        # Sign out every other device
+        revoke_user_sessions([user.user_id], keep_current=True)
         flash('Password changed successfully.', 'success')
         return redirect(url_for('auth.login'))
     
@@ -388,7 +334,16 @@ def forgot_password():
                 f"{reset_url}\n\n"
                 "If you didn't request this, you can ignore this email."
             )
-            
+            if user.email:
+                try:
+                    queue_email(user.email, subject, body)
+                    db.session.commit()
+                except Exception as exc:
+                    db.session.rollback()
+                    current_app.logger.warning(f"Password reset email queue failed: {exc}")
+
+        flash('If the account exists, a password reset link has been sent.', 'info')
+
     return render_template('auth/forgot_password.html')
 
 
@@ -425,6 +380,7 @@ def reset_password(token):
 
         user.set_password(new_password)
         db.session.commit()
+        revoke_user_sessions([user.user_id])
         flash('Password reset successfully. Please log in.', 'success')
         return redirect(url_for('auth.login'))
 
@@ -4,6 +4,7 @@ Common Routes - Shared functionality across roles
 
 from flask import Blueprint, render_template, session, redirect, url_for, request, flash, current_app, abort
 from models import db
+from utils.auth_utils import current_user
 
 bp = Blueprint('common', __name__)
 
@@ -14,7 +15,7 @@ def profile():
         return redirect(url_for('auth.login'))
     
     from models.models import User
-    user = User.query.get(session['user_id'])
+    user = current_user()
     if not user:
         flash('User not found.', 'error')
         return redirect(url_for('auth.login'))
@@ -56,7 +57,6 @@ def profile():
 
             if full_name != user.full_name:
                 user.full_name = full_name
-                session['full_name'] = full_name
 
         # Update mobile for guest users
         if is_guest_user:
@@ -67,14 +67,12 @@ def profile():
                     flash('Mobile number already in use. Please choose another.', 'error')
                     return redirect(url_for('common.profile'))
                 user.mobile_number = mobile
-                session['mobile_number'] = mobile
         else:
             if email != (user.email or ''):
                 if User.query.filter_by(email=email).first():
                     flash('Email already in use. Please choose another.', 'error')
                     return redirect(url_for('common.profile'))
                 user.email = email
-                session['email'] = email
 
         db.session.commit()
         flash('Profile updated successfully.', 'success')
@@ -95,8 +93,7 @@ def session_info():
     items = [f"{k}: {v}" for k, v in session.items()]
     # Also fetch the user's stored role name from the database for comparison
     try:
-        from models.models import User
-        user = User.query.get(session['user_id'])
+        user = current_user()
         db_role = user.role.role_name if user and user.role else 'N/A'
         items.append(f"db_role: {db_role}")
     except Exception as e:
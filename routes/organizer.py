@@ -5,15 +5,20 @@ Event Organizer Routes - Create Events, Manage Registrations, QR Scanning
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, current_app, send_file
 import os
 import json
-from models.models import Event, Venue, Department, Registration, Attendance, User, Approval, Certificate, Feedback, CertificateTemplate
+from models.models import Event, Venue, Registration, Attendance, User, Approval, Certificate, Feedback, CertificateTemplate
 from models import db
+from utils import reference_cache
 from datetime import datetime, date, timedelta
 import uuid
-from functools import wraps
+from utils.auth_utils import role_required
 from sqlalchemy import func
 from utils.certificate_generator import generate_certificate, generate_certificate_with_template
-from utils.email_utils import send_email
+from utils.email_utils import queue_email
 from utils.qr_utils import validate_qr_code
+from utils.registrations import seat_limit
+from utils.conditional import make_etag, not_modified, with_etag
+from utils.jobs import submit_job
+from utils.poster_pipeline import process_event_poster
 from werkzeug.utils import secure_filename
 from openpyxl import load_workbook
 from io import BytesIO
@@ -23,15 +28,7 @@ from reportlab.lib.units import mm
 
 bp = Blueprint('organizer', __name__, url_prefix='/organizer')
 
-def organizer_required(f):
-    """Decorator to require organizer login"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session or session.get('role_name', '').lower() not in ('event organizer', 'organizer'):
-            flash('Access denied', 'error')
-            return redirect(url_for('auth.login'))
-        return f(*args, **kwargs)
-    return decorated_function
+organizer_required = role_required('organizer')
 
 
 @bp.route('/dashboard')
@@ -257,6 +254,10 @@ def create_event():
             db.session.rollback()
             flash('Failed to create event due to database error.', 'error')
             return redirect(url_for('organizer.create_event'))
+
+        if event.poster_url:
+            # Thumbnails, WebP/AVIF variants and metadata stripping happen off the request
+            submit_job('poster_variants', process_event_poster, event.event_id, created_by=session['user_id'])
         
         # Create approval workflow
         # Determine department to check for HOD approval: prefer venue.dept_id if venue provided,
@@ -321,10 +322,10 @@ def create_event():
                                         </div>
                                         """
                                         try:
-                                                send_email(hod.email, subject, body, html_body)
+                                                queue_email(hod.email, subject, body, html_body)
                                         except Exception as exc:
                                                 current_app.logger.warning(f"HOD email send failed: {exc}")
-                                                flash('Event created, but email notification failed. Check SMTP settings.', 'warning')
+                                                flash('Event created, but the email notification could not be queued.', 'warning')
         
         # Always create Principal approval entry (will be pending until HOD approves if needed)
         principal = User.query.join(User.role).filter(
@@ -354,7 +355,7 @@ def create_event():
                     f"Login: {login_url}\n"
                 )
                 try:
-                    send_email(principal.email, subject, body)
+                    queue_email(principal.email, subject, body)
                 except Exception as exc:
                     current_app.logger.warning(f"Principal email send failed: {exc}")
         
@@ -364,8 +365,8 @@ def create_event():
         return redirect(url_for('organizer.dashboard'))
     
     # Get venues, departments, and templates
-    venues = Venue.query.all()
-    departments = Department.query.all()
+    venues = reference_cache.venues()
+    departments = reference_cache.departments()
     templates = CertificateTemplate.query.filter_by(organizer_id=session['user_id']).order_by(
         CertificateTemplate.created_at.desc()
     ).all()
@@ -486,10 +487,17 @@ def edit_event(event_id):
             flash('Event updated successfully.', 'success')
 
         db.session.commit()
+        # A venue change always sends the event back for approval, and seats it
+        # frees go to the waitlist only once it is approved again. A smaller
+        # venue cannot take seats back from registered students: warn instead.
+        limit = seat_limit(event)
+        if limit is not None and event.registered_count > limit:
+            flash(f'{event.registered_count} students are registered but the venue seats {limit}; '
+                  f'{event.registered_count - limit} will not have a seat.', 'warning')
         return redirect(url_for('organizer.view_event', event_id=event.event_id))
 
-    venues = Venue.query.all()
-    departments = Department.query.all()
+    venues = reference_cache.venues()
+    departments = reference_cache.departments()
     templates = CertificateTemplate.query.filter_by(organizer_id=organizer_id).order_by(
         CertificateTemplate.created_at.desc()
     ).all()
@@ -710,6 +718,39 @@ def view_event(event_id):
                          certificate_templates=certificate_templates)
 
 
+@bp.route('/event/<int:event_id>/announce', methods=['POST'])
+@organizer_required
+def announce_event(event_id):
+    """Email an announcement to every registrant via the outbox"""
+    from utils.notifications import send_event_announcement
+    organizer_id = session['user_id']
+
+    event = Event.query.filter_by(
+        event_id=event_id,
+        organizer_id=organizer_id
+    ).first_or_404()
+
+    subject = (request.form.get('subject') or '').strip()
+    message = (request.form.get('message') or '').strip()
+    if not subject or not message:
+        flash('Subject and message are required.', 'error')
+        return redirect(url_for('organizer.view_event', event_id=event_id))
+
+    try:
+        stats = send_event_announcement(event, subject, message)
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.warning(f"Announcement fan-out failed: {exc}")
+        flash('Failed to queue the announcement.', 'error')
+        return redirect(url_for('organizer.view_event', event_id=event_id))
+
+    if stats['queued']:
+        flash(f"Announcement queued for {stats['queued']} registrant(s).", 'success')
+    else:
+        flash('This announcement was already sent to all registrants.', 'info')
+    return redirect(url_for('organizer.view_event', event_id=event_id))
+
+
 @bp.route('/event/<int:event_id>/assign-prize', methods=['POST'])
 @organizer_required
 def assign_prize(event_id):
@@ -1054,6 +1095,18 @@ def download_attendance(event_id, format):
         event_id=event_id,
         organizer_id=organizer_id
     ).first_or_404()
+
+    # Version: the event row plus the registration/attendance counters and high-water marks
+    counters = db.session.query(
+        func.count(Registration.registration_id), func.max(Registration.registration_id),
+        func.count(Attendance.attendance_id), func.max(Attendance.attendance_id)
+    ).outerjoin(Attendance, Attendance.registration_id == Registration.registration_id).filter(
+        Registration.event_id == event_id
+    ).one()
+    etag = make_etag('attendance-export', event_id, format, event.updated_at, *counters)
+    cached = not_modified(etag)
+    if cached:
+        return cached
     
     # Get attended registrations
     attended_regs = db.session.query(Registration).join(Attendance).filter(
@@ -1141,12 +1194,12 @@ def download_attendance(event_id, format):
         output.seek(0)
         
         filename = f"attendance_{event.title.replace(' ', '_')}_{event.date.strftime('%Y%m%d')}.xlsx"
-        return send_file(
+        return with_etag(send_file(
             output,
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
             as_attachment=True,
             download_name=filename
-        )
+        ), etag)
     
     elif format == 'pdf':
         # Create PDF
@@ -1222,12 +1275,12 @@ def download_attendance(event_id, format):
         output.seek(0)
         
         filename = f"attendance_{event.title.replace(' ', '_')}_{event.date.strftime('%Y%m%d')}.pdf"
-        return send_file(
+        return with_etag(send_file(
             output,
             mimetype='application/pdf',
             as_attachment=True,
             download_name=filename
-        )
+        ), etag)
     
     flash('Invalid format specified', 'error')
     return redirect(url_for('organizer.view_event', event_id=event_id))
@@ -1630,17 +1683,24 @@ def get_event_stats(event_id):
     if not event:
         return jsonify({'success': False, 'message': 'Event not found'}), 404
     
-    registrations_count = Registration.query.filter_by(event_id=event_id).count()
-    attended_count = db.session.query(Attendance).join(Registration).filter(
+    # Both counters in one query; they are also the version of this response
+    registrations_count, attended_count = db.session.query(
+        func.count(Registration.registration_id),
+        func.count(Attendance.attendance_id)
+    ).outerjoin(Attendance, Attendance.registration_id == Registration.registration_id).filter(
         Registration.event_id == event_id
-    ).count()
-    
-    return jsonify({
+    ).one()
+
+    etag = make_etag('stats', event_id, registrations_count, attended_count)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+    return with_etag(jsonify({
         'success': True,
         'registered': registrations_count,
         'attended': attended_count,
         'remaining': registrations_count - attended_count
-    })
+    }), etag)
 
 
 @bp.route('/scan/<int:event_id>')
@@ -1667,7 +1727,10 @@ def scan_from_url(event_id):
         flash('QR code is for a different event.', 'error')
         return redirect(url_for('organizer.view_event', event_id=event_id))
 
-    registration = Registration.query.get(qr_info['registration_id'])
+    # Tokens from utils.qr_utils.new_qr_token carry no registration id
+    registration = Registration.query.filter_by(qr_code=qr_code).first()
+    if not registration and qr_info['registration_id']:
+        registration = Registration.query.get(qr_info['registration_id'])
     if not registration or registration.event_id != event_id:
         flash('Registration not found for this event.', 'error')
         return redirect(url_for('organizer.view_event', event_id=event_id))
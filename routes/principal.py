@@ -3,26 +3,20 @@ Principal Routes - Final Event Approval
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, current_app
-from models.models import Event, Approval, User
-from sqlalchemy import func, or_
+from models.models import Event, Approval
+from sqlalchemy import func
 from models import db
+from utils import reference_cache
 from datetime import datetime
-from functools import wraps
+from utils.auth_utils import role_required
 from utils.venue_utils import check_venue_clash, get_clash_message
-from utils.email_utils import send_email
+from utils.email_utils import queue_email
+from utils.registrations import promote_waitlist
 import os
 
 bp = Blueprint('principal', __name__, url_prefix='/principal')
 
-def principal_required(f):
-    """Decorator to require principal login"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session or session.get('role_name', '').lower() != 'principal':
-            flash('Access denied', 'error')
-            return redirect(url_for('auth.login'))
-        return f(*args, **kwargs)
-    return decorated_function
+principal_required = role_required('principal')
 
 
 @bp.route('/dashboard')
@@ -78,12 +72,7 @@ def dashboard():
                          all_approvals=all_approvals,
                          event_query=event_query,
                          organizer_filter=organizer_filter,
-                         organizers=User.query.join(User.role).filter(
-                             or_(
-                                 User.role.has(role_name='Event Organizer'),
-                                 User.role.has(role_name='Organizer')
-                             )
-                         ).order_by(User.full_name.asc()).all())
+                         organizers=reference_cache.organizers())
 
 
 @bp.route('/approve-event/<int:approval_id>', methods=['GET', 'POST'])
@@ -150,11 +139,14 @@ def approve_event(approval_id):
                     f"Login: {login_url}\n"
                 )
                 try:
-                    send_email(event.organizer.email, subject, body)
+                    queue_email(event.organizer.email, subject, body)
                 except Exception as exc:
                     current_app.logger.warning(f"Organizer approval email failed: {exc}")
             
             db.session.commit()
+            if event.status == 'approved':
+                # Seats freed by a move to a bigger venue go to the waitlist
+                promote_waitlist(event.event_id)
             flash('Event approved successfully!', 'success')
             
         elif action == 'reject':
@@ -178,7 +170,7 @@ def approve_event(approval_id):
                     f"Login: {login_url}\n"
                 )
                 try:
-                    send_email(event.organizer.email, subject, body)
+                    queue_email(event.organizer.email, subject, body)
                 except Exception as exc:
                     current_app.logger.warning(f"Organizer rejection email failed: {exc}")
             
@@ -2,29 +2,28 @@
 Student Routes - Dashboard, Event Registration, Certificates, Feedback
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, send_file
-from models.models import Event, Registration, Attendance, Certificate, Feedback, User, Venue, Team, TeamInvitation
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, current_app
+from models.models import Event, Registration, Attendance, Certificate, Feedback, Venue, Team, TeamInvitation
 from models import db
+from utils import reference_cache
 from datetime import datetime, date
-from sqlalchemy import or_
-from utils.qr_utils import generate_qr_code
-from functools import wraps
-import os
+from utils.qr_utils import generate_qr_png, qr_version
+from utils.registrations import (ALREADY_REGISTERED, REGISTERED, register_student, create_team, seat_limit, waitlist_position,
+                                  waitlisted_events, leave_waitlist, cancel_registration)
+from utils.conditional import make_etag, not_modified, with_etag
+from utils.file_serving import serve_static_file
+from utils.event_catalog import catalog_page, catalog_query, parse_filters
+from utils.auth_utils import role_required, has_role, current_user
+from utils.response_cache import cached_response
+from utils.team_membership import parse_usernames, invite_members, accept_invitation, reject_invitation
 
 bp = Blueprint('student', __name__, url_prefix='/student')
 
-def student_required(f):
-    """Decorator to require student login"""
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        # Allow regular students and guest users (role-based or legacy flag)
-        if 'user_id' not in session or not (
-            session.get('role_name', '').lower() in ('student', 'guest') or session.get('is_guest')
-        ):
-            flash('Access denied', 'error')
-            return redirect(url_for('auth.login'))
-        return f(*args, **kwargs)
-    return decorated_function
+# Upcoming events shown on the dashboard before "Browse all events"
+DASHBOARD_EVENTS = 6
+
+# Regular students and guest users (role-based or legacy flag)
+student_required = role_required('student', 'guest')
 
 
 @bp.route('/dashboard')
@@ -33,14 +32,10 @@ def dashboard():
     """Student dashboard - view upcoming approved events"""
     # Get upcoming approved events
     today = date.today()
-    # For guests, hide campus-exclusive events
-    base_query = Event.query.filter(
-        Event.status == 'approved',
-        Event.date >= today
-    )
-    if session.get('role_name', '').lower() == 'guest' or session.get('is_guest'):
-        base_query = base_query.filter(Event.is_campus_exclusive == False)
-    upcoming_events = base_query.order_by(Event.date, Event.start_time).all()
+    # For guests, hide campus-exclusive events; the full list lives on the events page
+    is_guest = has_role('guest')
+    upcoming_count = catalog_query({}, hide_campus_exclusive=is_guest).count()
+    upcoming_events, more_upcoming = catalog_page({}, limit=DASHBOARD_EVENTS, hide_campus_exclusive=is_guest)
     
     # Get student's registrations
     student_id = session['user_id']
@@ -165,6 +160,8 @@ def dashboard():
 
     return render_template('student/dashboard.html', 
                          upcoming_events=upcoming_events,
+                         upcoming_count=upcoming_count,
+                         more_upcoming=more_upcoming,
                          registered_event_ids=registered_event_ids,
                          past_events=past_events,
                          attended_event_ids=attended_event_ids,
@@ -174,69 +171,69 @@ def dashboard():
 
 @bp.route('/events')
 @student_required
+@cached_response(tags=('events', 'registrations'))
 def events():
-    """View all approved upcoming events"""
-    today = date.today()
-    organizer_filter = request.args.get('organizer', '')
-    mode_filter = request.args.get('mode', '')
-    search_query = request.args.get('q', '').strip()
-
+    """Browse approved upcoming events (first page; more load via events_feed)"""
+    filters = parse_filters(request.args)
     # For guests, hide campus-exclusive events
-    query = Event.query.filter(
-        Event.status == 'approved',
-        Event.date >= today
-    )
-    if session.get('role_name', '').lower() == 'guest' or session.get('is_guest'):
-        query = query.filter(Event.is_campus_exclusive == False)
-
-    if organizer_filter:
-        query = query.filter_by(organizer_id=int(organizer_filter))
+    events, next_cursor = catalog_page(filters, hide_campus_exclusive=has_role('guest'))
+    registered_event_ids, attended_event_ids = _registration_state(session['user_id'], [e.event_id for e in events])
 
-    if mode_filter:
-        query = query.filter_by(mode=mode_filter)
+    return render_template('student/events.html',
+                         events=events,
+                         next_cursor=next_cursor,
+                         registered_event_ids=registered_event_ids,
+                         attended_event_ids=attended_event_ids,
+                         organizers=reference_cache.organizers(),
+                         departments=reference_cache.departments(),
+                         filters=filters,
+                         organizer_filter=filters['organizer'],
+                         mode_filter=filters['mode'],
+                         search_query=filters['q'])
 
-    if search_query:
-        query = query.filter(Event.title.ilike(f"%{search_query}%"))
 
-    events = query.order_by(Event.date, Event.start_time).all()
-    
-    # Get student's registrations and attended events
-    student_id = session['user_id']
-    registrations = Registration.query.filter_by(student_id=student_id).all()
-    registered_event_ids = [r.event_id for r in registrations]
+@bp.route('/events/feed')
+@student_required
+def events_feed():
+    """Next page of the event catalog as rendered cards (infinite scroll)"""
+    filters = parse_filters(request.args)
+    events, next_cursor = catalog_page(filters, cursor=request.args.get('cursor'),
+                                       hide_campus_exclusive=has_role('guest'))
+    registered_event_ids, attended_event_ids = _registration_state(session['user_id'], [e.event_id for e in events])
+    html = render_template('student/_event_cards.html',
+                           events=events,
+                           registered_event_ids=registered_event_ids,
+                           attended_event_ids=attended_event_ids)
+    return jsonify({'html': html, 'next_cursor': next_cursor})
+
+
+def _registration_state(student_id, event_ids):
+    """Registered and attended (already ended) event ids among `event_ids`."""
+    if not event_ids:
+        return set(), set()
+    rows = db.session.query(
+        Registration.event_id, Attendance.attendance_id, Event.date, Event.end_time
+    ).join(Event, Event.event_id == Registration.event_id).outerjoin(
+        Attendance, Attendance.registration_id == Registration.registration_id
+    ).filter(
+        Registration.student_id == student_id,
+        Registration.event_id.in_(event_ids)
+    ).all()
 
-    # Compute attended event ids for this student but only for events that have ended
     now = datetime.now()
-    attended_rows = db.session.query(Registration.event_id, Event.date, Event.end_time).join(Attendance).join(Event, Event.event_id==Registration.event_id).filter(
-        Registration.student_id == student_id
-    ).all()
+    registered_event_ids = set()
     attended_event_ids = set()
-    for row in attended_rows:
-        ev_date = row[1]
-        ev_end = row[2]
+    for event_id, attendance_id, ev_date, ev_end in rows:
+        registered_event_ids.add(event_id)
+        if attendance_id is None:
+            continue
         try:
-            ev_end_dt = datetime.combine(ev_date, ev_end)
-            if now >= ev_end_dt:
-                attended_event_ids.add(row[0])
+            if now >= datetime.combine(ev_date, ev_end):
+                attended_event_ids.add(event_id)
         except Exception:
             # If any data missing, include conservatively
-            attended_event_ids.add(row[0])
-
-    organizers = User.query.join(User.role).filter(
-        or_(
-            User.role.has(role_name='Event Organizer'),
-            User.role.has(role_name='Organizer')
-        )
-    ).order_by(User.full_name.asc()).all()
-    
-    return render_template('student/events.html', 
-                         events=events,
-                         registered_event_ids=registered_event_ids,
-                         attended_event_ids=attended_event_ids,
-                         organizers=organizers,
-                         organizer_filter=organizer_filter,
-                         mode_filter=mode_filter,
-                         search_query=search_query)
+            attended_event_ids.add(event_id)
+    return registered_event_ids, attended_event_ids
 
 
 @bp.route('/register/<int:event_id>', methods=['POST'])
@@ -264,28 +261,53 @@ def register_event(event_id):
     # If team event, redirect to team registration page
     if event.is_team_event:
         return redirect(url_for('student.team_register', event_id=event_id))
+
+    position = waitlist_position(event_id, student_id)
+    if position is not None:
+        flash(f'You are already on the waitlist for this event (position {position})', 'warning')
+        return redirect(url_for('student.my_registrations'))
     
-    # Create registration for individual event
-    registration = Registration(
-        event_id=event_id,
-        student_id=student_id,
-        qr_code='temp'  # Will be updated
-    )
-    db.session.add(registration)
-    db.session.commit()
-    
-    # Generate QR code
-    qr_data, qr_image = generate_qr_code(
-        registration.registration_id,
-        event_id,
-        student_id
-    )
-    
-    # Update QR code
-    registration.qr_code = qr_data
-    db.session.commit()
-
-    flash('Successfully registered for the event!', 'success')
+    # A seat against the venue capacity, or a place on the waitlist (utils.registrations)
+    status, result = register_student(event_id, student_id, seat_limit(event))
+    if status == ALREADY_REGISTERED:
+        flash('You are already registered for this event', 'warning')
+    elif status == REGISTERED:
+        flash('Successfully registered for the event!', 'success')
+    else:
+        flash(f'This event is full. You are number {result} on the waitlist and will be registered '
+              'automatically if a seat opens up.', 'info')
+    return redirect(url_for('student.my_registrations'))
+
+
+@bp.route('/registration/<int:registration_id>/cancel', methods=['POST'])
+@student_required
+def cancel_event_registration(registration_id):
+    """Cancel an individual registration; the seat goes to the waitlist"""
+    registration = Registration.query.filter_by(
+        registration_id=registration_id,
+        student_id=session['user_id']
+    ).first_or_404()
+    event = registration.event
+
+    if registration.team_id:
+        flash('Team registrations cannot be cancelled here', 'error')
+    elif registration.attendance is not None or event.date < date.today():
+        flash('This registration can no longer be cancelled', 'error')
+    else:
+        cancelled, _ = cancel_registration(registration)
+        if cancelled:
+            flash(f'Your registration for "{event.title}" has been cancelled', 'success')
+        else:
+            flash('This registration was already cancelled', 'warning')
+    return redirect(url_for('student.my_registrations'))
+
+
+@bp.route('/waitlist/<int:event_id>/leave', methods=['POST'])
+@student_required
+def leave_event_waitlist(event_id):
+    """Leave an event's waitlist"""
+    if leave_waitlist(event_id, session['user_id']):
+        flash('You have left the waitlist', 'info')
     return redirect(url_for('student.my_registrations'))
 
 
@@ -294,7 +316,7 @@ def register_event(event_id):
 def team_register(event_id):
     """Register for a team event - create team or join existing"""
     student_id = session['user_id']
-    student = User.query.get(student_id)
+    student = current_user()
     event = Event.query.get_or_404(event_id)
     
     if not event.is_team_event:
@@ -327,33 +349,14 @@ def team_register(event_id):
             flash('A team with this name already exists for this event', 'error')
             return redirect(url_for('student.team_register', event_id=event_id))
         
-        # Create team
-        team = Team(
-            event_id=event_id,
-            team_name=team_name,
-            leader_id=student_id
-        )
-        db.session.add(team)
-        db.session.commit()
-        
-        # Register team leader
-        registration = Registration(
-            event_id=event_id,
-            student_id=student_id,
-            team_id=team.team_id,
-            qr_code='temp'
-        )
-        db.session.add(registration)
-        db.session.commit()
-        
-        # Generate QR code
-        qr_data, qr_image = generate_qr_code(
-            registration.registration_id,
-            event_id,
-            student_id
-        )
-        registration.qr_code = qr_data
-        db.session.commit()
+        # Create the team and register its leader in one transaction
+        status, team = create_team(event_id, student_id, team_name, seat_limit(event))
+        if status == ALREADY_REGISTERED:
+            flash('You are already registered for this event', 'warning')
+            return redirect(url_for('student.my_registrations'))
+        if team is None:
+            flash('This event is full', 'error')
+            return redirect(url_for('student.events'))
         
         flash(f'Team "{team_name}" created! You can now invite team members.', 'success')
         return redirect(url_for('student.manage_team', team_id=team.team_id))
@@ -410,67 +413,17 @@ def invite_member(team_id):
         flash('Only team leader can invite members', 'error')
         return redirect(url_for('student.manage_team', team_id=team_id))
     
-    # Check team size limit
-    current_members = Registration.query.filter_by(team_id=team_id).count()
-    pending_count = TeamInvitation.query.filter_by(team_id=team_id, status='pending').count()
-    
-    if current_members >= team.event.max_team_size:
-        flash(f'Team already has maximum {team.event.max_team_size} members', 'error')
-        return redirect(url_for('student.manage_team', team_id=team_id))
-    
-    username = request.form.get('username', '').strip()
-    
-    if not username:
+    usernames = parse_usernames(request.form.get('usernames') or request.form.get('username'))
+    if not usernames:
         flash('Username is required', 'error')
         return redirect(url_for('student.manage_team', team_id=team_id))
-    
-    # Find user by username
-    invitee = User.query.filter_by(username=username).first()
-    if not invitee:
-        flash(f'User "{username}" not found', 'error')
-        return redirect(url_for('student.manage_team', team_id=team_id))
-    
-    # Allow inviting students and guests (role-based) or legacy guest flag
-    role_lower = (invitee.role.role_name or '').strip().lower() if invitee.role else ''
-    is_guest_invitee = role_lower == 'guest' or bool(getattr(invitee, 'is_guest', False))
-    if not (role_lower == 'student' or is_guest_invitee):
-        flash('You can only invite students or guest users by username', 'error')
-        return redirect(url_for('student.manage_team', team_id=team_id))
-    
-    # Can't invite yourself
-    if invitee.user_id == student_id:
-        flash('You cannot invite yourself', 'error')
-        return redirect(url_for('student.manage_team', team_id=team_id))
-    
-    # Check if already registered for this event
-    existing_reg = Registration.query.filter_by(
-        event_id=team.event_id,
-        student_id=invitee.user_id
-    ).first()
-    if existing_reg:
-        flash(f'{invitee.full_name} is already registered for this event', 'error')
-        return redirect(url_for('student.manage_team', team_id=team_id))
-    
-    # Check if already invited
-    existing_invite = TeamInvitation.query.filter_by(
-        team_id=team_id,
-        invitee_id=invitee.user_id,
-        status='pending'
-    ).first()
-    if existing_invite:
-        flash(f'{invitee.full_name} already has a pending invitation', 'warning')
-        return redirect(url_for('student.manage_team', team_id=team_id))
-    
-    # Create invitation
-    invitation = TeamInvitation(
-        team_id=team_id,
-        invitee_id=invitee.user_id,
-        status='pending'
-    )
-    db.session.add(invitation)
-    db.session.commit()
-    
-    flash(f'Invitation sent to {invitee.full_name}!', 'success')
+
+    # All usernames are checked together (utils.team_membership)
+    invited, errors = invite_members(team, student_id, usernames)
+    for message in errors:
+        flash(message, 'error')
+    if invited:
+        flash(f"Invitation sent to {', '.join(u.full_name for u in invited)}!", 'success')
     return redirect(url_for('student.manage_team', team_id=team_id))
 
 
@@ -504,60 +457,18 @@ def respond_invitation(invitation_id, action):
         flash('This invitation has already been responded to', 'warning')
         return redirect(url_for('student.team_invitations'))
     
-    team = invitation.team
-    event = team.event
-    
     if action == 'accept':
-        # Check if already registered for this event
-        existing = Registration.query.filter_by(
-            event_id=event.event_id,
-            student_id=student_id
-        ).first()
-        if existing:
-            flash('You are already registered for this event', 'error')
-            invitation.status = 'rejected'
-            invitation.responded_at = datetime.utcnow()
-            db.session.commit()
+        # Seat and registration are taken in one transaction (utils.team_membership)
+        team_id = invitation.team_id
+        joined, message = accept_invitation(invitation, student_id)
+        if not joined:
+            flash(message, 'error')
             return redirect(url_for('student.team_invitations'))
-        
-        # Check team size
-        current_members = Registration.query.filter_by(team_id=team.team_id).count()
-        if current_members >= event.max_team_size:
-            flash('Team is already full', 'error')
-            invitation.status = 'rejected'
-            invitation.responded_at = datetime.utcnow()
-            db.session.commit()
-            return redirect(url_for('student.team_invitations'))
-        
-        # Accept invitation - create registration
-        registration = Registration(
-            event_id=event.event_id,
-            student_id=student_id,
-            team_id=team.team_id,
-            qr_code='temp'
-        )
-        db.session.add(registration)
-        db.session.commit()
-        
-        # Generate QR code
-        qr_data, qr_image = generate_qr_code(
-            registration.registration_id,
-            event.event_id,
-            student_id
-        )
-        registration.qr_code = qr_data
-        
-        invitation.status = 'accepted'
-        invitation.responded_at = datetime.utcnow()
-        db.session.commit()
-        
-        flash(f'You have joined team "{team.team_name}"!', 'success')
-        return redirect(url_for('student.manage_team', team_id=team.team_id))
+        flash(message, 'success')
+        return redirect(url_for('student.manage_team', team_id=team_id))
     
     elif action == 'reject':
-        invitation.status = 'rejected'
-        invitation.responded_at = datetime.utcnow()
-        db.session.commit()
+        reject_invitation(invitation)
         flash('Invitation rejected', 'info')
     
     return redirect(url_for('student.team_invitations'))
@@ -580,13 +491,9 @@ def my_registrations():
 
     registrations = registrations_query.order_by(Registration.registered_at.desc()).all()
     
-    # Generate QR images for display
+    # QR images are served separately by registration_qr (cacheable per registration)
     registration_data = []
     for reg in registrations:
-        # Generate QR image from stored data
-        from utils.qr_utils import generate_qr_image
-        qr_image = generate_qr_image(reg.qr_code)
-        
         # Check attendance and only mark as attended if event has ended
         attendance = Attendance.query.filter_by(registration_id=reg.registration_id).first()
         attended_flag = bool(attendance)
@@ -594,15 +501,34 @@ def my_registrations():
         registration_data.append({
             'registration': reg,
             'event': reg.event,
-            'qr_image': qr_image,
             'attended': attended_flag
         })
 
     return render_template('student/my_registrations.html', 
                          registration_data=registration_data,
+                         waitlist=waitlisted_events(student_id),
+                         today=date.today(),
                          search_query=search_query)
 
 
+@bp.route('/registration/<int:registration_id>/qr.png')
+@student_required
+def registration_qr(registration_id):
+    """QR ticket image for one of my registrations"""
+    registration = Registration.query.filter_by(
+        registration_id=registration_id,
+        student_id=session['user_id']
+    ).first_or_404()
+
+    # A registration's QR code never changes; let the browser keep it for a day
+    etag = make_etag('qr', registration_id, *qr_version(registration.qr_code))
+    cached = not_modified(etag, max_age=86400)
+    if cached:
+        return cached
+    response = current_app.response_class(generate_qr_png(registration.qr_code), mimetype='image/png')
+    return with_etag(response, etag, max_age=86400)
+
+
 @bp.route('/my-certificates')
 @student_required
 def my_certificates():
@@ -670,11 +596,16 @@ def download_certificate(certificate_id):
         student_id=student_id
     ).first_or_404()
     
-    # Get full path
-    cert_path = os.path.join('static', certificate.certificate_url)
-    
-    if os.path.exists(cert_path):
-        return send_file(cert_path, as_attachment=True)
+    # Regeneration rewrites certificate_url/issued_at, so they version the file
+    etag = make_etag('certificate', certificate.certificate_id, certificate.certificate_url, certificate.issued_at)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    # Bytes come from the front proxy when FILE_SERVING_BACKEND is sendfile/accel
+    response = serve_static_file(certificate.certificate_url, as_attachment=True)
+    if response is not None:
+        return with_etag(response, etag)
     else:
         flash('Certificate file not found', 'error')
         return redirect(url_for('student.my_certificates'))
@@ -24,11 +24,4 @@ const modeSelect=document.getElementById('event-mode');const mode=modeSelect?mod
 document.addEventListener('DOMContentLoaded',function(){const deptSelect=document.getElementById('dept-select');if(deptSelect){deptSelect.addEventListener('change',updateVenueOptions);updateVenueOptions();}
 const modeSelect2=document.getElementById('event-mode');if(modeSelect2)modeSelect2.addEventListener('change',updateVenueOptions);});function formatDate(dateString){const date=new Date(dateString);return date.toLocaleDateString('en-US',{year:'numeric',month:'long',day:'numeric'});}
 function formatTime(timeString){const[hours,minutes]=timeString.split(':');const hour=parseInt(hours);const ampm=hour>=12?'PM':'AM';const displayHour=hour%12||12;return`${displayHour}:${minutes} ${ampm}`;}
-(function(){var modal,titleEl,bodyEl,okBtn,cancelBtn;function initModal(){modal=document.getElementById('custom-modal');if(!modal)return;titleEl=document.getElementById('custom-modal-title');bodyEl=document.getElementById('custom-modal-body');okBtn=document.getElementById('custom-modal-ok');cancelBtn=document.getElementById('custom-modal-cancel');window.closeCustomModal=function(){modal.classList.remove('show');modal.setAttribute('aria-hidden','true');};window.customAlert=function(message,title){return new Promise(function(resolve){titleEl.textContent=title||'Notice';bodyEl.textContent=message||'';cancelBtn.style.display='none';okBtn.textContent='OK';modal.classList.add('show');modal.setAttribute('aria-hidden','false');okBtn.focus();function cleanup(){okBtn.removeEventListener('click',onOk);}
-function onOk(){cleanup();window.closeCustomModal();resolve();}
-okBtn.addEventListener('click',onOk);});};window.customConfirm=function(message,title){return new Promise(function(resolve){titleEl.textContent=title||'Confirm';bodyEl.textContent=message||'';cancelBtn.style.display='';okBtn.textContent='Yes';modal.classList.add('show');modal.setAttribute('aria-hidden','false');okBtn.focus();function cleanup(){okBtn.removeEventListener('click',onOk);cancelBtn.removeEventListener('click',onCancel);}
-function onOk(){cleanup();window.closeCustomModal();resolve(true);}
-function onCancel(){cleanup();window.closeCustomModal();resolve(false);}
-okBtn.addEventListener('click',onOk);cancelBtn.addEventListener('click',onCancel);});};}
-if(document.readyState==='loading'){document.addEventListener('DOMContentLoaded',initModal);}else{initModal();}})();(function(){function handleToasts(){try{var key='dashboard_notifications_shown';var toasts=document.querySelectorAll('.dashboard-toast');if(!toasts||toasts.length===0)return;if(!sessionStorage.getItem(key)){setTimeout(function(){toasts.forEach(function(el){el.style.display='none';});try{sessionStorage.setItem(key,'1');}catch(e){}},5000);}else{toasts.forEach(function(el){el.style.display='none';});}}catch(e){console.error('Toast handler error',e);}}
-if(document.readyState==='loading'){document.addEventListener('DOMContentLoaded',handleToasts);}else{handleToasts();}})();
\ No newline at end of file
+console.log('Campus Event Management System - Loaded');
@@ -0,0 +1,23 @@
+"""Create responsive variants (and strip metadata) for posters uploaded before
+the poster pipeline existed. New uploads are processed automatically.
+Run:
+    python3 tools/backfill_posters.py           # events without variants
+    python3 tools/backfill_posters.py --force   # rebuild every poster
+"""
+import sys, os
+import argparse
+# make project root importable when running from tools/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import app
+from utils.jobs import run_job_inline
+from utils.poster_pipeline import backfill_posters, formats
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--force', action='store_true', help='re-process posters that already have variants')
+args = parser.parse_args()
+
+if __name__ == '__main__':
+    with app.app_context():
+        print(f"Formats: {', '.join(formats())}")
+        job = run_job_inline('poster_backfill', backfill_posters, force=args.force)
+        print(f'{job.status}: {job.message}')
@@ -0,0 +1,148 @@
+"""Bytes on the wire and latency with response compression off and on.
+Seeds students and one large event, then fetches the biggest pages and
+responses identity-encoded, gzip and (if the brotli package is installed)
+brotli. Sizes are what the client receives; latency includes compression.
+The streaming path is measured with a registrations CSV of the seeded rows,
+served by a benchmark-only route both as a generator (length unknown) and
+through send_file (direct passthrough); the bulk-upload CSV template is too
+small to be compressed (COMPRESSION_MIN_SIZE).
+Run:
+    python3 tools/bench_compression.py [--students 2000] [--registrations 1500] [--requests 30]
+"""
+import argparse
+import csv
+import io
+import os
+import tempfile
+from bench_support import load_app, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--students', type=int, default=2000)
+parser.add_argument('--registrations', type=int, default=1500)
+parser.add_argument('--requests', type=int, default=30)
+args = parser.parse_args()
+
+app = load_app()
+app.config['SESSION_COOKIE_SECURE'] = False
+# Measure compression, not the page cache
+os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+
+from datetime import date, time, timedelta
+from flask import Response, send_file, stream_with_context
+from sqlalchemy import insert, select
+from models import db
+from models.models import User, Role, Event, Registration
+from utils import compression, response_cache
+
+response_cache.configure(None)
+with app.app_context():
+    roles = {r.role_name: r.role_id for r in Role.query.all()}
+    admin = User(full_name='Bench Admin', email='admin@bench.local', password='x', role_id=roles['Admin'], dept_id=1)
+    organizer = User(full_name='Bench Organizer', email='org@bench.local', password='x', role_id=roles['Event Organizer'], dept_id=1)
+    student = User(full_name='Bench Student', email='student@bench.local', password='x', role_id=roles['Student'], dept_id=1)
+    db.session.add_all([admin, organizer, student])
+    db.session.flush()
+    db.session.execute(insert(User), [
+        {'full_name': f'Student {i}', 'email': f's{i}@bench.local', 'username': f'22CS{i:04d}', 'password': 'x',
+         'role_id': roles['Student'], 'dept_id': (i % 5) + 1}
+        for i in range(args.students)
+    ])
+    event = Event(title='Bench Fest', description='Benchmark event ' * 20, date=date.today() + timedelta(days=7),
+                  start_time=time(9), end_time=time(17), organizer_id=organizer.user_id, dept_id=1, status='approved')
+    db.session.add(event)
+    db.session.flush()
+    first_student = student.user_id + 1
+    db.session.execute(insert(Registration), [
+        {'event_id': event.event_id, 'student_id': first_student + i, 'qr_code': f'qr-{i}'}
+        for i in range(min(args.registrations, args.students))
+    ])
+    db.session.execute(insert(Event), [
+        {'title': f'Event {i}', 'description': 'Benchmark event', 'date': date.today() + timedelta(days=i % 30),
+         'start_time': time(9), 'end_time': time(17), 'organizer_id': organizer.user_id, 'dept_id': 1, 'status': 'approved'}
+        for i in range(100)
+    ])
+    db.session.commit()
+    users = {
+        'admin': (admin.user_id, admin.role_id, 'Admin', admin.full_name),
+        'organizer': (organizer.user_id, organizer.role_id, 'Event Organizer', organizer.full_name),
+        'student': (student.user_id, student.role_id, 'Student', student.full_name),
+    }
+    event_id = event.event_id
+
+PAGES = [
+    ('admin users', 'admin', '/admin/users'),
+    ('organizer event', 'organizer', f'/organizer/event/{event_id}'),
+    ('student events', 'student', '/student/events'),
+    ('events feed (json)', 'student', '/student/events/feed'),
+    ('registrations csv (gen)', 'admin', '/bench/registrations.csv'),
+    ('registrations csv (file)', 'admin', '/bench/registrations-file.csv'),
+]
+
+
+def registration_rows():
+    yield ['registration_id', 'student', 'email', 'username', 'qr_code', 'registered_at']
+    rows = db.session.execute(
+        select(Registration.registration_id, User.full_name, User.email, User.username,
+               Registration.qr_code, Registration.registered_at)
+        .join(User, User.user_id == Registration.student_id)
+        .where(Registration.event_id == event_id)
+        .order_by(Registration.registration_id)
+    )
+    yield from rows
+
+
+def csv_line(row):
+    out = io.StringIO()
+    csv.writer(out).writerow(row)
+    return out.getvalue()
+
+
+@app.route('/bench/registrations.csv')
+def bench_registrations_stream():
+    # Generator body: streamed, length unknown
+    return Response(stream_with_context(csv_line(row) for row in registration_rows()), mimetype='text/csv')
+
+
+export_path = os.path.join(tempfile.mkdtemp(prefix='campus-bench-'), 'registrations.csv')
+with app.app_context(), open(export_path, 'w', newline='') as f:
+    f.writelines(csv_line(row) for row in registration_rows())
+
+
+@app.route('/bench/registrations-file.csv')
+def bench_registrations_file():
+    # send_file body: direct passthrough, length known
+    return send_file(export_path, mimetype='text/csv')
+
+
+ENCODINGS = [('identity', 'identity')] + [('gzip', 'gzip')] + ([('br', 'br')] if compression.brotli else [])
+
+
+def client_for(key):
+    client = app.test_client()
+    user_id, role_id, role_name, full_name = users[key]
+    with client.session_transaction() as s:
+        s['user_id'] = user_id
+        s['role_id'] = role_id
+        s['role_name'] = role_name
+        s['full_name'] = full_name
+        s['dept_id'] = 1
+    return client
+
+
+print(f'{"response":<24}' + ''.join(f'{name:>22}' for name, _ in ENCODINGS))
+for label, key, url in PAGES:
+    client = client_for(key)
+    cells = []
+    for name, accept in ENCODINGS:
+        headers = {'Accept-Encoding': accept}
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, (url, response.status_code)
+        assert response.headers.get('Content-Encoding', 'identity') == name, (url, name)
+        size = len(response.data)
+        with Timer() as t:
+            for _ in range(args.requests):
+                client.get(url, headers=headers).data
+        cells.append(f'{size / 1024:8.1f}KB {t.elapsed / args.requests * 1000:7.2f}ms')
+    print(f'{label:<24}' + ''.join(f'{cell:>22}' for cell in cells))
+if not compression.brotli:
+    print('brotli not installed: gzip only (pip install brotli)')
@@ -0,0 +1,71 @@
+"""Count the SQL statements that load the logged-in user on common pages.
+Logs a student in and requests pages that show the user's name, role or
+department, counting every statement per page and those reading the users,
+roles or departments tables; with utils.auth_utils.current_user that is one
+joined query per request however often the view, the guards and the
+templates ask for the user.
+Run:
+    python3 tools/bench_current_user.py [--requests 200]
+"""
+import argparse
+from sqlalchemy import event
+from bench_support import load_app, Timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    app = load_app()
+    app.config['SESSION_COOKIE_SECURE'] = False
+
+    from datetime import date, time as clock
+    from models import db
+    from models.models import User, Role, Event
+    from utils.response_cache import configure
+
+    configure(None)
+
+    with app.app_context():
+        roles = {r.role_name: r.role_id for r in Role.query.all()}
+        student = User(full_name='Bench Student', username='B0001', email='b0001@campus.local',
+                       role_id=roles['Student'], dept_id=1)
+        student.set_password('bench-password')
+        organizer = User(full_name='Bench Organizer', email='org@campus.local', password='x',
+                         role_id=roles['Event Organizer'], dept_id=1)
+        db.session.add_all([student, organizer])
+        db.session.flush()
+        team_event = Event(title='Hackathon', description='x', date=date.today(), start_time=clock(9), end_time=clock(17),
+                           organizer_id=organizer.user_id, dept_id=1, status='approved', is_team_event=True)
+        db.session.add(team_event)
+        db.session.commit()
+        pages = ['/profile', '/student/dashboard', f'/student/team-register/{team_event.event_id}']
+        engine = db.engine
+
+    statements = []
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    client = app.test_client()
+    client.post('/auth/login', data={'identifier': 'B0001', 'password': 'bench-password'})
+
+    print(f'{"page":<34} {"status":>6} {"queries":>8} {"user/role/dept":>15} {"per request":>12}')
+    for page in pages:
+        statements.clear()
+        status = client.get(page).status_code
+        identity = sum(1 for s in statements
+                       if s.lstrip().upper().startswith('SELECT') and
+                       any(f'FROM {t}' in s for t in ('users', 'roles', 'departments')))
+        total = len(statements)
+        with Timer() as t:
+            for _ in range(args.requests):
+                client.get(page)
+        print(f'{page:<34} {status:>6} {total:>8} {identity:>15} {t.elapsed / args.requests * 1000:>10.2f}ms')
+
+
+# the hashing pool spawns processes that re-import this module
+if __name__ == '__main__':
+    main()
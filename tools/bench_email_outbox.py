@@ -0,0 +1,44 @@
+"""Measure outbox delivery throughput against a local SMTP stand-in.
+Compares one reused connection (the outbox worker) with the old
+connect-login-send-quit per message path.
+Run:
+    python3 tools/bench_email_outbox.py [--messages 1000]
+"""
+import argparse
+from bench_support import load_app, report, Timer, LocalSMTPServer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--messages', type=int, default=1000)
+args = parser.parse_args()
+
+app = load_app()
+
+from models import db
+from models.models import EmailOutbox
+from utils.email_utils import SMTPSession, build_message, queue_email
+from utils.email_outbox import drain_outbox
+
+with app.app_context(), LocalSMTPServer() as server:
+    settings = server.smtp_settings()
+
+    for i in range(args.messages):
+        queue_email(f'student{i}@campus.local', 'Reminder', f'Hello student {i}')
+    db.session.commit()
+
+    smtp = SMTPSession(settings)
+    stats = drain_outbox(batch_size=100, smtp=smtp)
+    smtp.close()
+    report('outbox (reused connection)', stats['sent'], stats['elapsed'])
+    print(f"  server saw {server.stats['connections']} connection(s), {server.stats['logins']} login(s)")
+
+    baseline = min(args.messages, 200)
+    before = dict(server.stats)
+    with Timer() as t:
+        for i in range(baseline):
+            with SMTPSession(settings) as one_shot:
+                one_shot.send(build_message(f'student{i}@campus.local', 'Reminder', 'Hello', sender=one_shot.sender))
+    report('connection per message (baseline)', baseline, t.elapsed)
+    print(f"  server saw {server.stats['connections'] - before['connections']} connection(s)")
+
+    pending = EmailOutbox.query.filter(EmailOutbox.status != 'sent').count()
+    print(f'Unsent rows left in outbox: {pending}')
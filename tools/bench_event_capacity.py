@@ -0,0 +1,167 @@
+"""Concurrency check: events never take more registrations than the venue holds.
+Puts an individual event in a venue with --capacity seats and has --students
+students hit the register endpoint at the same moment from --threads
+threads, once for an event registered the old way (no capacity check) and
+once through utils.registrations. Then --cancels registered students cancel
+at once and their seats must go to the head of the waitlist, in order.
+Reports registrations, the seat counter and the waitlist after each phase;
+exits non-zero if the endpoint overbooked, lost a seat or promoted out of
+order.
+Run:
+    python3 tools/bench_event_capacity.py [--capacity 100] [--students 400] [--threads 32] [--cancels 40]
+"""
+import argparse
+import sys
+import threading
+from bench_support import load_app, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--capacity', type=int, default=100)
+parser.add_argument('--students', type=int, default=400)
+parser.add_argument('--threads', type=int, default=32)
+parser.add_argument('--cancels', type=int, default=40)
+args = parser.parse_args()
+
+app = load_app()
+app.config['SESSION_COOKIE_SECURE'] = False
+
+from datetime import date, time as clock
+from sqlalchemy import func, insert, select
+from models import db
+from models.models import User, Role, Event, Venue, Registration, WaitlistEntry
+from utils.registrations import add_registration
+from utils.response_cache import configure
+
+configure(None)
+
+with app.app_context():
+    roles = {r.role_name: r.role_id for r in Role.query.all()}
+    organizer = User(full_name='Organizer', email='org@bench.local', password='x', role_id=roles['Event Organizer'])
+    hall = Venue(venue_name='Seminar Hall', capacity=args.capacity)
+    db.session.add_all([organizer, hall])
+    db.session.flush()
+    events = []
+    for title in ('Keynote (old flow)', 'Keynote'):
+        e = Event(title=title, description='x', date=date.today(), start_time=clock(9), end_time=clock(17),
+                  venue_id=hall.venue_id, organizer_id=organizer.user_id, dept_id=1, status='approved')
+        db.session.add(e)
+        db.session.flush()
+        events.append(e.event_id)
+    db.session.execute(insert(User), [
+        {'full_name': f'Student {i}', 'username': f'C{i:05d}', 'password': 'x', 'role_id': roles['Student']}
+        for i in range(args.students)
+    ])
+    student_ids = db.session.execute(select(User.user_id).where(User.username.like('C%')).order_by(User.user_id)).scalars().all()
+    db.session.commit()
+
+
+def logged_in_client(student_id):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['user_id'] = student_id
+        s['role_id'] = roles['Student']
+    return client
+
+
+def legacy_register(event_id, student_id, client):
+    # What register_event used to do: no capacity check at all
+    with app.app_context():
+        add_registration(event_id, student_id)
+        db.session.commit()
+        return True
+
+
+def endpoint_register(event_id, student_id, client):
+    return client.post(f'/student/register/{event_id}').status_code == 302
+
+
+def stampede(work):
+    """Run work(item) for every item from --threads threads released together. Returns failures."""
+    items = list(work[1])
+    barrier = threading.Barrier(args.threads)
+    failures = [0]
+    lock = threading.Lock()
+
+    def drive(idx):
+        barrier.wait()
+        for item in items[idx::args.threads]:
+            try:
+                ok = work[0](*item)
+            except Exception:
+                ok = False
+            if not ok:
+                with lock:
+                    failures[0] += 1
+
+    threads = [threading.Thread(target=drive, args=(i,)) for i in range(args.threads)]
+    with Timer() as t:
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+    return failures[0], t.elapsed
+
+
+def state(event_id):
+    with app.app_context():
+        stored = db.session.execute(select(func.count()).where(Registration.event_id == event_id)).scalar()
+        counter = db.session.execute(select(Event.registered_count).where(Event.event_id == event_id)).scalar()
+        queue = db.session.execute(select(WaitlistEntry.student_id).where(WaitlistEntry.event_id == event_id)
+                                   .order_by(WaitlistEntry.entry_id)).scalars().all()
+    return stored, counter, queue
+
+
+def show(label, event_id, failures, elapsed):
+    stored, counter, queue = state(event_id)
+    print(f'{label:<34} registered {stored:>5}/{args.capacity}   counter {counter:>5}   waitlist {len(queue):>5}'
+          f'   failed {failures:>4}   ({elapsed:.1f}s)')
+    return stored, counter, queue
+
+
+print(f'{args.students} students registering at once for {args.capacity} seats on {args.threads} threads')
+clients = {sid: logged_in_client(sid) for sid in student_ids}
+problems = []
+
+failures, elapsed = stampede((legacy_register, [(events[0], sid, clients[sid]) for sid in student_ids]))
+show('no capacity check (old)', events[0], failures, elapsed)
+
+failures, elapsed = stampede((endpoint_register, [(events[1], sid, clients[sid]) for sid in student_ids]))
+stored, counter, queue = show('register endpoint', events[1], failures, elapsed)
+if stored != min(args.capacity, args.students):
+    problems.append(f'{stored} registrations for {args.capacity} seats')
+if counter != stored:
+    problems.append(f'registered_count {counter} != {stored} registrations')
+if stored + len(queue) != args.students - failures:
+    problems.append(f'{args.students - failures - stored - len(queue)} student(s) neither registered nor waitlisted')
+
+# Registered students cancel at once; the first entries of the waitlist must take their seats
+with app.app_context():
+    cancelling = db.session.execute(
+        select(Registration.registration_id, Registration.student_id)
+        .where(Registration.event_id == events[1]).order_by(Registration.registration_id).limit(args.cancels)
+    ).all()
+expected = queue[:len(cancelling)]
+
+
+def endpoint_cancel(registration_id, student_id):
+    resp = clients[student_id].post(f'/student/registration/{registration_id}/cancel')
+    return resp.status_code == 302
+
+
+failures, elapsed = stampede((endpoint_cancel, cancelling))
+stored_after, counter, queue_after = show(f'{len(cancelling)} cancellations', events[1], failures, elapsed)
+with app.app_context():
+    seated = set(db.session.execute(
+        select(Registration.student_id).where(Registration.event_id == events[1])).scalars())
+promoted = [sid for sid in expected if sid in seated]
+print(f'promoted from the head of the waitlist: {len(promoted)}/{len(expected)}')
+if stored_after != stored:
+    problems.append(f'{stored - stored_after} seat(s) lost after cancellations')
+if counter != stored_after:
+    problems.append(f'registered_count {counter} != {stored_after} registrations after cancellations')
+if len(promoted) != len(expected) or queue_after != queue[len(expected):]:
+    problems.append('waitlist was not promoted in order')
+
+for problem in problems:
+    print('FAIL:', problem)
+sys.exit(1 if problems else 0)
@@ -0,0 +1,64 @@
+"""Fan out reminders for one large event and deliver them to a local SMTP stand-in.
+Reports queueing throughput, peak Python memory, re-run idempotency and
+delivery throughput.
+Run:
+    python3 tools/bench_event_fanout.py [--registrants 5000] [--chunk-size 500]
+"""
+import argparse
+import tracemalloc
+from datetime import date, time, timedelta
+from bench_support import load_app, report, LocalSMTPServer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--registrants', type=int, default=5000)
+parser.add_argument('--chunk-size', type=int, default=500)
+args = parser.parse_args()
+
+app = load_app()
+
+from sqlalchemy import insert
+from models import db
+from models.models import User, Role, Event, Registration, EmailOutbox
+from utils.notifications import send_event_reminders
+from utils.email_utils import SMTPSession
+from utils.email_outbox import drain_outbox
+
+with app.app_context():
+    student_role = Role.query.filter_by(role_name='Student').first()
+    organizer = User(full_name='Bench Organizer', email='org@campus.local', password='x', role_id=student_role.role_id)
+    db.session.add(organizer)
+    db.session.flush()
+    event = Event(title='Bench Fest', description='Load test', date=date.today() + timedelta(days=1),
+                  start_time=time(10, 0), end_time=time(12, 0), dept_id=1, mode='online',
+                  meeting_url='https://meet.local/x', organizer_id=organizer.user_id, status='approved')
+    db.session.add(event)
+    db.session.commit()
+
+    db.session.execute(insert(User), [
+        {'full_name': f'Student {i}', 'username': f'B{i:05d}', 'email': f's{i}@campus.local',
+         'password': 'x', 'role_id': student_role.role_id}
+        for i in range(args.registrants)
+    ])
+    student_ids = [u.user_id for u in User.query.filter(User.username.like('B%')).all()]
+    db.session.execute(insert(Registration), [
+        {'event_id': event.event_id, 'student_id': sid, 'qr_code': f'BENCH-{sid}'} for sid in student_ids
+    ])
+    db.session.commit()
+    db.session.expunge_all()
+
+    tracemalloc.start()
+    stats = send_event_reminders(chunk_size=args.chunk_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report('fan-out (queue reminders)', stats['queued'], stats['elapsed'])
+    print(f'  peak traced memory: {peak / 1024 / 1024:.1f} MiB with chunk size {args.chunk_size}')
+
+    rerun = send_event_reminders(chunk_size=args.chunk_size)
+    print(f"  re-run queued {rerun['queued']} new, skipped {rerun['skipped']} already queued")
+
+    with LocalSMTPServer() as server:
+        smtp = SMTPSession(server.smtp_settings())
+        sent = drain_outbox(batch_size=200, smtp=smtp)
+        smtp.close()
+    report('delivery (outbox worker)', sent['sent'], sent['elapsed'])
+    print(f"  outbox rows: {EmailOutbox.query.count()}, SMTP messages received: {server.stats['messages']}")
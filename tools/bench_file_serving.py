@@ -0,0 +1,65 @@
+"""Measure worker time per certificate download for each file-serving backend.
+With `sendfile`/`accel` the worker only authorizes and emits a header; the
+front proxy streams the bytes, so worker time no longer grows with file size
+or with slow clients (which this in-process test client cannot show).
+Run:
+    python3 tools/bench_file_serving.py [--size-kb 400] [--downloads 300]
+"""
+import argparse
+import os
+from bench_support import load_app, report, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--size-kb', type=int, default=400)
+parser.add_argument('--downloads', type=int, default=300)
+args = parser.parse_args()
+
+os.environ['RESPONSE_CACHE_BACKEND'] = 'none'
+app = load_app()
+app.config['SESSION_COOKIE_SECURE'] = False
+
+from datetime import date, time
+from models import db
+from models.models import User, Role, Event, Certificate
+
+relative = 'uploads/certificates/_bench_certificate.pdf'
+path = os.path.join(app.static_folder, relative)
+os.makedirs(os.path.dirname(path), exist_ok=True)
+with open(path, 'wb') as fh:
+    fh.write(b'%PDF-1.4\n' + os.urandom(args.size_kb * 1024))
+
+try:
+    with app.app_context():
+        roles = {r.role_name: r.role_id for r in Role.query.all()}
+        student = User(full_name='Bench Student', email='student@bench.local', password='x', role_id=roles['Student'], dept_id=1)
+        db.session.add(student)
+        db.session.flush()
+        event = Event(title='Bench', description='x', date=date.today(), start_time=time(9), end_time=time(10),
+                      organizer_id=student.user_id, dept_id=1, status='approved')
+        db.session.add(event)
+        db.session.flush()
+        certificate = Certificate(student_id=student.user_id, event_id=event.event_id, certificate_url=relative)
+        db.session.add(certificate)
+        db.session.commit()
+        url = f'/student/download-certificate/{certificate.certificate_id}'
+        student_id, role_id = student.user_id, student.role_id
+
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['user_id'] = student_id
+        s['role_id'] = role_id
+        s['role_name'] = 'Student'
+        s['full_name'] = 'Bench Student'
+
+    print(f'{args.downloads} downloads of a {args.size_kb} KB certificate (worker time incl. reading the body)')
+    for mode in ('python', 'sendfile', 'accel'):
+        os.environ['FILE_SERVING_BACKEND'] = mode
+        with Timer() as t:
+            for _ in range(args.downloads):
+                response = client.get(url)
+                body = response.get_data()
+                response.close()
+        header = response.headers.get('X-Sendfile') or response.headers.get('X-Accel-Redirect') or f'{len(body)} bytes'
+        report(f'{mode:<9} -> {header[-26:]}', args.downloads, t.elapsed)
+finally:
+    os.remove(path)
@@ -0,0 +1,107 @@
+"""Benchmark guest ID allocation under concurrent guest signups.
+Seeds existing guests, then signs new guests up from several threads, first
+with the old query-until-free loop and then with utils.guest_ids (insert,
+retry on a unique-index conflict). Shrink the ID space with --digits to make
+collisions actually happen. The report shows queries per signup and how
+many signups failed because two workers picked the same code.
+Run:
+    python3 tools/bench_guest_ids.py [--existing 20000] [--signups 2000] [--threads 8] [--digits 8]
+"""
+import argparse
+import threading
+from bench_support import load_app, report, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--existing', type=int, default=20000)
+parser.add_argument('--signups', type=int, default=2000, help='per method')
+parser.add_argument('--threads', type=int, default=8)
+parser.add_argument('--digits', type=int, default=8, help='hex digits per guest ID; 3-4 forces collisions')
+args = parser.parse_args()
+
+app = load_app()
+
+from sqlalchemy import event as sa_event, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.models import User, Role
+from utils import guest_ids
+
+guest_ids.ID_HEX_DIGITS = args.digits
+
+with app.app_context():
+    guest_role = Role.query.filter_by(role_name='Guest').first().role_id
+    codes = set()
+    while len(codes) < args.existing:
+        codes.add(guest_ids.new_guest_id())
+    db.session.execute(insert(User), [
+        {'full_name': f'Guest {i}', 'username': code, 'password': 'x', 'role_id': guest_role}
+        for i, code in enumerate(codes)
+    ])
+    db.session.commit()
+    engine = db.engine
+
+queries = [0]
+lock = threading.Lock()
+
+
+@sa_event.listens_for(engine, 'before_cursor_execute')
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    with lock:
+        queries[0] += 1
+
+
+def new_guest(n):
+    return User(full_name=f'Signup {n}', password='x', role_id=guest_role, guest_status='active')
+
+
+def legacy_signup(n):
+    # What auth.guest_verify used to do
+    user = new_guest(n)
+    code = guest_ids.new_guest_id()
+    while User.query.filter_by(username=code).first():
+        code = guest_ids.new_guest_id()
+    user.username = code
+    db.session.add(user)
+    db.session.commit()
+
+
+def allocator_signup(n):
+    guest_ids.save_with_guest_id(new_guest(n))
+
+
+def run(label, signup, offset):
+    failures = [0]
+
+    def drive(idx):
+        with app.app_context():
+            for n in range(offset + idx, offset + args.signups, args.threads):
+                try:
+                    signup(n)
+                except IntegrityError:
+                    db.session.rollback()
+                    with lock:
+                        failures[0] += 1
+
+    queries[0] = 0
+    threads = [threading.Thread(target=drive, args=(i,)) for i in range(args.threads)]
+    with Timer() as t:
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+    done = args.signups - failures[0]
+    report(label, done, t.elapsed)
+    print(f'  queries per signup: {queries[0] / args.signups:.2f}   failed on duplicate code: {failures[0]}')
+
+
+print(f'{args.existing} existing guests, {16 ** args.digits} possible IDs, {args.threads} threads')
+run('query-until-free loop (old)', legacy_signup, 0)
+run('insert + retry on conflict', allocator_signup, args.signups)
+
+with app.app_context():
+    duplicates = db.session.execute(
+        select(func.count()).select_from(
+            select(User.username).where(User.username.isnot(None))
+            .group_by(User.username).having(func.count() > 1).subquery())
+    ).scalar()
+    print(f'duplicate guest IDs in the table: {duplicates}')
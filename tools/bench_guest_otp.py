@@ -0,0 +1,127 @@
+"""Load-test the guest OTP request/verify flow.
+Seeds a backlog of stale OTP rows (what the table used to accumulate), then
+runs concurrent visitors through request -> verify, each with its own
+mobile number and client IP, and reports per-step latency. The password
+hash queue is sized to --threads unless PASSWORD_HASH_QUEUE is set; a verify
+shed with 503 is retried after a short pause, as a visitor would, and the
+retries are counted. One client then
+hammers the request endpoint to show the rate limiter refusing it, and the
+lifecycle purge clears the stale rows.
+Run:
+    python3 tools/bench_guest_otp.py [--visitors 300] [--threads 8] [--stale 100000]
+"""
+import argparse
+import os
+import threading
+import time
+from bench_support import load_app, report, Timer
+
+# A visitor shed with 503 (hash queue full) tries again after at most RETRY_PAUSE seconds
+MAX_TRIES = 20
+RETRY_PAUSE = 0.5
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--visitors', type=int, default=300)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--stale', type=int, default=100000, help='expired/used OTP rows seeded first')
+    args = parser.parse_args()
+
+    os.environ.setdefault('RESPONSE_CACHE_BACKEND', 'none')
+    # Room for every visitor thread's hash; set PASSWORD_HASH_QUEUE lower to watch load shedding
+    os.environ.setdefault('PASSWORD_HASH_QUEUE', str(args.threads))
+    app = load_app()
+
+    from datetime import datetime, timedelta
+    from sqlalchemy import func, insert, select
+    from models import db
+    from models.models import GuestOTP
+    from utils import guest_otp, rate_limit
+    from utils.settings import update_settings
+
+    def percentile(values, pct):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * pct))] * 1000 if values else 0
+
+    def count_otps():
+        return db.session.execute(select(func.count(GuestOTP.id))).scalar()
+
+    with app.app_context():
+        update_settings(guest_enabled=True)
+        old = datetime.utcnow() - timedelta(days=3)
+        for start in range(0, args.stale, 10000):
+            db.session.execute(insert(GuestOTP), [
+                {'mobile_number': f'+9190{i % 5000:08d}', 'code': f'{100000 + i % 900000}',
+                 'used': i % 2 == 0, 'created_at': old + timedelta(seconds=i)}
+                for i in range(start, min(start + 10000, args.stale))
+            ])
+        db.session.commit()
+        print(f'seeded {count_otps()} stale OTP rows')
+
+    timings = {'request': [], 'verify': []}
+    failures = []
+    retries = [0]
+    lock = threading.Lock()
+
+    def visitor(n):
+        mobile = f'+9180{n:08d}'
+        client = app.test_client()
+        client.environ_base['REMOTE_ADDR'] = f'10.0.{n // 250}.{n % 250 + 1}'
+        with Timer() as t_request:
+            resp = client.post('/auth/guest', data={'mobile': mobile})
+        with app.app_context():
+            otp = guest_otp.latest_otp(mobile)
+            code = otp.code if otp else ''
+        with Timer() as t_verify:
+            for _ in range(MAX_TRIES):
+                verified = client.post('/auth/guest/verify', data={'mobile': mobile, 'code': code})
+                if verified.status_code != 503:
+                    break
+                with lock:
+                    retries[0] += 1
+                time.sleep(min(float(verified.headers.get('Retry-After', 1)), RETRY_PAUSE))
+        with lock:
+            timings['request'].append(t_request.elapsed)
+            timings['verify'].append(t_verify.elapsed)
+            if resp.status_code != 302 or '/student/' not in (verified.location or ''):
+                failures.append(mobile)
+
+    def drive(idx):
+        for n in range(idx, args.visitors, args.threads):
+            visitor(n)
+
+    rate_limit.reset()
+    threads = [threading.Thread(target=drive, args=(i,)) for i in range(args.threads)]
+    with Timer() as t:
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+    report(f'request + verify ({args.threads} threads)', args.visitors - len(failures), t.elapsed)
+    for step, values in timings.items():
+        print(f'  {step:<8} p50 {percentile(values, 0.5):7.1f}ms   p95 {percentile(values, 0.95):7.1f}ms')
+    print(f'  verify retries after 503 (hash queue full): {retries[0]}')
+    if failures:
+        print(f'  FAILED: {len(failures)} visitor(s) did not get in')
+
+    # One client asking again and again: only the first few go through
+    client = app.test_client()
+    client.environ_base['REMOTE_ADDR'] = '10.9.9.9'
+    limit, _ = guest_otp._limit('request')
+    sent = 0
+    for _ in range(limit * 4):
+        resp = client.post('/auth/guest', data={'mobile': '+918099999999'})
+        sent += '/auth/guest/verify' in (resp.location or '')
+    print(f'rate limit: {sent} of {limit * 4} repeated requests accepted (limit {limit} per mobile)')
+
+    with app.app_context():
+        before = count_otps()
+        with Timer() as t:
+            purged = guest_otp.purge_otps()
+        print(f'purge: {purged} of {before} rows deleted in {t.elapsed:.2f}s, {count_otps()} live code(s) left')
+
+
+# the hashing pool spawns processes that re-import this module
+if __name__ == '__main__':
+    main()
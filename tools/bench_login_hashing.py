@@ -0,0 +1,86 @@
+"""Measure login throughput through the password hashing pool.
+Seeds students whose hashes use a cheap legacy method, logs them all in once
+(upgrading each hash to the configured method), then drives concurrent
+logins and reports logins/second overall and per hashing worker core.
+Run:
+    python3 tools/bench_login_hashing.py [--users 40] [--logins 200] [--threads 8]
+        [--method scrypt] [--workers N]
+"""
+import argparse
+import os
+import threading
+from bench_support import load_app, report, Timer
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=40)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--method', default=None, help='PASSWORD_HASH_METHOD to benchmark, e.g. pbkdf2:sha256:600000')
+    parser.add_argument('--workers', type=int, default=None, help='PASSWORD_HASH_WORKERS (default: CPU count)')
+    args = parser.parse_args()
+
+    if args.method:
+        os.environ['PASSWORD_HASH_METHOD'] = args.method
+    if args.workers is not None:
+        os.environ['PASSWORD_HASH_WORKERS'] = str(args.workers)
+
+    app = load_app()
+
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from models import db
+    from models.models import User, Role
+    from utils.password_utils import needs_rehash, worker_count, hash_method
+
+    password = 'bench-password'
+    with app.app_context():
+        student_role = Role.query.filter_by(role_name='Student').first()
+        legacy_hash = generate_password_hash(password, method='pbkdf2:sha256:1000')
+        db.session.execute(insert(User), [
+            {'full_name': f'Student {i}', 'username': f'L{i:04d}', 'email': f'l{i}@campus.local',
+             'password': legacy_hash, 'role_id': student_role.role_id}
+            for i in range(args.users)
+        ])
+        db.session.commit()
+
+    def login(client, n):
+        resp = client.post('/auth/login', data={'identifier': f'L{n % args.users:04d}', 'password': password})
+        return resp.status_code == 302 and '/student/' in resp.location
+
+    client = app.test_client()
+    with Timer() as t:
+        ok = sum(login(client, n) for n in range(args.users))
+    report('first logins (verify + rehash)', ok, t.elapsed)
+    with app.app_context():
+        stale = sum(needs_rehash(pw) for (pw,) in db.session.query(User.password).filter(User.username.like('L%')))
+    print(f'  hashes still on legacy method: {stale} of {args.users}')
+
+    counts = [0] * args.threads
+
+    def drive(idx):
+        c = app.test_client()
+        for n in range(idx, args.logins, args.threads):
+            counts[idx] += login(c, n)
+
+    threads = [threading.Thread(target=drive, args=(i,)) for i in range(args.threads)]
+    with Timer() as t:
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+    succeeded = sum(counts)
+    report(f'concurrent logins ({args.threads} threads)', succeeded, t.elapsed)
+
+    cores = max(min(worker_count(), os.cpu_count() or 1), 1)
+    rate = succeeded / t.elapsed if t.elapsed else 0
+    print(f'  method: {hash_method() or "werkzeug default"}, workers: {worker_count()}, cores used: {cores}')
+    print(f'  logins/second per core: {rate / cores:,.1f}')
+    if succeeded != args.logins:
+        print(f'  WARNING: {args.logins - succeeded} logins failed or were shed (PASSWORD_HASH_QUEUE)')
+
+
+# the hashing pool spawns processes that re-import this module
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Compare the legacy login lookup with the joined single-query lookup.
+Counts SQL statements and times user + role resolution for students
+(username) and staff (email); password hashing is not included.
+Run:
+    python3 tools/bench_login_lookup.py [--users 2000] [--lookups 2000]
+"""
+import argparse
+from sqlalchemy import event
+from bench_support import load_app, report, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--users', type=int, default=2000)
+parser.add_argument('--lookups', type=int, default=2000)
+args = parser.parse_args()
+
+app = load_app()
+
+from sqlalchemy import insert
+from models import db
+from models.models import User, Role
+from utils.auth_utils import find_login_user, role_key_for_id, display_role
+
+DISPLAY_MAP = {
+    'guest': 'Guest', 'student': 'Student', 'event organizer': 'Event Organizer', 'organizer': 'Event Organizer',
+    'hod': 'HOD', 'principal': 'Principal', 'admin': 'Admin',
+}
+
+
+def legacy_lookup(identifier):
+    """The lookup auth.login used before: up to two user queries plus lazy role loads."""
+    user = None
+    user_by_username = User.query.filter_by(username=identifier).first()
+    if user_by_username:
+        role_name = (user_by_username.role.role_name or '').lower() if user_by_username.role else ''
+        if role_name != 'student':
+            return None
+        user = user_by_username
+    if not user:
+        user = User.query.filter_by(email=identifier).first()
+        if user:
+            role_name = (user.role.role_name or '').lower() if user.role else ''
+            if role_name == 'student' and user.username:
+                return None
+    if user:
+        role_raw = (user.role.role_name or '').strip().lower()
+        return DISPLAY_MAP.get(role_raw, (user.role.role_name or '').title())
+    return None
+
+
+def joined_lookup(identifier):
+    user, _ = find_login_user(identifier)
+    if user:
+        role_key_for_id(user.role_id)
+        return display_role(user.role.role_name)
+    return None
+
+
+with app.app_context():
+    roles = {r.role_name: r.role_id for r in Role.query.all()}
+    db.session.execute(insert(User), [
+        {'full_name': f'User {i}', 'username': f'S{i:05d}' if i % 2 == 0 else None, 'email': f'u{i}@campus.local',
+         'password': 'x', 'role_id': roles['Student'] if i % 2 == 0 else roles['Event Organizer']}
+        for i in range(args.users)
+    ])
+    db.session.commit()
+
+    identifiers = [f'S{i:05d}' if i % 2 == 0 else f'u{i}@campus.local' for i in
+                   (n * 7919 % args.users for n in range(args.lookups))]
+
+    statements = [0]
+
+    @event.listens_for(db.engine, 'before_cursor_execute')
+    def _count(*_):
+        statements[0] += 1
+
+    for label, lookup in (('legacy lookup', legacy_lookup), ('joined lookup + cached roles', joined_lookup)):
+        joined_lookup(identifiers[0])  # warm the role cache
+        db.session.expunge_all()
+        statements[0] = 0
+        with Timer() as t:
+            for ident in identifiers:
+                assert lookup(ident) in ('Student', 'Event Organizer'), ident
+                # each login is a fresh request/session in the app
+                db.session.expunge_all()
+        report(label, len(identifiers), t.elapsed)
+        print(f'  SQL statements per login: {statements[0] / len(identifiers):.2f}')
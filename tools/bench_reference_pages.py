@@ -0,0 +1,81 @@
+"""Compare page render latency with the reference-data cache off and on.
+Seeds departments, venues and organizers, then renders pages that list
+them, first with REFERENCE_CACHE_TTL=0 (every request queries, as before)
+and then with the cache enabled.
+Run:
+    python3 tools/bench_reference_pages.py [--organizers 300] [--venues 60] [--requests 200]
+"""
+import argparse
+import os
+from bench_support import load_app, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--organizers', type=int, default=300)
+parser.add_argument('--venues', type=int, default=60)
+parser.add_argument('--requests', type=int, default=200)
+args = parser.parse_args()
+
+app = load_app()
+app.config['SESSION_COOKIE_SECURE'] = False
+
+from sqlalchemy import insert
+from models import db
+from models.models import User, Role, Venue
+from utils import reference_cache
+
+with app.app_context():
+    roles = {r.role_name: r.role_id for r in Role.query.all()}
+    db.session.execute(insert(Venue), [
+        {'venue_name': f'Hall {i}', 'capacity': 50 + i, 'dept_id': (i % 5) + 1 if i % 3 else None}
+        for i in range(args.venues)
+    ])
+    db.session.execute(insert(User), [
+        {'full_name': f'Organizer {i:04d}', 'email': f'org{i}@campus.local', 'password': 'x',
+         'role_id': roles['Event Organizer'], 'dept_id': (i % 5) + 1}
+        for i in range(args.organizers)
+    ])
+    users = {}
+    for key, role in (('student', 'Student'), ('organizer', 'Event Organizer'), ('hod', 'HOD'), ('admin', 'Admin')):
+        user = User(full_name=f'Bench {role}', email=f'{key}@bench.local', password='x', role_id=roles[role], dept_id=1)
+        db.session.add(user)
+        db.session.flush()
+        users[key] = (user.user_id, user.role_id, role, user.full_name)
+    db.session.commit()
+
+PAGES = [
+    ('login page', None, '/auth/login'),
+    ('student events', 'student', '/student/events'),
+    ('organizer create event', 'organizer', '/organizer/create-event'),
+    ('hod dashboard', 'hod', '/hod/dashboard'),
+    ('admin events', 'admin', '/admin/events'),
+]
+
+
+def client_for(key):
+    client = app.test_client()
+    if key:
+        user_id, role_id, role_name, full_name = users[key]
+        with client.session_transaction() as s:
+            s['user_id'] = user_id
+            s['role_id'] = role_id
+            s['role_name'] = role_name
+            s['full_name'] = full_name
+            s['dept_id'] = 1
+    return client
+
+
+results = {}
+for ttl in ('0', '300'):
+    os.environ['REFERENCE_CACHE_TTL'] = ttl
+    reference_cache.invalidate()
+    for label, key, url in PAGES:
+        client = client_for(key)
+        assert client.get(url).status_code == 200, url
+        with Timer() as t:
+            for _ in range(args.requests):
+                client.get(url)
+        results.setdefault(label, []).append(t.elapsed / args.requests * 1000)
+
+print(f'{"page":<28} {"no cache":>10} {"cached":>10}')
+for label, (before, after) in results.items():
+    print(f'{label:<28} {before:>8.2f}ms {after:>8.2f}ms  ({before / after:.1f}x)')
@@ -0,0 +1,129 @@
+"""Load-test the "registration opens" spike.
+Seeds students and an approved event, then has them all register at once
+from several threads: first with the old flow (insert with qr_code='temp',
+commit, render the QR image, update, commit again) and then through the
+new flow (utils.registrations: token derived up front, one insert, one
+commit, no image), both called directly, and finally through the register
+endpoint, session and all. Reports signups per minute, latency, statements
+written to the registrations table per signup and failed signups (the old
+flow's shared 'temp' qr_code collides under concurrency).
+Run:
+    python3 tools/bench_registration.py [--students 3000] [--threads 16]
+"""
+import argparse
+import threading
+from bench_support import load_app, report, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--students', type=int, default=3000, help='per method')
+parser.add_argument('--threads', type=int, default=16)
+args = parser.parse_args()
+
+app = load_app()
+app.config['SESSION_COOKIE_SECURE'] = False
+
+import uuid
+from datetime import date, time as clock
+from sqlalchemy import event as sa_event, func, insert, select
+from models import db
+from models.models import User, Role, Event, Registration
+from utils.qr_utils import _build_qr_text, _generate_qr_image
+from utils.registrations import register_student
+from utils.response_cache import configure
+
+configure(None)
+
+with app.app_context():
+    roles = {r.role_name: r.role_id for r in Role.query.all()}
+    organizer = User(full_name='Organizer', email='org@bench.local', password='x', role_id=roles['Event Organizer'])
+    db.session.add(organizer)
+    db.session.flush()
+    events = []
+    for title in ('Open Day (old flow)', 'Open Day (new flow)', 'Open Day (endpoint)'):
+        e = Event(title=title, description='x', date=date.today(), start_time=clock(9), end_time=clock(17),
+                  organizer_id=organizer.user_id, dept_id=1, status='approved')
+        db.session.add(e)
+        db.session.flush()
+        events.append(e.event_id)
+    db.session.execute(insert(User), [
+        {'full_name': f'Student {i}', 'username': f'R{i:05d}', 'password': 'x', 'role_id': roles['Student']}
+        for i in range(3 * args.students)
+    ])
+    student_ids = db.session.execute(select(User.user_id).where(User.username.like('R%')).order_by(User.user_id)).scalars().all()
+    db.session.commit()
+    engine = db.engine
+
+writes = [0]
+lock = threading.Lock()
+
+
+@sa_event.listens_for(engine, 'before_cursor_execute')
+def count_write(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith(('INSERT INTO REGISTRATIONS', 'UPDATE REGISTRATIONS')):
+        with lock:
+            writes[0] += 1
+
+
+def legacy_register(event_id, student_id):
+    # What register_event used to do
+    with app.app_context():
+        registration = Registration(event_id=event_id, student_id=student_id, qr_code='temp')
+        db.session.add(registration)
+        db.session.commit()
+        qr_data = f"REG-{registration.registration_id}-EVT-{event_id}-STU-{student_id}-{uuid.uuid4().hex[:8]}"
+        _generate_qr_image(_build_qr_text(qr_data))
+        registration.qr_code = qr_data
+        db.session.commit()
+
+
+def new_register(event_id, student_id):
+    with app.app_context():
+        register_student(event_id, student_id)
+
+
+def run(label, event_id, students, register=None):
+    latencies = []
+    failures = [0]
+
+    def drive(idx):
+        for student_id in students[idx::args.threads]:
+            client = None
+            if register is None:
+                client = app.test_client()
+                with client.session_transaction() as s:
+                    s['user_id'] = student_id
+                    s['role_id'] = roles['Student']
+            with Timer() as t:
+                try:
+                    if register is None:
+                        resp = client.post(f'/student/register/{event_id}')
+                        ok = resp.status_code == 302 and 'my-registrations' in resp.location
+                    else:
+                        register(event_id, student_id)
+                        ok = True
+                except Exception:
+                    ok = False
+            with lock:
+                latencies.append(t.elapsed)
+                failures[0] += not ok
+
+    writes[0] = 0
+    threads = [threading.Thread(target=drive, args=(i,)) for i in range(args.threads)]
+    with Timer() as t:
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+    with app.app_context():
+        stored = db.session.execute(select(func.count()).where(Registration.event_id == event_id)).scalar()
+    latencies.sort()
+    report(label, stored, t.elapsed)
+    print(f'  {stored / t.elapsed * 60:,.0f} signups/min   p50 {latencies[len(latencies) // 2] * 1000:.1f}ms'
+          f'   p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms   failed {failures[0]}')
+    print(f'  registration writes per stored signup: {writes[0] / max(stored, 1):.2f}')
+
+
+n = args.students
+run('old flow (2 commits + QR render)', events[0], student_ids[:n], legacy_register)
+run('new flow (1 commit, no render)', events[1], student_ids[n:2 * n], new_register)
+run('register endpoint (full request)', events[2], student_ids[2 * n:])
@@ -0,0 +1,114 @@
+"""Compare page latency with the response cache off and on.
+Seeds events with registrations and feedback, then requests the cached
+pages repeatedly: first with no backend (every request renders, as before),
+then with the in-process LRU and filesystem backends. A registration is
+committed every --write-every requests so invalidation cost is included.
+Run:
+    python3 tools/bench_response_cache.py [--events 300] [--students 600] [--requests 200] [--write-every 50]
+"""
+import argparse
+import random
+import tempfile
+from bench_support import load_app, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--events', type=int, default=300)
+parser.add_argument('--students', type=int, default=600)
+parser.add_argument('--requests', type=int, default=200)
+parser.add_argument('--write-every', type=int, default=50)
+args = parser.parse_args()
+
+app = load_app()
+app.config['SESSION_COOKIE_SECURE'] = False
+
+from datetime import date, time, timedelta
+from sqlalchemy import insert
+from models import db
+from models.models import User, Role, Event, Registration, Feedback
+from utils import response_cache
+
+random.seed(3)
+with app.app_context():
+    roles = {r.role_name: r.role_id for r in Role.query.all()}
+    admin = User(full_name='Bench Admin', email='admin@bench.local', password='x', role_id=roles['Admin'], dept_id=1)
+    student = User(full_name='Bench Student', email='student@bench.local', password='x', role_id=roles['Student'], dept_id=1)
+    db.session.add_all([admin, student])
+    db.session.flush()
+    db.session.execute(insert(User), [
+        {'full_name': f'Student {i}', 'email': f's{i}@bench.local', 'password': 'x', 'role_id': roles['Student'], 'dept_id': (i % 5) + 1}
+        for i in range(args.students)
+    ])
+    db.session.execute(insert(Event), [
+        {'title': f'Event {i}', 'description': 'Benchmark event', 'date': date.today() + timedelta(days=(i % 60) - 20),
+         'start_time': time(9 + i % 8), 'end_time': time(17), 'organizer_id': admin.user_id, 'dept_id': (i % 5) + 1,
+         'status': 'approved'}
+        for i in range(args.events)
+    ])
+    pairs = {(random.randint(1, args.events), random.randint(3, args.students + 2)) for _ in range(args.events * 20)}
+    db.session.execute(insert(Registration), [
+        {'event_id': e, 'student_id': s, 'qr_code': f'qr-{e}-{s}'} for e, s in pairs
+    ])
+    db.session.execute(insert(Feedback), [
+        {'event_id': e, 'student_id': s, 'rating': random.randint(1, 5)} for e, s in list(pairs)[::4]
+    ])
+    db.session.commit()
+    users = {
+        'admin': (admin.user_id, admin.role_id, 'Admin', admin.full_name),
+        'student': (student.user_id, student.role_id, 'Student', student.full_name),
+    }
+
+PAGES = [
+    ('student events', 'student', '/student/events'),
+    ('admin reports', 'admin', '/admin/reports'),
+    ('admin feedback', 'admin', '/admin/feedback'),
+    ('admin event detail', 'admin', '/admin/event/1'),
+]
+
+
+def client_for(key):
+    client = app.test_client()
+    user_id, role_id, role_name, full_name = users[key]
+    with client.session_transaction() as s:
+        s['user_id'] = user_id
+        s['role_id'] = role_id
+        s['role_name'] = role_name
+        s['full_name'] = full_name
+        s['dept_id'] = 1
+    return client
+
+
+def register_someone(n):
+    with app.app_context():
+        db.session.add(Registration(event_id=random.randint(1, args.events), student_id=users['admin'][0], qr_code=f'w-{n}'))
+        db.session.commit()
+        Registration.query.filter_by(qr_code=f'w-{n}').delete()
+        db.session.commit()
+
+
+BACKENDS = [
+    ('no cache', None),
+    ('lru', response_cache.LRUBackend()),
+    ('filesystem', response_cache.FileSystemBackend(tempfile.mkdtemp(prefix='campus-rc-'))),
+]
+
+results = {}
+writes = 0
+for name, backend in BACKENDS:
+    response_cache.configure(backend)
+    for label, key, url in PAGES:
+        client = client_for(key)
+        assert client.get(url).status_code == 200, url
+        with Timer() as t:
+            for i in range(args.requests):
+                if args.write_every and i and i % args.write_every == 0:
+                    writes += 1
+                    register_someone(writes)
+                client.get(url)
+        results.setdefault(label, []).append(t.elapsed / args.requests * 1000)
+    ratio = response_cache.stats()['hit_ratio']
+    if ratio is not None:
+        print(f'{name}: hit ratio {ratio:.0%}')
+
+print(f'{"page":<22}' + ''.join(f'{name:>12}' for name, _ in BACKENDS))
+for label, timings in results.items():
+    print(f'{label:<22}' + ''.join(f'{ms:>10.2f}ms' for ms in timings))
@@ -0,0 +1,107 @@
+"""Measure admin type-ahead latency against the FTS5 search index.
+Seeds tens of thousands of users plus events, teams and venues, rebuilds the
+index and times prefix queries as an admin would type them (one request per
+keystroke, through the /admin/search endpoint and against the index alone).
+Target: p95 under 50 ms.
+Run:
+    python3 tools/bench_search.py [--users 30000] [--events 5000] [--queries 500]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+from bench_support import load_app, report, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--users', type=int, default=30000)
+parser.add_argument('--events', type=int, default=5000)
+parser.add_argument('--queries', type=int, default=500)
+args = parser.parse_args()
+
+os.environ['SEARCH_INDEX_PATH'] = os.path.join(tempfile.mkdtemp(prefix='campus-search-'), 'search.db')
+app = load_app()
+app.config['SESSION_COOKIE_SECURE'] = False
+
+from datetime import date, time, timedelta
+from sqlalchemy import insert
+from models import db
+from models.models import User, Role, Event, Team, Venue
+from utils import search_index
+
+FIRST = ['Aarav', 'Diya', 'Rahul', 'Fathima', 'Nikhil', 'Sneha', 'Arjun', 'Meera', 'Ajmal', 'Priya', 'Vishnu', 'Anjali']
+LAST = ['Nair', 'Menon', 'Kumar', 'Pillai', 'Thomas', 'Varghese', 'Rahman', 'Iyer', 'Joseph', 'Das']
+TOPICS = ['Hackathon', 'Robotics', 'Quiz', 'Workshop', 'Seminar', 'Symposium', 'Coding', 'Design', 'Music', 'Drama']
+
+random.seed(7)
+with app.app_context():
+    roles = {r.role_name: r.role_id for r in Role.query.all()}
+    with Timer() as t:
+        db.session.execute(insert(User), [
+            {'full_name': f'{random.choice(FIRST)} {random.choice(LAST)} {i}', 'username': f'stu{i:06d}',
+             'email': f'student{i}@campus.local', 'mobile_number': f'9{i:09d}', 'password': 'x',
+             'role_id': roles['Student'], 'dept_id': (i % 5) + 1}
+            for i in range(args.users)
+        ])
+        admin = User(full_name='Bench Admin', email='admin@bench.local', password='x', role_id=roles['Admin'], dept_id=1)
+        db.session.add(admin)
+        db.session.execute(insert(Venue), [{'venue_name': f'{random.choice(LAST)} Hall {i}', 'capacity': 100} for i in range(200)])
+        db.session.flush()
+        db.session.execute(insert(Event), [
+            {'title': f'{random.choice(TOPICS)} {random.choice(TOPICS)} {i}', 'description': f'{random.choice(TOPICS)} event number {i}',
+             'date': date.today() + timedelta(days=i % 90), 'start_time': time(10), 'end_time': time(12),
+             'venue_id': (i % 200) + 1, 'organizer_id': admin.user_id, 'dept_id': (i % 5) + 1, 'status': 'approved'}
+            for i in range(args.events)
+        ])
+        db.session.execute(insert(Team), [
+            {'event_id': (i % args.events) + 1, 'team_name': f'Team {random.choice(FIRST)} {i}', 'leader_id': admin.user_id}
+            for i in range(args.events)
+        ])
+        db.session.commit()
+        admin_ids = (admin.user_id, admin.role_id)
+    report('seed rows', args.users + 2 * args.events + 200, t.elapsed)
+
+    with Timer() as t:
+        counts = search_index.rebuild()
+    report('rebuild index', sum(counts.values()), t.elapsed)
+
+
+def keystrokes(word):
+    """'Fathima' -> ['fa', 'fat', 'fath', ...] as an admin types it."""
+    return [word[:n].lower() for n in range(2, len(word) + 1)]
+
+
+words = FIRST + LAST + TOPICS + ['stu0123', 'student42', '98765', 'hall', 'team']
+queries = [q for _ in range(args.queries // 40 + 1) for w in random.sample(words, 8) for q in keystrokes(w)][:args.queries]
+queries += [f'{random.choice(FIRST)} {random.choice(LAST)[:3]}' for _ in range(args.queries // 10)]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return (statistics.median(samples), samples[int(len(samples) * 0.95) - 1], samples[-1])
+
+
+with app.app_context():
+    index_ms = []
+    for q in queries:
+        with Timer() as t:
+            search_index.search(q)
+        index_ms.append(t.elapsed * 1000)
+
+client = app.test_client()
+with client.session_transaction() as s:
+    s['user_id'], s['role_id'] = admin_ids
+    s['role_name'] = 'Admin'
+    s['full_name'] = 'Bench Admin'
+    s['dept_id'] = 1
+http_ms = []
+for q in queries:
+    with Timer() as t:
+        assert client.get('/admin/search', query_string={'q': q}).status_code == 200
+    http_ms.append(t.elapsed * 1000)
+
+print(f'{len(queries)} type-ahead queries over {sum(counts.values())} documents')
+print(f'{"":<16} {"p50":>8} {"p95":>8} {"max":>8}')
+for label, samples in (('index only', index_ms), ('/admin/search', http_ms)):
+    p50, p95, worst = percentiles(samples)
+    print(f'{label:<16} {p50:>6.2f}ms {p95:>6.2f}ms {worst:>6.2f}ms  {"OK" if p95 < 50 else "OVER 50ms"}')
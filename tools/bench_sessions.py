@@ -0,0 +1,71 @@
+"""Measure session cookie size and per-request session overhead.
+Compares the old signed-cookie session carrying the full login payload with
+the compact signed cookie and the server-side database store
+(utils.server_session), using a logged-in student. Each mode reports the
+cookie size and the time per request of a page that reads the user's name
+from the session, with and without a session write.
+Run:
+    python3 tools/bench_sessions.py [--requests 2000]
+"""
+import argparse
+from bench_support import load_app, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--requests', type=int, default=2000)
+args = parser.parse_args()
+
+app = load_app()
+app.config['SESSION_COOKIE_SECURE'] = False
+
+from flask import session
+from flask.sessions import SecureCookieSessionInterface
+from models import db
+from models.models import User, Role
+from utils import server_session
+
+
+@app.route('/_bench/session/read')
+def bench_read():
+    return session['full_name']
+
+
+@app.route('/_bench/session/write')
+def bench_write():
+    session['hits'] = session.get('hits', 0) + 1
+    return session['full_name']
+
+
+with app.app_context():
+    role = Role.query.filter_by(role_name='Student').first()
+    user = User(full_name='Benchmark Student With A Long Name', username='B0001', email='bench.student@campus.local',
+                password='x', role_id=role.role_id, dept_id=1, mobile_number='+919000000001')
+    db.session.add(user)
+    db.session.commit()
+    legacy_payload = {
+        'user_id': user.user_id, 'full_name': user.full_name, 'email': user.email, 'role_id': user.role_id,
+        'role_name': 'Student', 'dept_id': user.dept_id, 'is_guest': False, 'mobile_number': user.mobile_number,
+        'guest_code': None, 'username': user.username, '_permanent': True,
+    }
+    compact_payload = {'user_id': user.user_id, 'role_id': user.role_id, '_permanent': True}
+
+modes = [
+    ('signed cookie, full payload (old)', SecureCookieSessionInterface(), legacy_payload),
+    ('signed cookie, compact payload', server_session.CompactCookieSessionInterface(), compact_payload),
+    ('server-side (database)', server_session.ServerSessionInterface(server_session.DatabaseBackend()), compact_payload),
+]
+
+print(f'{"mode":<36} {"cookie":>7} {"read":>10} {"write":>10}')
+for label, interface, payload in modes:
+    app.session_interface = interface
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s.update(payload)
+    cookie = client.get_cookie('session').value
+    timings = []
+    for path in ('/_bench/session/read', '/_bench/session/write'):
+        client.get(path)
+        with Timer() as t:
+            for _ in range(args.requests):
+                client.get(path)
+        timings.append(t.elapsed / args.requests * 1e6)
+    print(f'{label:<36} {len(cookie):>6}B {timings[0]:>8.0f}us {timings[1]:>8.0f}us')
@@ -0,0 +1,136 @@
+"""Shared helpers for the tools/bench_*.py scripts.
+
+Benchmarks always run against a throwaway SQLite database so they can never
+touch the real campus database.
+"""
+import os
+import sys
+import socketserver
+import tempfile
+import threading
+import time
+
+# make project root importable when running from tools/
+PROJ_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJ_ROOT not in sys.path:
+    sys.path.insert(0, PROJ_ROOT)
+
+
+def load_app(db_path=None):
+    """Import the Flask app bound to a scratch SQLite file and create the schema."""
+    path = db_path or os.path.join(tempfile.mkdtemp(prefix='campus-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    from app import app
+    from models import db
+    from models import models  # noqa: F401  (registers tables)
+
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        raise SystemExit('Refusing to benchmark: DATABASE_URL from .env overrides the scratch database.')
+
+    with app.app_context():
+        db.create_all()
+        seed_reference_rows()
+    return app
+
+
+def seed_reference_rows():
+    """Create the roles and departments every benchmark relies on."""
+    from models import db
+    from models.models import Role, Department
+
+    if Role.query.first():
+        return
+    for name in ('Guest', 'Student', 'Event Organizer', 'HOD', 'Principal', 'Admin'):
+        db.session.add(Role(role_name=name))
+    for name in ('Computer Science', 'Electronics', 'Mechanical', 'Civil', 'General'):
+        db.session.add(Department(dept_name=name))
+    db.session.commit()
+
+
+class Timer:
+    """Context manager recording wall-clock seconds in `elapsed`."""
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+
+
+def report(label, count, elapsed):
+    rate = count / elapsed if elapsed else float('inf')
+    print(f'{label:<40} {count:>7} in {elapsed:8.3f}s  ({rate:,.1f}/s)')
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.server.count('connections')
+        self._reply('220 localhost campus-bench ESMTP')
+        in_data = False
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            if in_data:
+                if line.rstrip(b'\r\n') == b'.':
+                    in_data = False
+                    self.server.count('messages')
+                    self._reply('250 OK queued')
+                continue
+            command = line.decode('ascii', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.wfile.write(b'250-localhost\r\n250-AUTH PLAIN\r\n250 8BITMIME\r\n')
+            elif verb == 'AUTH':
+                self.server.count('logins')
+                self._reply('235 Authentication successful')
+            elif verb == 'DATA':
+                in_data = True
+                self._reply('354 End data with <CR><LF>.<CR><LF>')
+            elif verb == 'QUIT':
+                self._reply('221 Bye')
+                return
+            else:
+                self._reply('250 OK')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """Minimal in-process SMTP sink that accepts everything and counts it.
+
+    Stands in for a real relay so outbox throughput can be measured without
+    network access; it does not speak STARTTLS, so use `smtp_settings()`.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), _SMTPHandler)
+        self.stats = {'connections': 0, 'logins': 0, 'messages': 0}
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def smtp_settings(self):
+        host, port = self.server_address
+        return {
+            'host': host,
+            'port': port,
+            'user': 'bench',
+            'password': 'bench',
+            'sender': 'events@campus.local',
+            'starttls': False,
+        }
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
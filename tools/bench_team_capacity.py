@@ -0,0 +1,151 @@
+"""Concurrency check: teams never grow past max_team_size.
+Creates teams whose event allows --size members, invites more students than
+fit and has them all accept at the same moment from separate threads, once
+with the old count-then-insert check and once through the accept endpoint
+(utils.team_membership). Reports the largest team and how many teams went
+over the limit; exits non-zero if the endpoint let any team overflow. Also
+shows the query count of one batched invite.
+Run:
+    python3 tools/bench_team_capacity.py [--teams 10] [--size 4] [--invitees 16]
+"""
+import argparse
+import sys
+import threading
+from bench_support import load_app, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--teams', type=int, default=10)
+parser.add_argument('--size', type=int, default=4, help='max_team_size')
+parser.add_argument('--invitees', type=int, default=16, help='students accepting per team')
+args = parser.parse_args()
+
+app = load_app()
+app.config['SESSION_COOKIE_SECURE'] = False
+
+from datetime import date, time as clock
+from sqlalchemy import event as sa_event, func, insert, select
+from models import db
+from models.models import User, Role, Event, Team, TeamInvitation, Registration
+
+with app.app_context():
+    roles = {r.role_name: r.role_id for r in Role.query.all()}
+    organizer = User(full_name='Organizer', email='org@bench.local', password='x', role_id=roles['Event Organizer'])
+    db.session.add(organizer)
+    db.session.flush()
+    hackathon = Event(title='Hackathon', description='x', date=date.today(), start_time=clock(9), end_time=clock(17),
+                      organizer_id=organizer.user_id, dept_id=1, status='approved', is_team_event=True,
+                      max_team_size=args.size)
+    db.session.add(hackathon)
+    db.session.flush()
+    event_id = hackathon.event_id
+    students_per_team = args.invitees + 1
+    db.session.execute(insert(User), [
+        {'full_name': f'Student {i}', 'username': f'T{i:05d}', 'password': 'x', 'role_id': roles['Student']}
+        for i in range(2 * args.teams * students_per_team)
+    ])
+    student_ids = db.session.execute(select(User.user_id).where(User.username.like('T%')).order_by(User.user_id)).scalars().all()
+    db.session.commit()
+    engine = db.engine
+
+
+def make_team(n, member_ids):
+    """A team led by member_ids[0] with pending invitations for the rest."""
+    leader, invitees = member_ids[0], member_ids[1:]
+    team = Team(event_id=event_id, team_name=f'Team {n}', leader_id=leader, member_count=1)
+    db.session.add(team)
+    db.session.flush()
+    db.session.add(Registration(event_id=event_id, student_id=leader, team_id=team.team_id, qr_code=f'lead-{n}'))
+    db.session.execute(insert(TeamInvitation), [
+        {'team_id': team.team_id, 'invitee_id': uid, 'status': 'pending'} for uid in invitees
+    ])
+    db.session.commit()
+    invitations = db.session.execute(
+        select(TeamInvitation.invitation_id, TeamInvitation.invitee_id).where(TeamInvitation.team_id == team.team_id)
+    ).all()
+    return team.team_id, invitations
+
+
+def legacy_accept(team_id, invitation_id, student_id):
+    # What respond_invitation used to do: count, then insert
+    with app.app_context():
+        members = Registration.query.filter_by(team_id=team_id).count()
+        if members >= args.size:
+            return
+        db.session.add(Registration(event_id=event_id, student_id=student_id, team_id=team_id,
+                                    qr_code=f'legacy-{invitation_id}'))
+        db.session.commit()
+
+
+def endpoint_accept(team_id, invitation_id, student_id, client):
+    client.post(f'/student/team-invitation/{invitation_id}/accept')
+
+
+def logged_in_client(student_id):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['user_id'] = student_id
+        s['role_id'] = roles['Student']
+    return client
+
+
+def run(label, accept, offset):
+    sizes = []
+    with Timer() as t:
+        for n in range(args.teams):
+            start = offset + n * students_per_team
+            with app.app_context():
+                team_id, invitations = make_team(offset + n, student_ids[start:start + students_per_team])
+            clients = {sid: logged_in_client(sid) for _, sid in invitations}
+            barrier = threading.Barrier(len(invitations))
+
+            def go(invitation_id, student_id):
+                barrier.wait()
+                if accept is endpoint_accept:
+                    accept(team_id, invitation_id, student_id, clients[student_id])
+                else:
+                    accept(team_id, invitation_id, student_id)
+
+            threads = [threading.Thread(target=go, args=inv) for inv in invitations]
+            for th in threads:
+                th.start()
+            for th in threads:
+                th.join()
+            with app.app_context():
+                sizes.append(db.session.execute(
+                    select(func.count()).where(Registration.team_id == team_id)).scalar())
+    over = sum(size > args.size for size in sizes)
+    print(f'{label:<30} largest team {max(sizes):>3}   teams over the limit {over:>3}/{args.teams}   ({t.elapsed:.1f}s)')
+    return over
+
+
+print(f'max_team_size {args.size}, {args.invitees} invitees accepting at once per team')
+run('count then insert (old)', legacy_accept, 0)
+overflow = run('accept endpoint (locked seat)', endpoint_accept, args.teams)
+
+with app.app_context():
+    drift = db.session.execute(
+        select(func.count()).select_from(Team).where(
+            Team.member_count != select(func.count(Registration.registration_id))
+            .where(Registration.team_id == Team.team_id).scalar_subquery(),
+            Team.team_name.in_([f'Team {n}' for n in range(args.teams, 2 * args.teams)]))
+    ).scalar()
+    print(f'member_count out of step with registrations: {drift}')
+
+# One invite request for several usernames
+statements = []
+sa_event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+with app.app_context():
+    leader = student_ids[-1]
+    team = Team(event_id=event_id, team_name='Batch', leader_id=leader, member_count=1)
+    db.session.add(team)
+    db.session.commit()
+    batch_team = team.team_id
+usernames = ', '.join(f'T{i:05d}' for i in range(2 * args.teams * students_per_team - 6, 2 * args.teams * students_per_team - 1))
+client = logged_in_client(leader)
+statements.clear()
+client.post(f'/student/team/{batch_team}/invite', data={'usernames': usernames})
+with app.app_context():
+    sent = TeamInvitation.query.filter_by(team_id=batch_team).count()
+print(f'batched invite: {sent} invitations, {len(statements)} queries for the whole request')
+
+sys.exit(1 if overflow or drift else 0)
@@ -0,0 +1,102 @@
+"""Compare the old per-user guest deletion loop with the chunked purge engine.
+Seeds expired guests with registrations, attendance, certificates and
+feedback, deletes them the old way (four DELETEs + one ORM delete per user,
+one commit at the end) and then with utils.user_purge. The longest single
+transaction is reported too: it is how long the purge holds its locks.
+Run:
+    python3 tools/bench_user_purge.py [--guests 2000] [--chunk-size 200]
+"""
+import argparse
+import time
+from bench_support import load_app, Timer
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--guests', type=int, default=2000)
+parser.add_argument('--chunk-size', type=int, default=200)
+args = parser.parse_args()
+
+app = load_app()
+
+from datetime import date, datetime, time as clock
+from sqlalchemy import event as sa_event, insert, select
+from models import db
+from models.models import User, Role, Event, Registration, Attendance, Certificate, Feedback
+from utils import user_purge
+
+
+def seed(tag):
+    roles = {r.role_name: r.role_id for r in Role.query.all()}
+    organizer = User(full_name=f'Org {tag}', email=f'org-{tag}@bench.local', password='x', role_id=roles['Event Organizer'], dept_id=1)
+    db.session.add(organizer)
+    db.session.flush()
+    event = Event(title=f'Event {tag}', description='x', date=date.today(), start_time=clock(9), end_time=clock(17),
+                  organizer_id=organizer.user_id, dept_id=1, status='approved')
+    db.session.add(event)
+    db.session.flush()
+    db.session.execute(insert(User), [
+        {'full_name': f'Guest {tag}-{i}', 'mobile_number': f'{tag}{i:07d}', 'password': 'x', 'role_id': roles['Guest'],
+         'is_guest': True, 'expiry_date': datetime(2020, 1, 1)}
+        for i in range(args.guests)
+    ])
+    ids = db.session.execute(select(User.user_id).where(User.mobile_number.like(f'{tag}%'))).scalars().all()
+    db.session.execute(insert(Registration), [
+        {'event_id': event.event_id, 'student_id': uid, 'qr_code': f'{tag}-{uid}'} for uid in ids
+    ])
+    registrations = db.session.execute(
+        select(Registration.registration_id).where(Registration.event_id == event.event_id)).scalars().all()
+    db.session.execute(insert(Attendance), [
+        {'registration_id': rid, 'scan_time': datetime.utcnow(), 'scanned_by': organizer.user_id} for rid in registrations[::2]
+    ])
+    db.session.execute(insert(Certificate), [
+        {'event_id': event.event_id, 'student_id': uid, 'certificate_url': 'x'} for uid in ids[::2]
+    ])
+    db.session.execute(insert(Feedback), [
+        {'event_id': event.event_id, 'student_id': uid, 'rating': 5} for uid in ids[::3]
+    ])
+    db.session.commit()
+    return ids
+
+
+def legacy_delete(ids):
+    # What guests_cleanup / cleanup_guests.py used to do
+    for user in User.query.filter(User.user_id.in_(ids)).all():
+        Registration.query.filter_by(student_id=user.user_id).delete()
+        Attendance.query.filter(Attendance.scanned_by == user.user_id).delete()
+        Certificate.query.filter_by(student_id=user.user_id).delete()
+        Feedback.query.filter_by(student_id=user.user_id).delete()
+        db.session.delete(user)
+    db.session.commit()
+
+
+transactions = []
+
+
+def track_transactions():
+    started = {}
+
+    @sa_event.listens_for(db.session, 'after_begin')
+    def began(session, transaction, connection):
+        started['at'] = time.perf_counter()
+
+    @sa_event.listens_for(db.session, 'after_commit')
+    def committed(session):
+        if 'at' in started:
+            transactions.append(time.perf_counter() - started.pop('at'))
+
+
+with app.app_context():
+    track_transactions()
+    datasets = [seed('1'), seed('2')]
+    results = []
+    for ids, (label, run) in zip(datasets, (
+            ('per-user loop (old)', legacy_delete),
+            ('chunked purge', lambda ids: user_purge.purge_users(ids, chunk_size=args.chunk_size)))):
+        transactions.clear()
+        with Timer() as t:
+            run(ids)
+        left = User.query.filter(User.user_id.in_(ids)).count()
+        results.append((label, t.elapsed, max(transactions), len(transactions), left))
+
+    print(f'{"method":<22} {"total":>9} {"longest txn":>12} {"txns":>6} {"left":>5}   ({args.guests} guests)')
+    for label, total, longest, count, left in results:
+        print(f'{label:<22} {total:8.2f}s {longest * 1000:10.1f}ms {count:>6} {left:>5}')
@@ -0,0 +1,234 @@
+"""Build step for static CSS/JS: minify, fingerprint, pre-compress.
+
+Every source under static/css/*.css and static/js/*.js is minified, written
+next to the source as <name>.<sha1[:8]>.min.<ext>, and pre-compressed as
+.gz (and .br when the optional `brotli` package is installed). The mapping
+source -> hashed file is written to static/asset-manifest.json, which the
+`asset_url()` template helper reads. Outputs of earlier builds that are no
+longer referenced are removed.
+Run after editing any stylesheet or script:
+    python3 tools/build_assets.py
+"""
+import sys, os
+import fnmatch
+import glob
+import gzip
+import hashlib
+import json
+import re
+# make project root importable when running from tools/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.assets import MANIFEST_NAME, is_build_output
+
+try:
+    import brotli
+except ImportError:  # optional: only .gz siblings are written
+    brotli = None
+
+STATIC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'static'))
+PATTERNS = ('css/*.css', 'js/*.js')
+# Pre-hashing leftovers that nothing references any more
+LEGACY_OUTPUTS = ('css/*.css.min', 'js/*.js.min')
+
+_CSS_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/|\s+|[^"\'/\s]+|/', re.S)
+_CSS_TIGHT_BEFORE = re.compile(r'\s+([{};,>])')
+_CSS_TIGHT_AFTER = re.compile(r'([{};,>:])\s+')
+
+
+def minify_css(text):
+    """Strip comments and redundant whitespace; quoted strings are kept verbatim."""
+    parts = []
+    for token in _CSS_TOKEN.findall(text):
+        if token.startswith('/*'):
+            continue
+        if token[0] in '"\'':
+            parts.append(('str', token))
+        elif token.isspace():
+            parts.append(('code', ' '))
+        else:
+            parts.append(('code', token))
+    # Tighten punctuation in the code runs between strings
+    out, run = [], []
+    for kind, token in parts + [('str', '')]:
+        if kind == 'code':
+            run.append(token)
+            continue
+        code = re.sub(r' +', ' ', ''.join(run))
+        code = _CSS_TIGHT_AFTER.sub(r'\1', _CSS_TIGHT_BEFORE.sub(r'\1', code))
+        out.append(code.replace(';}', '}'))
+        out.append(token)
+        run = []
+    return ''.join(out).strip()
+
+
+_REGEX_PREFIX = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete', 'void', 'throw')
+# A newline next to these characters can never end a statement, so it can go
+_NO_NEWLINE_AFTER = set('{;,([=:?&|')
+_NO_NEWLINE_BEFORE = set('});,.]')
+
+
+def _word_char(ch):
+    return ch.isalnum() or ch in '_$\\'
+
+
+def minify_js(text):
+    """Conservative JS minifier: drops comments and indentation, keeps every
+    newline that automatic semicolon insertion could depend on."""
+    out = []
+    i, n = 0, len(text)
+    pending = None  # whitespace seen since the last token: None, ' ' or '\n'
+
+    def last():
+        return out[-1][-1] if out else ''
+
+    def emit(chunk):
+        nonlocal pending
+        if pending and out:
+            prev, nxt = last(), chunk[0]
+            if pending == '\n' and prev not in _NO_NEWLINE_AFTER and nxt not in _NO_NEWLINE_BEFORE:
+                out.append('\n')
+            elif (_word_char(prev) and _word_char(nxt)) or (prev == nxt and prev in '+-'):
+                out.append(' ')
+        pending = None
+        out.append(chunk)
+
+    def regex_allowed():
+        tail = ''.join(out[-3:]).rstrip()
+        if not tail or tail[-1] in _REGEX_PREFIX:
+            return True
+        return re.search(r'(?:^|[^\w$])(?:%s)$' % '|'.join(_REGEX_KEYWORDS), tail) is not None
+
+    while i < n:
+        ch = text[i]
+        if ch.isspace():
+            j = i
+            while j < n and text[j].isspace():
+                j += 1
+            if pending != '\n':
+                pending = '\n' if '\n' in text[i:j] else ' '
+            i = j
+        elif text.startswith('//', i):
+            j = text.find('\n', i)
+            i = n if j < 0 else j
+        elif text.startswith('/*', i):
+            j = text.find('*/', i + 2)
+            j = n if j < 0 else j + 2
+            if pending != '\n':
+                pending = '\n' if '\n' in text[i:j] else ' '
+            i = j
+        elif ch in '"\'':
+            j = i + 1
+            while j < n and text[j] != ch:
+                j += 2 if text[j] == '\\' else 1
+            emit(text[i:j + 1])
+            i = j + 1
+        elif ch == '`':
+            # Template literal, copied verbatim (its whitespace is content)
+            j, depth = i + 1, 0
+            while j < n and not (text[j] == '`' and depth == 0):
+                if text[j] == '\\':
+                    j += 1
+                elif text.startswith('${', j):
+                    depth += 1
+                    j += 1
+                elif text[j] == '}' and depth:
+                    depth -= 1
+                j += 1
+            emit(text[i:j + 1])
+            i = j + 1
+        elif ch == '/' and regex_allowed():
+            j, in_class = i + 1, False
+            while j < n and (in_class or text[j] != '/'):
+                if text[j] == '\\':
+                    j += 1
+                elif text[j] == '[':
+                    in_class = True
+                elif text[j] == ']':
+                    in_class = False
+                j += 1
+            j += 1
+            while j < n and text[j].isalpha():
+                j += 1
+            emit(text[i:j])
+            i = j
+        else:
+            j = i + 1
+            if _word_char(ch):
+                while j < n and _word_char(text[j]):
+                    j += 1
+            emit(text[i:j])
+            i = j
+    return ''.join(out).strip() + '\n'
+
+
+def _write(path, data):
+    with open(path, 'wb') as fh:
+        fh.write(data)
+
+
+def build_asset(relative):
+    """Minify, fingerprint and compress one source; returns the hashed path."""
+    source = os.path.join(STATIC_DIR, relative)
+    with open(source, encoding='utf-8') as fh:
+        text = fh.read()
+    stem, ext = os.path.splitext(relative)
+    minified = (minify_css(text) if ext == '.css' else minify_js(text)).encode('utf-8')
+    digest = hashlib.sha1(minified).hexdigest()[:8]
+    hashed = f'{stem}.{digest}.min{ext}'
+    target = os.path.join(STATIC_DIR, hashed)
+    _write(target, minified)
+    # mtime=0 keeps rebuilds of unchanged files byte-identical
+    _write(target + '.gz', gzip.compress(minified, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write(target + '.br', brotli.compress(minified, quality=11))
+    return hashed, len(text.encode('utf-8')), len(minified)
+
+
+def _stale_outputs(manifest):
+    keep = set()
+    for hashed in manifest.values():
+        keep.update({hashed, hashed + '.gz', hashed + '.br'})
+    candidates = []
+    for pattern in PATTERNS + LEGACY_OUTPUTS:
+        directory = os.path.dirname(pattern)
+        candidates += glob.glob(os.path.join(STATIC_DIR, directory, '*'))
+    for path in sorted(set(candidates)):
+        relative = os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+        legacy = any(fnmatch.fnmatch(relative, p) for p in LEGACY_OUTPUTS)
+        if relative not in keep and (legacy or is_build_output(relative)):
+            yield path
+
+
+def main():
+    sources = []
+    for pattern in PATTERNS:
+        for path in sorted(glob.glob(os.path.join(STATIC_DIR, pattern))):
+            relative = os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+            if not is_build_output(relative):
+                sources.append(relative)
+
+    manifest = {}
+    print(f"{'source':24s} {'bytes':>8s} {'minified':>9s} {'gzip':>7s}" + (f" {'brotli':>7s}" if brotli else ''))
+    for relative in sources:
+        hashed, raw, minified = build_asset(relative)
+        manifest[relative] = hashed
+        target = os.path.join(STATIC_DIR, hashed)
+        line = f'{relative:24s} {raw:8d} {minified:9d} {os.path.getsize(target + ".gz"):7d}'
+        if brotli:
+            line += f' {os.path.getsize(target + ".br"):7d}'
+        print(f'{line}  -> {hashed}')
+
+    with open(os.path.join(STATIC_DIR, MANIFEST_NAME), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+
+    for path in _stale_outputs(manifest):
+        os.remove(path)
+        print(f'removed {os.path.relpath(path, STATIC_DIR)}')
+    if brotli is None:
+        print('brotli not installed: only .gz files were written (pip install brotli)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,27 +1,15 @@
+"""One guest lifecycle run (kept for existing cron entries).
+Prefer tools/guest_lifecycle_worker.py --once.
+"""
+import sys, os
+# make project root importable when running from tools/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app import app
-from models import db
-from models.models import User, AppConfig, Registration, Attendance, Certificate, Feedback, Role
-from datetime import datetime
+from utils.guest_lifecycle import run_once
 
 def run_cleanup():
-    now = datetime.utcnow()
-    expired = User.query.join(Role).filter(Role.role_name.ilike('guest'), User.expiry_date!=None, User.expiry_date<now).all()
-    policy = 'archive'
-    cfg = AppConfig.query.get('guest_cleanup_policy')
-    if cfg and cfg.value:
-        policy = cfg.value
-
-    for u in expired:
-        u.guest_status = 'expired'
-        if policy == 'delete':
-            Registration.query.filter_by(student_id=u.user_id).delete()
-            Attendance.query.filter(Attendance.scanned_by==u.user_id).delete()
-            Certificate.query.filter_by(student_id=u.user_id).delete()
-            Feedback.query.filter_by(student_id=u.user_id).delete()
-            db.session.delete(u)
-
-    db.session.commit()
-    print('Guest cleanup completed')
+    job = run_once()
+    print(f'Guest cleanup {job.status}: {job.message}')
 
 
 if __name__ == '__main__':
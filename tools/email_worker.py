@@ -0,0 +1,27 @@
+"""Deliver queued emails from the `email_outbox` table.
+Run:
+    python3 tools/email_worker.py           # keep draining, poll every 5s
+    python3 tools/email_worker.py --once    # send whatever is due, then exit
+"""
+import sys, os
+import argparse
+import logging
+# make project root importable when running from tools/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import app
+from utils.email_outbox import drain_outbox, run_worker
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--once', action='store_true', help='drain due messages and exit')
+parser.add_argument('--poll', type=float, default=5.0, help='seconds to sleep when the outbox is empty')
+args = parser.parse_args()
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    with app.app_context():
+        if args.once:
+            stats = drain_outbox()
+            print(f"Sent: {stats['sent']}, retried: {stats['retried']}, failed: {stats['failed']} "
+                  f"in {stats['elapsed']:.2f}s")
+        else:
+            run_worker(poll_interval=args.poll, logger=logging.getLogger('email_worker'))
@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
+"""Print the newest guest OTP stored for a mobile number (development aid).
+Run:
+    python3 tools/get_latest_otp.py +916282153391
+"""
+import sys, os
+import argparse
+# make project root importable when running from tools/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app import app
-from models.models import GuestOTP
-from models import db
+from utils.guest_otp import latest_otp
 
-MOBILE = '+916282153391'
+parser = argparse.ArgumentParser()
+parser.add_argument('mobile', nargs='?', default='+916282153391')
+args = parser.parse_args()
 
 with app.app_context():
-    otp = GuestOTP.query.filter_by(mobile_number=MOBILE).order_by(GuestOTP.created_at.desc()).first()
+    otp = latest_otp(args.mobile)
     if otp:
         print('OTP found:', otp.code, 'used=', otp.used, 'created_at=', otp.created_at)
     else:
-        print('No OTP found for', MOBILE)
+        print('No live OTP for', args.mobile)
@@ -0,0 +1,33 @@
+"""Expire guest accounts and apply the cleanup policy on a schedule.
+Each run marks guests past their expiry date as expired and, when the
+cleanup policy (admin guests page) is 'delete', purges expired guests, in
+chunks, then deletes used and expired guest OTP codes. Runs are recorded as `guest_lifecycle` jobs and listed with their
+timing on the admin guests page.
+Run:
+    python3 tools/guest_lifecycle_worker.py                  # every 15 minutes, forever
+    python3 tools/guest_lifecycle_worker.py --interval 300
+    python3 tools/guest_lifecycle_worker.py --once           # single run (e.g. from cron)
+"""
+import sys, os
+import argparse
+import logging
+# make project root importable when running from tools/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import app
+from utils.guest_lifecycle import DEFAULT_CHUNK_SIZE, DEFAULT_INTERVAL, run_once, run_scheduler
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--once', action='store_true', help='run once and exit')
+parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='seconds between runs')
+parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+args = parser.parse_args()
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    with app.app_context():
+        if args.once:
+            job = run_once(chunk_size=args.chunk_size)
+            print(f'{job.status}: {job.message}')
+        else:
+            run_scheduler(interval=args.interval, chunk_size=args.chunk_size,
+                          logger=logging.getLogger('guest_lifecycle'))
@@ -0,0 +1,26 @@
+"""Rebuild the admin search index (instance/search_index.db) from the database.
+Needed once after deploying it, and after any raw-SQL bulk change to events,
+users, teams or venues (normal app writes keep the index current).
+Run:
+    python3 tools/rebuild_search_index.py [--chunk-size 2000]
+"""
+import sys, os
+import argparse
+import time
+# make project root importable when running from tools/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import app
+from utils import search_index
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--chunk-size', type=int, default=2000)
+args = parser.parse_args()
+
+if __name__ == '__main__':
+    with app.app_context():
+        started = time.perf_counter()
+        counts = search_index.rebuild(chunk_size=args.chunk_size)
+        if counts is None:
+            raise SystemExit('Search index unavailable (SQLite without FTS5?)')
+        summary = ', '.join(f'{kind}: {count}' for kind, count in counts.items()) or 'nothing to index'
+        print(f'Indexed {summary} into {search_index.index_path()} in {time.perf_counter() - started:.2f}s')
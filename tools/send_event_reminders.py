@@ -0,0 +1,25 @@
+"""Queue reminder emails for approved events happening in the next few days.
+Safe to run repeatedly (e.g. hourly from cron): each registrant gets one
+reminder per event date. The email worker delivers what this queues.
+Run:
+    python3 tools/send_event_reminders.py [--days 2] [--chunk-size 500]
+"""
+import sys, os
+import argparse
+# make project root importable when running from tools/
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app import app
+from utils.notifications import send_event_reminders
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--days', type=int, default=2, help='remind about events up to this many days ahead')
+parser.add_argument('--chunk-size', type=int, default=500)
+args = parser.parse_args()
+
+if __name__ == '__main__':
+    with app.app_context():
+        stats = send_event_reminders(days_ahead=args.days, chunk_size=args.chunk_size)
+        rate = stats['recipients'] / stats['elapsed'] if stats['elapsed'] else 0
+        print(f"Events: {stats['events']}, recipients: {stats['recipients']}, "
+              f"queued: {stats['queued']}, already sent: {stats['skipped']} "
+              f"in {stats['elapsed']:.2f}s ({rate:.0f} recipients/s)")
@@ -0,0 +1,98 @@
+"""
+Static Assets - fingerprinted CSS/JS from static/asset-manifest.json
+
+tools/build_assets.py minifies every stylesheet and script to
+<name>.<hash>.min.<ext> (plus .gz/.br siblings) and records the mapping in
+the manifest. Templates call `asset_url('css/style.css')`, which resolves
+through the manifest, so a changed file always gets a new URL and built
+files can be cached for a year as immutable. Sources without a manifest
+entry (or everything, with ASSETS_USE_SOURCES=1 while editing) are served
+as-is with the default static caching.
+"""
+
+import json
+import os
+import re
+from flask import current_app, request, url_for
+
+MANIFEST_NAME = 'asset-manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+_BUILD_OUTPUT = re.compile(r'\.[0-9a-f]{8}\.min\.(?:css|js)(?:\.gz|\.br)?$')
+# Content-Encoding -> suffix of the pre-compressed sibling, in preference order
+_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_manifest = {'mtime': None, 'entries': {}, 'outputs': frozenset()}
+
+
+def is_build_output(relative_path):
+    """True for files written by the build (hashed names and their siblings)."""
+    return _BUILD_OUTPUT.search(relative_path) is not None
+
+
+def _use_sources():
+    return os.getenv('ASSETS_USE_SOURCES', '0') == '1'
+
+
+def manifest():
+    """Source -> hashed path mapping; re-read only when the file changes."""
+    path = os.path.join(current_app.static_folder, MANIFEST_NAME)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    if mtime != _manifest['mtime']:
+        entries = {}
+        if mtime is not None:
+            try:
+                with open(path, encoding='utf-8') as fh:
+                    entries = json.load(fh)
+            except ValueError:
+                current_app.logger.warning('Ignoring unreadable %s', MANIFEST_NAME)
+        _manifest.update(mtime=mtime, entries=entries, outputs=frozenset(entries.values()))
+    return _manifest['entries']
+
+
+def asset_url(filename):
+    """URL of the built file for static/<filename>, or of the source itself."""
+    if not _use_sources():
+        filename = manifest().get(filename, filename)
+    return url_for('static', filename=filename)
+
+
+def _accepted_sibling(filename):
+    # Pre-compressed sibling the client accepts, if the build produced one
+    for encoding, suffix in _ENCODINGS:
+        if encoding in request.accept_encodings:
+            path = os.path.join(current_app.static_folder, filename + suffix)
+            if os.path.isfile(path):
+                return encoding, filename + suffix
+    return None
+
+
+def init_app(app):
+    """Register `asset_url` and long-lived caching for built files."""
+    app.jinja_env.globals['asset_url'] = asset_url
+    serve_static = app.view_functions['static']
+
+    def static(filename):
+        manifest()
+        if filename not in _manifest['outputs']:
+            return serve_static(filename=filename)
+        sibling = _accepted_sibling(filename)
+        if sibling:
+            encoding, compressed = sibling
+            response = serve_static(filename=compressed)
+            if response.status_code in (200, 206):
+                response.mimetype = 'text/css' if filename.endswith('.css') else 'text/javascript'
+                response.content_encoding = encoding
+        else:
+            response = serve_static(filename=filename)
+        response.vary.add('Accept-Encoding')
+        # The name changes whenever the content does, so it never needs revalidating
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
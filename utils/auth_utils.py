@@ -0,0 +1,141 @@
+"""
+Auth Utilities - login lookup, cached role resolution, the current user and
+role guards
+
+Roles come from the process-local reference-data cache. Role keys are the
+canonical lowercase names used by every guard: guest, student, organizer,
+hod, principal, admin. `current_user()` loads the logged-in user with role
+and department in one query, once per request; guards, views, templates
+(as `current_user`) and the session's profile fields all share it.
+"""
+
+from functools import wraps
+from flask import g, session, flash, redirect, url_for
+from sqlalchemy import or_, select
+from sqlalchemy.orm import contains_eager, joinedload
+from models import db
+from models.models import User
+from utils.reference_cache import roles, invalidate
+
+# Canonical role key -> name stored in session['role_name'] and shown in the UI
+ROLE_DISPLAY = {
+    'guest': 'Guest',
+    'student': 'Student',
+    'organizer': 'Event Organizer',
+    'hod': 'HOD',
+    'principal': 'Principal',
+    'admin': 'Admin',
+}
+_ALIASES = {'event organizer': 'organizer'}
+
+
+def role_key(role_name):
+    """Canonical key for a role name ('Event Organizer' -> 'organizer')."""
+    name = (role_name or '').strip().lower()
+    return _ALIASES.get(name, name)
+
+
+def display_role(role_name):
+    return ROLE_DISPLAY.get(role_key(role_name), (role_name or '').title())
+
+
+def _role_map(reload=False):
+    if reload:
+        invalidate('roles')
+    return {r.role_id: role_key(r.role_name) for r in roles()}
+
+
+def role_key_for_id(role_id):
+    if role_id is None:
+        return None
+    key = _role_map().get(role_id)
+    if key is None:
+        # A role created after the cache was filled
+        key = _role_map(reload=True).get(role_id)
+    return key
+
+
+def role_id_for(key):
+    """role_id for a canonical role key, or None."""
+    for role_id, cached_key in _role_map().items():
+        if cached_key == key:
+            return role_id
+    return None
+
+
+def current_role():
+    """Canonical role key of the logged-in user ('' when anonymous)."""
+    if 'user_id' not in session:
+        return ''
+    if session.get('is_guest'):
+        return 'guest'
+    return role_key_for_id(session.get('role_id')) or role_key(session.get('role_name'))
+
+
+def has_role(*keys):
+    return current_role() in keys
+
+
+def current_user():
+    """The logged-in User with role and department loaded, or None.
+
+    Loaded once per request and memoized in `g`.
+    """
+    user_id = session.get('user_id')
+    if user_id is None:
+        return None
+    cached = g.get('_current_user')
+    if cached is None or cached[0] != user_id:
+        user = db.session.execute(
+            select(User).options(joinedload(User.role), joinedload(User.department)).where(User.user_id == user_id)
+        ).scalar()
+        cached = g._current_user = (user_id, user)
+    return cached[1]
+
+
+def role_required(*keys):
+    """Decorator factory: allow only logged-in users whose role key is in `keys`."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not has_role(*keys):
+                flash('Access denied', 'error')
+                return redirect(url_for('auth.login'))
+            if current_user() is None:
+                # The account was deleted after this session logged in
+                session.clear()
+                flash('Please log in again.', 'error')
+                return redirect(url_for('auth.login'))
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def find_login_user(identifier):
+    """Resolve a login identifier with one joined user+role query.
+
+    Students log in by username, everyone else by email. Returns
+    (user, error_message); user.role is already loaded.
+    """
+    if not identifier:
+        return None, None
+    rows = (
+        db.session.query(User)
+        .outerjoin(User.role)
+        .options(contains_eager(User.role))
+        .filter(or_(User.username == identifier, User.email == identifier))
+        .limit(2)
+        .all()
+    )
+    # Compare case-insensitively like MySQL's default collation does
+    wanted = identifier.lower()
+    by_username = next((u for u in rows if (u.username or '').lower() == wanted), None)
+    if by_username:
+        if role_key_for_id(by_username.role_id) != 'student':
+            return None, 'Non-students must login with email.'
+        return by_username, None
+
+    by_email = next((u for u in rows if (u.email or '').lower() == wanted), None)
+    if by_email and role_key_for_id(by_email.role_id) == 'student' and by_email.username:
+        return None, 'Students must login using username.'
+    return by_email, None
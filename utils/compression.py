@@ -0,0 +1,139 @@
+"""
+Response Compression - gzip/brotli for dynamic HTML, JSON and CSV
+
+An after_request hook compresses text responses for clients that accept
+it, preferring brotli (when the optional `brotli` package is installed)
+over gzip. Buffered responses are compressed in one go; streamed ones
+(generators, send_file of in-memory exports) are compressed incrementally
+and flushed every few KB, so the body is never buffered whole.
+Already-compressed or binary types (PDF, images, XLSX/ZIP) and responses
+the proxy delivers (X-Sendfile / X-Accel-Redirect) pass through untouched.
+Settings:
+    COMPRESSION_ENABLED     1 (default) / 0
+    COMPRESSION_MIN_SIZE    smallest buffered body worth compressing (default 500 bytes)
+    COMPRESSION_GZIP_LEVEL  1-9 (default 6)
+    COMPRESSION_BR_QUALITY  0-11 (default 4; higher is smaller but slow for dynamic pages)
+"""
+
+import gzip
+import os
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'application/json', 'application/javascript', 'application/xml',
+    'application/manifest+json', 'image/svg+xml', 'text/csv',
+}
+_PROXY_HEADERS = ('X-Sendfile', 'X-Accel-Redirect')
+STREAM_FLUSH_BYTES = 8192
+
+
+def enabled():
+    return os.getenv('COMPRESSION_ENABLED', '1') == '1'
+
+
+def _setting(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def compressible(mimetype):
+    """True for text-like types; binary and already-compressed ones are skipped."""
+    mimetype = (mimetype or '').lower()
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES or mimetype.endswith(('+json', '+xml'))
+
+
+def choose_encoding(accept_encodings):
+    """Preferred encoding the client accepts ('br', 'gzip') or None."""
+    offers = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return accept_encodings.best_match(offers)
+
+
+def _compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=_setting('COMPRESSION_BR_QUALITY', 4))
+    return gzip.compress(data, compresslevel=_setting('COMPRESSION_GZIP_LEVEL', 6), mtime=0)
+
+
+def _compress_stream(chunks, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=_setting('COMPRESSION_BR_QUALITY', 4))
+        process, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(_setting('COMPRESSION_GZIP_LEVEL', 6), zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+
+        def flush():
+            return compressor.flush(zlib.Z_SYNC_FLUSH)
+    pending = 0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if not chunk:
+                continue
+            out = process(chunk)
+            pending += len(chunk)
+            # Flush every ~8KB of input: rows reach the client steadily without
+            # paying the flush overhead on each tiny CSV line
+            if pending >= STREAM_FLUSH_BYTES:
+                out += flush()
+                pending = 0
+            if out:
+                yield out
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    """Compress `response` in place when worthwhile; returns it."""
+    if not enabled() or request.method == 'HEAD':
+        return response
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return response
+    headers = response.headers
+    if 'Content-Encoding' in headers or any(h in headers for h in _PROXY_HEADERS):
+        return response
+    if not compressible(response.mimetype) or response.cache_control.no_transform:
+        return response
+
+    # Vary even when this client gets identity, so shared caches keep them apart
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    min_size = _setting('COMPRESSION_MIN_SIZE', 500)
+    if response.is_streamed or response.direct_passthrough:
+        # Length is known for send_file bodies, unknown for generators
+        if response.content_length is not None and response.content_length < min_size:
+            return response
+        response.direct_passthrough = False
+        response.response = _compress_stream(response.response, encoding)
+        headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(_compress(data, encoding))
+    response.content_encoding = encoding
+
+    # Same resource, different bytes: a strong validator must not be shared
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
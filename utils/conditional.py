@@ -0,0 +1,44 @@
+"""
+Conditional Responses - ETag / 304 handling for generated files and JSON
+
+Views build an ETag from the row versions their output depends on (ids,
+timestamps, counters) *before* doing any expensive work. `not_modified()`
+answers 304 when the client already holds that version, so no file is
+opened and nothing is rendered; otherwise `with_etag()` tags the fresh
+response. Responses are private; with max_age=0 the browser revalidates on
+every use but only downloads when the version changed.
+"""
+
+import hashlib
+from flask import current_app, make_response, request
+
+
+def make_etag(*parts):
+    """Opaque ETag value for a tuple of version parts."""
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:32]
+
+
+def _cache_headers(response, etag, max_age):
+    # Weak: the same version may be re-rendered with different bytes (PDF timestamps)
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag, max_age=0):
+    """A 304 response if the request already has `etag`, else None."""
+    if request.if_none_match.contains_weak(etag):
+        return _cache_headers(current_app.response_class(status=304), etag, max_age)
+    return None
+
+
+def with_etag(response, etag, max_age=0):
+    """Attach `etag` and cache headers to a successful response."""
+    response = make_response(response)
+    if response.status_code == 200:
+        _cache_headers(response, etag, max_age)
+    return response
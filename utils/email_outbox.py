@@ -0,0 +1,150 @@
+"""
+Email Outbox Worker - delivers queued emails over one reused SMTP connection
+Configure via environment variables (in addition to the SMTP_* settings):
+- EMAIL_OUTBOX_BATCH (default 50)
+- EMAIL_OUTBOX_MAX_ATTEMPTS (default 5)
+- EMAIL_RATE_PER_SEC (default 0 = unlimited)
+"""
+
+import os
+import smtplib
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_
+from models import db
+from models.models import EmailOutbox
+from utils.email_utils import SMTPSession, build_message
+
+# Rows left in 'sending' longer than this belong to a crashed worker and are re-claimed
+STALE_LOCK = timedelta(minutes=10)
+MAX_BACKOFF_SECONDS = 3600
+
+
+class RateLimiter:
+    """Spaces calls so no more than `rate` happen per second (0 disables limiting)."""
+
+    def __init__(self, rate=0):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if now < self._next:
+            time.sleep(self._next - now)
+            now = self._next
+        self._next = now + self.interval
+
+
+def backoff_seconds(attempts):
+    """Exponential retry delay: 30s, 60s, 120s ... capped at one hour."""
+    return min(30 * (2 ** max(attempts - 1, 0)), MAX_BACKOFF_SECONDS)
+
+
+def claim_batch(limit):
+    """Mark up to `limit` due messages as 'sending' and return them.
+
+    Uses SELECT ... FOR UPDATE SKIP LOCKED where the database supports it so
+    several workers can drain the same outbox without sending twice.
+    """
+    now = datetime.utcnow()
+    due = or_(
+        and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+        and_(EmailOutbox.status == 'sending', EmailOutbox.locked_at < now - STALE_LOCK)
+    )
+    rows = db.session.query(EmailOutbox.outbox_id).filter(due).order_by(
+        EmailOutbox.next_attempt_at, EmailOutbox.outbox_id
+    ).limit(limit).with_for_update(skip_locked=True).all()
+    ids = [row[0] for row in rows]
+    if ids:
+        EmailOutbox.query.filter(EmailOutbox.outbox_id.in_(ids)).update(
+            {'status': 'sending', 'locked_at': now}, synchronize_session=False
+        )
+    db.session.commit()
+    if not ids:
+        return []
+    return EmailOutbox.query.filter(EmailOutbox.outbox_id.in_(ids)).order_by(EmailOutbox.outbox_id).all()
+
+
+def _deliver(smtp, item):
+    msg = build_message(item.to_email, item.subject, item.body, item.html_body, sender=smtp.sender)
+    try:
+        smtp.send(msg)
+    except (smtplib.SMTPServerDisconnected, ConnectionError):
+        # The server dropped the reused connection; reconnect once and retry
+        smtp.close()
+        smtp.send(msg)
+
+
+def drain_outbox(batch_size=None, max_messages=None, rate_per_second=None, smtp=None):
+    """Send every due message, reusing a single SMTP connection.
+
+    Returns a stats dict with sent/retried/failed counts and elapsed seconds.
+    """
+    batch_size = batch_size or int(os.getenv('EMAIL_OUTBOX_BATCH', '50'))
+    max_attempts = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+    if rate_per_second is None:
+        rate_per_second = float(os.getenv('EMAIL_RATE_PER_SEC', '0'))
+    limiter = RateLimiter(rate_per_second)
+    owns_smtp = smtp is None
+    smtp = smtp or SMTPSession()
+
+    stats = {'sent': 0, 'retried': 0, 'failed': 0}
+    started = time.perf_counter()
+    processed = 0
+    try:
+        while max_messages is None or processed < max_messages:
+            limit = batch_size if max_messages is None else min(batch_size, max_messages - processed)
+            batch = claim_batch(limit)
+            if not batch:
+                break
+            for item in batch:
+                limiter.wait()
+                item.attempts = (item.attempts or 0) + 1
+                item.locked_at = None
+                try:
+                    _deliver(smtp, item)
+                except smtplib.SMTPRecipientsRefused as exc:
+                    item.status = 'failed'
+                    item.last_error = str(exc)[:255]
+                    stats['failed'] += 1
+                except (smtplib.SMTPException, OSError) as exc:
+                    smtp.close()
+                    item.last_error = str(exc)[:255]
+                    if item.attempts >= max_attempts:
+                        item.status = 'failed'
+                        stats['failed'] += 1
+                    else:
+                        item.status = 'pending'
+                        item.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff_seconds(item.attempts))
+                        stats['retried'] += 1
+                else:
+                    item.status = 'sent'
+                    item.sent_at = datetime.utcnow()
+                    item.last_error = None
+                    stats['sent'] += 1
+            processed += len(batch)
+            db.session.commit()
+    finally:
+        if owns_smtp:
+            smtp.close()
+
+    stats['elapsed'] = time.perf_counter() - started
+    return stats
+
+
+def run_worker(poll_interval=5.0, logger=None):
+    """Drain the outbox forever, sleeping while it is empty."""
+    while True:
+        try:
+            stats = drain_outbox()
+        except Exception as exc:
+            db.session.rollback()
+            if logger:
+                logger.warning(f'Email outbox drain failed: {exc}')
+            stats = {'sent': 0, 'retried': 0, 'failed': 0}
+        if logger and (stats['sent'] or stats['failed'] or stats['retried']):
+            logger.info(f"Email outbox: sent={stats['sent']} retried={stats['retried']} failed={stats['failed']}")
+        if not (stats['sent'] or stats['retried'] or stats['failed']):
+            time.sleep(poll_interval)
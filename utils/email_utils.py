@@ -6,6 +6,11 @@ Configure via environment variables:
 - SMTP_USER
 - SMTP_PASS
 - SMTP_FROM (optional; defaults to SMTP_USER)
+- SMTP_STARTTLS (default 1; set 0 for a local relay without TLS)
+
+`send_email` delivers immediately and is kept for scripts. Request handlers
+should call `queue_email` so delivery happens in the outbox worker
+(see utils/email_outbox.py) over one reused connection.
 """
 
 import os
@@ -14,9 +19,8 @@ import ssl
 from email.message import EmailMessage
 
 
-def send_email(to_email: str, subject: str, body: str, html_body: str | None = None) -> None:
+def smtp_settings() -> dict:
 	host = os.getenv('SMTP_HOST')
-	port = int(os.getenv('SMTP_PORT') or 587)
 	user = os.getenv('SMTP_USER')
 	password = os.getenv('SMTP_PASS')
 	sender = os.getenv('SMTP_FROM') or user
@@ -24,6 +28,17 @@ def send_email(to_email: str, subject: str, body: str, html_body: str | None = N
 	if not host or not user or not password or not sender:
 		raise RuntimeError('SMTP is not configured. Set SMTP_HOST, SMTP_USER, SMTP_PASS (and optional SMTP_FROM).')
 
+	return {
+		'host': host,
+		'port': int(os.getenv('SMTP_PORT') or 587),
+		'user': user,
+		'password': password,
+		'sender': sender,
+		'starttls': os.getenv('SMTP_STARTTLS', '1') == '1',
+	}
+
+
+def build_message(to_email: str, subject: str, body: str, html_body: str | None = None, sender: str | None = None) -> EmailMessage:
 	msg = EmailMessage()
 	msg['Subject'] = subject
 	msg['From'] = sender
@@ -31,16 +46,65 @@ def send_email(to_email: str, subject: str, body: str, html_body: str | None = N
 	msg.set_content(body)
 	if html_body:
 		msg.add_alternative(html_body, subtype='html')
+	return msg
 
-	if port == 465:
-		context = ssl.create_default_context()
-		with smtplib.SMTP_SSL(host, port, context=context) as server:
-			server.login(user, password)
-			server.send_message(msg)
-	else:
-		with smtplib.SMTP(host, port) as server:
-			server.ehlo()
-			server.starttls(context=ssl.create_default_context())
+
+class SMTPSession:
+	"""An authenticated SMTP connection that is opened lazily and reused for many messages."""
+
+	def __init__(self, settings: dict | None = None):
+		self.settings = settings or smtp_settings()
+		self.server = None
+
+	@property
+	def sender(self) -> str:
+		return self.settings['sender']
+
+	def open(self) -> None:
+		if self.server is not None:
+			return
+		cfg = self.settings
+		if cfg['port'] == 465:
+			server = smtplib.SMTP_SSL(cfg['host'], cfg['port'], context=ssl.create_default_context())
+		else:
+			server = smtplib.SMTP(cfg['host'], cfg['port'])
 			server.ehlo()
-			server.login(user, password)
-			server.send_message(msg)
+			if cfg['starttls']:
+				server.starttls(context=ssl.create_default_context())
+				server.ehlo()
+		server.login(cfg['user'], cfg['password'])
+		self.server = server
+
+	def send(self, msg: EmailMessage) -> None:
+		self.open()
+		self.server.send_message(msg)
+
+	def close(self) -> None:
+		if self.server is None:
+			return
+		try:
+			self.server.quit()
+		except (smtplib.SMTPException, OSError):
+			self.server.close()
+		self.server = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+
+def send_email(to_email: str, subject: str, body: str, html_body: str | None = None) -> None:
+	with SMTPSession() as smtp:
+		smtp.send(build_message(to_email, subject, body, html_body, sender=smtp.sender))
+
+
+def queue_email(to_email: str, subject: str, body: str, html_body: str | None = None, idempotency_key: str | None = None):
+	"""Add a message to the outbox. The caller's commit makes it visible to the worker."""
+	from models import db
+	from models.models import EmailOutbox
+
+	item = EmailOutbox(to_email=to_email, subject=subject, body=body, html_body=html_body, idempotency_key=idempotency_key)
+	db.session.add(item)
+	return item
@@ -0,0 +1,110 @@
+"""
+Event Catalog - keyset-paginated listing of upcoming approved events
+
+Pages are ordered by (event_date, start_time, event_id) and continue from an
+opaque cursor instead of an OFFSET, so every page is an index range scan on
+ix_events_catalog no matter how deep the student scrolls. Search uses the
+FULLTEXT index on (title, description) on MySQL/MariaDB and falls back to
+LIKE on other databases.
+"""
+
+import base64
+import re
+from datetime import date, datetime
+from sqlalchemy import and_, or_, text
+from sqlalchemy.orm import joinedload
+from models import db
+from models.models import Event
+
+PAGE_SIZE = 12
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def encode_cursor(event):
+    raw = f'{event.date.isoformat()}|{event.start_time.strftime("%H:%M:%S")}|{event.event_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (date, time, event_id) or None for a missing/garbled cursor."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        day, start, event_id = raw.split('|')
+        return (date.fromisoformat(day), datetime.strptime(start, '%H:%M:%S').time(), int(event_id))
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def parse_filters(args):
+    """Catalog filters from request args (all optional strings)."""
+    return {
+        'q': (args.get('q') or '').strip(),
+        'organizer': args.get('organizer', ''),
+        'mode': args.get('mode', ''),
+        'dept': args.get('dept', ''),
+        'team': args.get('team', ''),        # '1' team events, '0' individual
+        'campus': args.get('campus', ''),    # 'exclusive' or 'open'
+    }
+
+
+def search_condition(q):
+    if db.engine.dialect.name in ('mysql', 'mariadb'):
+        # Boolean mode: every word must match, as a prefix
+        terms = ' '.join(f'+{word}*' for word in _WORD.findall(q))
+        if terms:
+            return text('MATCH (events.title, events.description) AGAINST (:catalog_q IN BOOLEAN MODE)').bindparams(catalog_q=terms)
+    like = f'%{q}%'
+    return or_(Event.title.ilike(like), Event.description.ilike(like))
+
+
+def _after(cursor):
+    day, start, event_id = cursor
+    return and_(
+        Event.date >= day,
+        or_(
+            Event.date > day,
+            Event.start_time > start,
+            and_(Event.start_time == start, Event.event_id > event_id),
+        ),
+    )
+
+
+def catalog_query(filters, hide_campus_exclusive=False, today=None):
+    query = Event.query.filter(Event.status == 'approved', Event.date >= (today or date.today()))
+    if hide_campus_exclusive or filters.get('campus') == 'open':
+        query = query.filter(Event.is_campus_exclusive == False)
+    elif filters.get('campus') == 'exclusive':
+        query = query.filter(Event.is_campus_exclusive == True)
+
+    if str(filters.get('organizer') or '').isdigit():
+        query = query.filter(Event.organizer_id == int(filters['organizer']))
+    if filters.get('mode') in ('online', 'offline'):
+        query = query.filter(Event.mode == filters['mode'])
+    if str(filters.get('dept') or '').isdigit():
+        query = query.filter(Event.dept_id == int(filters['dept']))
+    if filters.get('team') == '1':
+        query = query.filter(Event.is_team_event == True)
+    elif filters.get('team') == '0':
+        query = query.filter(or_(Event.is_team_event == False, Event.is_team_event.is_(None)))
+    if filters.get('q'):
+        query = query.filter(search_condition(filters['q']))
+    return query
+
+
+def catalog_page(filters, cursor=None, limit=PAGE_SIZE, hide_campus_exclusive=False):
+    """One page of events after `cursor`. Returns (events, next_cursor or None)."""
+    query = catalog_query(filters, hide_campus_exclusive)
+    position = decode_cursor(cursor)
+    if position:
+        query = query.filter(_after(position))
+    rows = (
+        query.options(joinedload(Event.venue), joinedload(Event.department))
+        .order_by(Event.date, Event.start_time, Event.event_id)
+        .limit(limit + 1)
+        .all()
+    )
+    events = rows[:limit]
+    next_cursor = encode_cursor(events[-1]) if len(rows) > limit else None
+    return events, next_cursor
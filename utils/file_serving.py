@@ -0,0 +1,73 @@
+"""
+File Serving - hand file downloads to the front proxy after authorization
+
+Views check permissions, then call `serve_static_file()`; depending on
+FILE_SERVING_BACKEND the bytes come from:
+    python    the worker itself via send_file (default, no proxy needed)
+    sendfile  the proxy, via `X-Sendfile: <absolute path>`
+              (Apache mod_xsendfile, lighttpd)
+    accel     nginx, via `X-Accel-Redirect: <FILE_SERVING_ACCEL_PREFIX><path>`
+              where the prefix is an internal location aliased to static/:
+                  location /protected-static/ {
+                      internal;
+                      alias /srv/campus-connect/static/;
+                  }
+With a proxy backend the worker returns an empty response in microseconds,
+so a burst of certificate downloads no longer ties up every worker.
+"""
+
+import mimetypes
+import os
+import unicodedata
+from urllib.parse import quote
+from flask import current_app, send_file
+from werkzeug.security import safe_join
+
+BACKENDS = ('python', 'sendfile', 'accel')
+
+
+def backend():
+    value = os.getenv('FILE_SERVING_BACKEND', 'python').strip().lower()
+    return value if value in BACKENDS else 'python'
+
+
+def static_file_path(relative_path):
+    """Absolute path of an existing file under static/, else None (also for ../ tricks)."""
+    path = safe_join(current_app.static_folder, (relative_path or '').replace('\\', '/'))
+    return path if path and os.path.isfile(path) else None
+
+
+def _disposition_name(name):
+    # Same ASCII fallback + RFC 5987 form that send_file uses
+    try:
+        name.encode('ascii')
+        return {'filename': name}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+        return {'filename': simple, 'filename*': "UTF-8''" + quote(name, safe="!#$&+^`|~")}
+
+
+def serve_static_file(relative_path, as_attachment=False, download_name=None, mimetype=None):
+    """Response delivering static/<relative_path>, or None if there is no such file."""
+    path = static_file_path(relative_path)
+    if path is None:
+        return None
+    mode = backend()
+    if mode == 'python':
+        return send_file(path, as_attachment=as_attachment, download_name=download_name,
+                         mimetype=mimetype, etag=False)
+
+    name = download_name or os.path.basename(path)
+    response = current_app.response_class(
+        mimetype=mimetype or mimetypes.guess_type(name)[0] or 'application/octet-stream',
+        direct_passthrough=True,
+    )
+    if as_attachment:
+        response.headers.set('Content-Disposition', 'attachment', **_disposition_name(name))
+    if mode == 'sendfile':
+        response.headers['X-Sendfile'] = path
+    else:
+        relative = os.path.relpath(path, current_app.static_folder).replace(os.sep, '/')
+        prefix = os.getenv('FILE_SERVING_ACCEL_PREFIX', '/protected-static/')
+        response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(relative)
+    return response
@@ -0,0 +1,40 @@
+"""
+Guest IDs - collision-free allocation of guest identifiers
+
+A guest's ID ("G-" plus 8 random hex digits) is stored in users.username,
+which uq_users_username keeps unique. Instead of querying for a free code
+before every attempt, `save_with_guest_id()` writes the row with a fresh
+random code and lets the unique index reject the rare duplicate, retrying
+with a new code. That is one round trip in the normal case, and two
+workers that happen to pick the same code cannot both win.
+"""
+
+import secrets
+from sqlalchemy.exc import IntegrityError
+from models import db
+
+PREFIX = 'G-'
+ID_HEX_DIGITS = 8
+MAX_ATTEMPTS = 8
+
+
+def new_guest_id():
+    return f'{PREFIX}{secrets.randbelow(16 ** ID_HEX_DIGITS):0{ID_HEX_DIGITS}X}'
+
+
+def save_with_guest_id(user, attempts=MAX_ATTEMPTS):
+    """Give `user` a new guest ID and commit it, retrying on conflicts.
+
+    Works for new (pending) and existing users; returns the ID.
+    """
+    for attempt in range(attempts):
+        guest_id = user.username = new_guest_id()
+        db.session.add(user)
+        try:
+            db.session.commit()
+            return guest_id
+        except IntegrityError:
+            # Another row holds this code (or another constraint failed): start over
+            db.session.rollback()
+            if attempt == attempts - 1:
+                raise
@@ -0,0 +1,160 @@
+"""
+Guest Lifecycle - scheduled expiry and cleanup of guest accounts
+
+A periodic run (tools/guest_lifecycle_worker.py, or "Run Cleanup Now" on
+the admin guests page) does two incremental passes:
+    1. expire   active guests whose expiry_date has passed are marked
+                'expired' with one UPDATE per chunk of ids, found through
+                ix_users_guest_expiry (guest_status, expiry_date)
+    2. policy   with the 'delete' cleanup policy from app settings,
+                expired guests are purged chunk by chunk (utils.user_purge);
+                with 'archive' they are kept, marked expired
+    3. otps     used and expired guest OTP codes are deleted (utils.guest_otp)
+Every run is recorded as a `guest_lifecycle` background job, which gives
+the admin page its run history and timing. Login only reads expiry_date,
+so it never has to write the status itself.
+"""
+
+import time
+from datetime import datetime
+from sqlalchemy import func, or_, select, update
+from models import db
+from models.models import User, Role, BackgroundJob
+from utils.guest_otp import purge_otps
+from utils.jobs import run_job_inline
+from utils.settings import get_settings
+from utils.user_purge import purge_users
+
+JOB_KIND = 'guest_lifecycle'
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_INTERVAL = 900
+
+
+def _is_guest():
+    guest_roles = select(Role.role_id).where(func.lower(Role.role_name) == 'guest')
+    return or_(User.role_id.in_(guest_roles), User.is_guest == True)
+
+
+def _expired_filter(status, now):
+    return (User.guest_status == status, User.expiry_date < now, _is_guest())
+
+
+def _next_chunk(status, now, chunk_size):
+    return db.session.execute(
+        select(User.user_id)
+        .where(*_expired_filter(status, now))
+        .order_by(User.user_id)
+        .limit(chunk_size)
+    ).scalars().all()
+
+
+def expire_guests(now=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Mark active guests past their expiry date as expired. Returns the count."""
+    now = now or datetime.utcnow()
+    expired = 0
+    while True:
+        ids = _next_chunk('active', now, chunk_size)
+        if not ids:
+            return expired
+        result = db.session.execute(
+            update(User)
+            .where(User.user_id.in_(ids), User.guest_status == 'active', User.expiry_date < now)
+            .values(guest_status='expired'),
+            execution_options={'synchronize_session': False},
+        )
+        db.session.commit()
+        expired += result.rowcount
+        if len(ids) < chunk_size:
+            return expired
+
+
+class _PurgeProgress:
+    """Progress handle for one purge_users call, counted on top of the rows already reported."""
+
+    def __init__(self, progress, done):
+        self.progress = progress
+        self.done = done
+
+    def update(self, total=None, **fields):
+        # The lifecycle sets the job total; purge_users counts from zero on every call
+        for key in ('processed', 'succeeded', 'skipped'):
+            if key in fields:
+                fields[key] += self.done[key]
+        self.progress.update(**fields)
+
+
+def delete_expired_guests(now=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, done=0):
+    """Purge expired guests chunk by chunk. Returns the number deleted.
+
+    `progress`, if given, is a utils.jobs progress handle that has already
+    counted `done` rows processed and succeeded.
+    """
+    now = now or datetime.utcnow()
+    deleted = 0
+    reported = {'processed': done, 'succeeded': done, 'skipped': 0}
+    while True:
+        ids = _next_chunk('expired', now, chunk_size)
+        if not ids:
+            return deleted
+        stats = purge_users(ids, chunk_size=chunk_size,
+                            progress=_PurgeProgress(progress, dict(reported)) if progress else None)
+        deleted += stats['deleted']
+        reported['processed'] += stats['requested']
+        reported['succeeded'] += stats['deleted']
+        reported['skipped'] += stats['skipped']
+        if len(ids) < chunk_size or not stats['deleted']:
+            return deleted
+
+
+def run_lifecycle(progress, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Job: expire guests, apply the cleanup policy, then purge stale OTPs."""
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    policy = get_settings().guest_cleanup_policy
+    expired = expire_guests(now, chunk_size)
+    progress.update(total=expired, processed=expired, succeeded=expired)
+    expired_at = time.perf_counter()
+    deleted = 0
+    if policy == 'delete':
+        pending = db.session.execute(select(func.count(User.user_id)).where(*_expired_filter('expired', now))).scalar()
+        progress.update(total=expired + pending)
+        deleted = delete_expired_guests(now, chunk_size, progress=progress, done=expired)
+    finished = time.perf_counter()
+    otps = purge_otps(now)
+    message = f'Expired {expired} guest(s) in {expired_at - started:.2f}s'
+    if policy == 'delete':
+        message += f'; deleted {deleted} in {finished - expired_at:.2f}s'
+    return message + f'; purged {otps} OTP code(s) (policy: {policy}).'
+
+
+def run_once(created_by=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Run the lifecycle synchronously, recorded as a job; returns the job."""
+    return run_job_inline(JOB_KIND, run_lifecycle, chunk_size=chunk_size, created_by=created_by)
+
+
+def recent_runs(limit=10):
+    """Latest lifecycle runs, newest first, as dicts with a `seconds` duration."""
+    runs = BackgroundJob.query.filter_by(kind=JOB_KIND).order_by(BackgroundJob.job_id.desc()).limit(limit).all()
+    history = []
+    for job in runs:
+        row = job.to_dict()
+        row['started_at'] = job.started_at
+        row['seconds'] = ((job.finished_at - job.started_at).total_seconds()
+                          if job.started_at and job.finished_at else None)
+        history.append(row)
+    return history
+
+
+def run_scheduler(interval=DEFAULT_INTERVAL, chunk_size=DEFAULT_CHUNK_SIZE, logger=None):
+    """Run the lifecycle every `interval` seconds, forever."""
+    while True:
+        try:
+            job = run_once(chunk_size=chunk_size)
+            if logger:
+                logger.info(f'Guest lifecycle {job.status}: {job.message}')
+        except Exception as exc:
+            db.session.rollback()
+            if logger:
+                logger.warning(f'Guest lifecycle run failed: {exc}')
+        db.session.remove()
+        time.sleep(interval)
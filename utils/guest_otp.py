@@ -0,0 +1,118 @@
+"""
+Guest OTP - one-time codes for the guest login flow
+
+Codes live for OTP_TTL seconds and are consumed with a single conditional
+DELETE, so two verifications racing on the same code cannot both succeed.
+Lookups go through ix_guest_otps_lookup (mobile_number, code, used,
+created_at). Once a mobile number verifies, its remaining codes are
+deleted with it; codes that were never used are swept by `purge_otps()`,
+which the guest lifecycle run calls, so the table only holds live codes.
+
+Requests and verifications are rate limited per mobile number and per
+client IP with sliding windows (utils.rate_limit). Limits are
+"<count>/<seconds>" strings read from the environment:
+    GUEST_OTP_REQUEST_LIMIT     per mobile number   (default 5/3600)
+    GUEST_OTP_REQUEST_IP_LIMIT  per IP address      (default 20/3600)
+    GUEST_OTP_VERIFY_LIMIT      per mobile number   (default 10/900)
+    GUEST_OTP_VERIFY_IP_LIMIT   per IP address      (default 50/900)
+"""
+
+import os
+import secrets
+from datetime import datetime, timedelta
+from sqlalchemy import delete, or_, select
+from models import db
+from models.models import GuestOTP
+from utils import rate_limit
+
+OTP_TTL = 300
+DEFAULT_CHUNK_SIZE = 1000
+_DEFAULT_LIMITS = {
+    'request': '5/3600',
+    'request_ip': '20/3600',
+    'verify': '10/900',
+    'verify_ip': '50/900',
+}
+
+
+def _limit(name):
+    raw = os.getenv(f'GUEST_OTP_{name.upper()}_LIMIT') or _DEFAULT_LIMITS[name]
+    try:
+        count, seconds = raw.split('/', 1)
+        return int(count), float(seconds)
+    except ValueError:
+        count, seconds = _DEFAULT_LIMITS[name].split('/', 1)
+        return int(count), float(seconds)
+
+
+def allow(action, mobile, ip):
+    """Rate-limit one `action` ('request' or 'verify') for this mobile and IP.
+
+    Returns (allowed, retry_after_seconds).
+    """
+    checks = [(f'otp:{action}:m:{mobile}', _limit(action))]
+    if ip:
+        checks.append((f'otp:{action}:ip:{ip}', _limit(f'{action}_ip')))
+    for key, (count, seconds) in checks:
+        allowed, retry_after = rate_limit.hit(key, count, seconds)
+        if not allowed:
+            return False, retry_after
+    return True, 0
+
+
+def new_code():
+    return f'{secrets.randbelow(900000) + 100000}'
+
+
+def issue_otp(mobile):
+    """Store a fresh code for `mobile` and return it."""
+    code = new_code()
+    db.session.add(GuestOTP(mobile_number=mobile, code=code, used=False, created_at=datetime.utcnow()))
+    db.session.commit()
+    return code
+
+
+def verify_otp(mobile, code, now=None):
+    """Consume `code` for `mobile`. Returns True if it was valid and unused."""
+    now = now or datetime.utcnow()
+    otp_id = db.session.execute(
+        select(GuestOTP.id)
+        .where(GuestOTP.mobile_number == mobile, GuestOTP.code == code, GuestOTP.used == False,
+               GuestOTP.created_at >= now - timedelta(seconds=OTP_TTL))
+        .order_by(GuestOTP.created_at.desc())
+        .limit(1)
+    ).scalar()
+    if otp_id is None:
+        return False
+    options = {'synchronize_session': False}
+    # Only one caller gets the row; the mobile's other codes go with it
+    consumed = db.session.execute(delete(GuestOTP).where(GuestOTP.id == otp_id), execution_options=options).rowcount
+    if consumed:
+        db.session.execute(delete(GuestOTP).where(GuestOTP.mobile_number == mobile), execution_options=options)
+    db.session.commit()
+    return bool(consumed)
+
+
+def latest_otp(mobile):
+    """Newest code stored for `mobile`, or None."""
+    return (GuestOTP.query.filter_by(mobile_number=mobile)
+            .order_by(GuestOTP.created_at.desc()).first())
+
+
+def purge_otps(now=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Delete used and expired codes chunk by chunk. Returns the count."""
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=OTP_TTL)
+    purged = 0
+    while True:
+        ids = db.session.execute(
+            select(GuestOTP.id)
+            .where(or_(GuestOTP.created_at < cutoff, GuestOTP.used == True))
+            .limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return purged
+        purged += db.session.execute(delete(GuestOTP).where(GuestOTP.id.in_(ids)),
+                                     execution_options={'synchronize_session': False}).rowcount
+        db.session.commit()
+        if len(ids) < chunk_size:
+            return purged
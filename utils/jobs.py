@@ -0,0 +1,76 @@
+"""
+Background Jobs - run long admin tasks on a small thread pool
+Progress and results are stored in the `background_jobs` table so any worker
+process can report on them. Configure the pool size with JOB_WORKERS (default 2).
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from models import db
+from models.models import BackgroundJob
+
+_executor = ThreadPoolExecutor(max_workers=int(os.getenv('JOB_WORKERS', '2')), thread_name_prefix='campus-job')
+
+
+class JobProgress:
+    """Handle passed to job functions for reporting progress."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def update(self, **fields):
+        """Persist progress fields (total, processed, succeeded, skipped, message, result_path)."""
+        BackgroundJob.query.filter_by(job_id=self.job_id).update(fields, synchronize_session=False)
+        db.session.commit()
+
+
+def job_storage_dir(*parts):
+    """Private directory for job inputs/outputs (outside the public static folder)."""
+    path = os.path.join(current_app.instance_path, 'jobs', *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def submit_job(kind, func, *args, created_by=None, **kwargs):
+    """Record a job and run `func(progress, *args, **kwargs)` in the background.
+
+    The function's return value (a short string) is stored as the job message.
+    """
+    job = BackgroundJob(kind=kind, status='queued', created_by=created_by)
+    db.session.add(job)
+    db.session.commit()
+    app = current_app._get_current_object()
+    _executor.submit(_run_job, app, job.job_id, func, args, kwargs)
+    return job
+
+
+def run_job_inline(kind, func, *args, created_by=None, **kwargs):
+    """Record a job and run it synchronously (for CLI tools)."""
+    job = BackgroundJob(kind=kind, status='queued', created_by=created_by)
+    db.session.add(job)
+    db.session.commit()
+    _execute(job.job_id, func, args, kwargs)
+    return db.session.get(BackgroundJob, job.job_id)
+
+
+def _run_job(app, job_id, func, args, kwargs):
+    with app.app_context():
+        try:
+            _execute(job_id, func, args, kwargs)
+        finally:
+            db.session.remove()
+
+
+def _execute(job_id, func, args, kwargs):
+    progress = JobProgress(job_id)
+    progress.update(status='running', started_at=datetime.utcnow())
+    try:
+        message = func(progress, *args, **kwargs)
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.exception('Background job %s failed', job_id)
+        progress.update(status='failed', message=str(exc)[:1000], finished_at=datetime.utcnow())
+        return
+    progress.update(status='completed', message=message, finished_at=datetime.utcnow())
@@ -0,0 +1,169 @@
+"""
+Event Notifications - reminder and announcement fan-out through the email outbox
+
+Registrants are read in keyset-paginated chunks of plain column tuples and
+written to the outbox with one bulk INSERT per chunk, so memory stays bounded
+no matter how many people registered. Every message carries an idempotency
+key; keys already present in the outbox are skipped, which makes re-runs safe.
+"""
+
+import hashlib
+import time
+from datetime import date, timedelta
+from string import Template
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.models import Event, Registration, User, EmailOutbox
+
+DEFAULT_CHUNK_SIZE = 500
+
+REMINDER_SUBJECT = Template('Reminder: $event_title is $when')
+REMINDER_BODY = Template(
+    "Hello $name,\n\n"
+    "This is a reminder that you are registered for \"$event_title\".\n\n"
+    "Date: $event_date\n"
+    "Time: $start_time - $end_time\n"
+    "Where: $location\n\n"
+    "Please bring the QR code from My Registrations for attendance.\n"
+)
+
+
+def _when(event_date, today):
+    days = (event_date - today).days
+    if days == 0:
+        return 'today'
+    if days == 1:
+        return 'tomorrow'
+    return f'in {days} days'
+
+
+def _event_context(event, today):
+    if (event.mode or '').lower() == 'online':
+        location = event.meeting_url or 'Online'
+    else:
+        location = event.venue.venue_name if event.venue else 'TBA'
+    return {
+        'event_title': event.title,
+        'event_date': event.date.strftime('%B %d, %Y'),
+        'start_time': event.start_time.strftime('%H:%M'),
+        'end_time': event.end_time.strftime('%H:%M'),
+        'location': location,
+        'when': _when(event.date, today),
+    }
+
+
+def iter_registrant_chunks(event_id, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of (registration_id, user_id, full_name, email) for an event's registrants."""
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Registration.registration_id, User.user_id, User.full_name, User.email)
+            .join(User, User.user_id == Registration.student_id)
+            .where(
+                Registration.event_id == event_id,
+                Registration.registration_id > last_id,
+                User.email.isnot(None)
+            )
+            .order_by(Registration.registration_id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+def _insert_new(rows):
+    """Bulk insert outbox rows whose idempotency key is not stored yet. Returns the number inserted."""
+    keys = [row['idempotency_key'] for row in rows]
+    existing = set(db.session.scalars(
+        select(EmailOutbox.idempotency_key).where(EmailOutbox.idempotency_key.in_(keys))
+    ))
+    fresh = [row for row in rows if row['idempotency_key'] not in existing]
+    if not fresh:
+        return 0
+    try:
+        db.session.execute(insert(EmailOutbox), fresh)
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent run inserted some of the same keys; fall back to one row at a time
+        db.session.rollback()
+        inserted = 0
+        for row in fresh:
+            try:
+                db.session.execute(insert(EmailOutbox), [row])
+                db.session.commit()
+                inserted += 1
+            except IntegrityError:
+                db.session.rollback()
+        return inserted
+    return len(fresh)
+
+
+def fan_out(event, subject_template, body_template, key_prefix, context=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Queue one rendered message per registrant of `event`.
+
+    `subject_template`/`body_template` are string.Template objects; `$name` and
+    every key of `context` are available. Returns a stats dict.
+    """
+    context = dict(context or {})
+    stats = {'recipients': 0, 'queued': 0, 'skipped': 0}
+    for chunk in iter_registrant_chunks(event.event_id, chunk_size):
+        rows = []
+        for _, user_id, full_name, email in chunk:
+            values = dict(context, name=full_name)
+            rows.append({
+                'to_email': email,
+                'subject': subject_template.safe_substitute(values)[:255],
+                'body': body_template.safe_substitute(values),
+                'idempotency_key': f'{key_prefix}:{user_id}',
+            })
+        queued = _insert_new(rows)
+        stats['recipients'] += len(rows)
+        stats['queued'] += queued
+        stats['skipped'] += len(rows) - queued
+        # Drop loaded state between chunks so the identity map does not grow
+        db.session.expunge_all()
+    return stats
+
+
+def send_event_reminders(days_ahead=2, today=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Queue reminders for every approved event happening within `days_ahead` days."""
+    today = today or date.today()
+    started = time.perf_counter()
+    event_ids = [row[0] for row in db.session.execute(
+        select(Event.event_id).where(
+            Event.status == 'approved',
+            Event.date >= today,
+            Event.date <= today + timedelta(days=days_ahead)
+        ).order_by(Event.date, Event.start_time)
+    )]
+
+    totals = {'events': 0, 'recipients': 0, 'queued': 0, 'skipped': 0}
+    for event_id in event_ids:
+        event = Event.query.get(event_id)
+        if not event:
+            continue
+        context = _event_context(event, today)
+        # Keyed on the event date so a rescheduled event gets a fresh reminder
+        key_prefix = f'reminder:{event.event_id}:{event.date.isoformat()}'
+        stats = fan_out(event, REMINDER_SUBJECT, REMINDER_BODY, key_prefix, context, chunk_size)
+        totals['events'] += 1
+        for k in ('recipients', 'queued', 'skipped'):
+            totals[k] += stats[k]
+
+    totals['elapsed'] = time.perf_counter() - started
+    return totals
+
+
+def send_event_announcement(event, subject, message, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Queue an organizer announcement to all registrants of `event`.
+
+    `message` may use $name, $event_title, $event_date, $start_time, $end_time
+    and $location placeholders. Re-submitting the same text is a no-op.
+    """
+    context = _event_context(event, date.today())
+    digest = hashlib.sha1(f'{subject}\n{message}'.encode('utf-8')).hexdigest()[:16]
+    key_prefix = f'announce:{event.event_id}:{digest}'
+    return fan_out(event, Template(subject), Template(message), key_prefix, context, chunk_size)
@@ -0,0 +1,126 @@
+"""
+Password Hashing - runs slow password hashes on a bounded process pool
+
+Hashing and verification are CPU-bound, so they are handed to worker
+processes instead of running on the request thread. At most
+PASSWORD_HASH_QUEUE hashes may be waiting at once; beyond that
+`PasswordServiceBusy` is raised so requests shed load instead of queueing
+until they time out: login shows its own form again, every other caller
+gets the app-wide 503 handler with Retry-After.
+
+Settings (environment):
+- PASSWORD_HASH_METHOD   werkzeug method for new hashes, e.g. "scrypt" or
+                         "pbkdf2:sha256:600000" (default: werkzeug default)
+- PASSWORD_HASH_WORKERS  pool size (default: CPU count, 0 = hash inline)
+- PASSWORD_HASH_QUEUE    max in-flight hashes (default: 4 per worker)
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from werkzeug.security import generate_password_hash, check_password_hash
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = None
+
+# Stored for accounts that never log in with a password (guests sign in by OTP);
+# no hash matches it, so setting it needs no slow hash
+UNUSABLE_PASSWORD = '!'
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when the hashing queue is full."""
+
+
+def hash_method():
+    return os.getenv('PASSWORD_HASH_METHOD') or None
+
+
+def worker_count():
+    value = os.getenv('PASSWORD_HASH_WORKERS')
+    return int(value) if value not in (None, '') else (os.cpu_count() or 1)
+
+
+def _hash(password, method):
+    if method:
+        return generate_password_hash(password, method=method)
+    return generate_password_hash(password)
+
+
+def _get_pool():
+    global _pool, _slots
+    with _pool_lock:
+        if _slots is None:
+            # Created once: a pool replaced after a crash keeps the same slots,
+            # so threads still holding one release it where they took it
+            queue_size = int(os.getenv('PASSWORD_HASH_QUEUE') or worker_count() * 4)
+            _slots = threading.BoundedSemaphore(max(queue_size, 1))
+        if _pool is None:
+            workers = worker_count()
+            # spawn: forking a threaded web server process is unsafe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _run(func, *args):
+    """Run one hash job in the pool, or raise PasswordServiceBusy if the queue is full."""
+    if worker_count() <= 0:
+        return func(*args)
+    pool = _get_pool()
+    if not _slots.acquire(blocking=False):
+        raise PasswordServiceBusy('Too many password hashes in progress.')
+    try:
+        return pool.submit(func, *args).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed): start a fresh pool next time
+        _reset_pool()
+        return func(*args)
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    """Hash a password with the configured method."""
+    return _run(_hash, password, hash_method())
+
+
+def verify_password(pwhash, password):
+    """Check a password against a stored hash."""
+    if not pwhash or pwhash == UNUSABLE_PASSWORD or password is None:
+        return False
+    return _run(check_password_hash, pwhash, password)
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    # Hash a throwaway value once to learn the full "method:params" prefix
+    # werkzeug writes for the configured method (defaults included)
+    return _hash('x', method).split('$', 1)[0]
+
+
+def needs_rehash(pwhash):
+    """True when `pwhash` was made with a different method or cost than configured."""
+    if not pwhash or '$' not in pwhash:
+        return True
+    return pwhash.split('$', 1)[0] != _method_prefix(hash_method())
+
+
+def hash_passwords(passwords):
+    """Hash many passwords in parallel, preserving order (bulk imports)."""
+    passwords = list(passwords)
+    method = hash_method()
+    if len(passwords) < 4 or worker_count() <= 0:
+        return [_hash(p, method) for p in passwords]
+    return list(_get_pool().map(_hash, passwords, [method] * len(passwords), chunksize=8))
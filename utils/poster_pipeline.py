@@ -0,0 +1,142 @@
+"""
+Poster Pipeline - responsive variants for uploaded event posters
+
+After an organizer uploads a poster, a background job re-saves the original
+without EXIF/GPS metadata and writes bounded-width variants (AVIF when this
+Pillow build supports it, WebP, and JPEG as the universal fallback) to
+static/uploads/events/variants/. Their paths are recorded as JSON in
+`Event.poster_variants`; templates use the `poster` macro in _poster.html,
+which emits <picture>/srcset and falls back to the original until the job
+has run. tools/backfill_posters.py processes posters uploaded earlier.
+"""
+
+import json
+import os
+from flask import current_app, url_for
+from PIL import Image, ImageOps, features
+from models import db
+from models.models import Event
+
+WIDTHS = (320, 640, 1280)
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg'}
+_SAVE_OPTIONS = {
+    'avif': {'quality': 55},
+    'webp': {'quality': 78, 'method': 6},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+_EXTENSIONS = {'avif': '.avif', 'webp': '.webp', 'jpeg': '.jpg'}
+
+
+def formats():
+    """Variant formats in browser preference order (AVIF only if Pillow can encode it)."""
+    return tuple(f for f in ('avif', 'webp', 'jpeg') if f != 'avif' or features.check('avif'))
+
+
+def _flatten(image):
+    # JPEG has no alpha: composite transparent posters onto white
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _strip_original(path, image):
+    """Overwrite the uploaded file with the same pixels and no metadata."""
+    fmt = (image.format or 'JPEG').upper()
+    clean = image if fmt in ('PNG', 'WEBP') else _flatten(image)
+    options = {'quality': 90} if fmt in ('JPEG', 'WEBP') else {}
+    clean.save(path, format=fmt, **options)
+
+
+def process_poster(relative_path):
+    """Create variants for static/<relative_path>; returns the variants record."""
+    static_root = current_app.static_folder
+    source = os.path.join(static_root, relative_path)
+    stem = os.path.splitext(os.path.basename(relative_path))[0]
+    variant_dir = os.path.join(os.path.dirname(source), 'variants')
+    os.makedirs(variant_dir, exist_ok=True)
+
+    with Image.open(source) as opened:
+        opened.load()
+        fmt = opened.format
+        # Apply the EXIF orientation before the metadata is dropped
+        image = ImageOps.exif_transpose(opened)
+        image.format = fmt
+    _strip_original(source, image)
+
+    # Every configured width below the original, plus the original capped at the largest
+    widths = sorted({*(w for w in WIDTHS if w < image.width), min(image.width, WIDTHS[-1])})
+    record = {'width': image.width, 'height': image.height, 'formats': {}}
+    for fmt in formats():
+        base = _flatten(image) if fmt == 'jpeg' else image.convert('RGBA' if image.has_transparency_data else 'RGB')
+        paths = {}
+        for width in widths:
+            variant = base.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+            name = f'{stem}-{width}{_EXTENSIONS[fmt]}'
+            variant.save(os.path.join(variant_dir, name), format=fmt.upper(), **_SAVE_OPTIONS[fmt])
+            paths[str(width)] = os.path.relpath(os.path.join(variant_dir, name), static_root).replace(os.sep, '/')
+        record['formats'][fmt] = paths
+    return record
+
+
+def process_event_poster(progress, event_id):
+    """Background job: build and record the variants for one event's poster."""
+    event = db.session.get(Event, event_id)
+    if not event or not event.poster_url:
+        return 'No poster to process.'
+    progress.update(total=1)
+    record = process_poster(event.poster_url)
+    event.poster_variants = json.dumps(record)
+    db.session.commit()
+    progress.update(processed=1, succeeded=1)
+    return f"Poster variants created: {', '.join(record['formats'])}."
+
+
+def backfill_posters(progress, force=False):
+    """Job: process every poster that has no variants yet (all of them with force)."""
+    query = db.session.query(Event.event_id, Event.poster_url).filter(Event.poster_url.isnot(None), Event.poster_url != '')
+    if not force:
+        query = query.filter(Event.poster_variants.is_(None))
+    pending = query.order_by(Event.event_id).all()
+    progress.update(total=len(pending))
+    done = skipped = 0
+    for index, (event_id, poster_url) in enumerate(pending, 1):
+        try:
+            record = process_poster(poster_url)
+        except (OSError, ValueError) as exc:
+            # Missing or unreadable upload: leave the event on its original poster
+            current_app.logger.warning('Poster for event %s skipped: %s', event_id, exc)
+            skipped += 1
+        else:
+            Event.query.filter_by(event_id=event_id).update({'poster_variants': json.dumps(record)}, synchronize_session=False)
+            db.session.commit()
+            done += 1
+        progress.update(processed=index, succeeded=done, skipped=skipped)
+    return f'Posters processed: {done}, skipped: {skipped}.'
+
+
+def poster_variants(event):
+    """Template data for the poster macro, or None until variants exist."""
+    try:
+        record = json.loads(event.poster_variants or '')
+    except ValueError:
+        return None
+
+    def srcset(paths):
+        return ', '.join(f"{url_for('static', filename=path)} {width}w"
+                         for width, path in sorted(paths.items(), key=lambda item: int(item[0])))
+
+    available = record.get('formats', {})
+    fallback = available.get('jpeg')
+    if not fallback:
+        return None
+    largest = max(fallback, key=int)
+    return {
+        'sources': [(MIME_TYPES[fmt], srcset(paths)) for fmt, paths in available.items() if fmt != 'jpeg'],
+        'src': url_for('static', filename=fallback[largest]),
+        'srcset': srcset(fallback),
+        'width': record.get('width'),
+        'height': record.get('height'),
+    }
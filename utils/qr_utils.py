@@ -2,7 +2,7 @@
 Utility Functions - QR Code Generation and Validation
 """
 
-import uuid
+import secrets
 import qrcode
 import io
 import base64
@@ -24,7 +24,7 @@ def _build_qr_text(qr_data: str) -> str:
     return qr_data
 
 
-def _generate_qr_image(qr_text: str) -> str:
+def _generate_qr_png(qr_text: str) -> bytes:
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -37,20 +37,21 @@ def _generate_qr_image(qr_text: str) -> str:
     img = qr.make_image(fill_color="black", back_color="white")
     buffered = io.BytesIO()
     img.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode()
+    return buffered.getvalue()
+
 
+def _generate_qr_image(qr_text: str) -> str:
+    return base64.b64encode(_generate_qr_png(qr_text)).decode()
 
-def generate_qr_code(registration_id, event_id, student_id):
+
+def new_qr_token(event_id, student_id):
     """
-    Generate unique QR code for event registration
-    Returns: unique QR string and base64 image data
+    Unique QR string for a registration that has not been inserted yet.
+    Older tokens carry the registration id after REG-; new ones carry a
+    random 'Q...' nonce instead, so the row is found by its qr_code.
+    No image is rendered: the PNG is drawn when the QR page asks for it.
     """
-    # Create unique QR code data with UUID
-    qr_data = f"REG-{registration_id}-EVT-{event_id}-STU-{student_id}-{uuid.uuid4().hex[:8]}"
-    qr_text = _build_qr_text(qr_data)
-    img_str = _generate_qr_image(qr_text)
-    
-    return qr_data, img_str
+    return f"REG-Q{secrets.token_hex(6)}-EVT-{event_id}-STU-{student_id}-{secrets.token_hex(4)}"
 
 
 def generate_qr_image(qr_data: str) -> str:
@@ -59,10 +60,21 @@ def generate_qr_image(qr_data: str) -> str:
     return _generate_qr_image(qr_text)
 
 
+def generate_qr_png(qr_data: str) -> bytes:
+    """Generate PNG bytes of the QR image for stored QR data."""
+    return _generate_qr_png(_build_qr_text(qr_data))
+
+
+def qr_version(qr_data: str) -> tuple:
+    """Everything the QR image depends on (for ETags)."""
+    return (qr_data, _build_qr_text(qr_data))
+
+
 def validate_qr_code(qr_data):
     """
     Validate and extract information from QR code
     Returns: dict with registration_id, event_id, student_id or None if invalid
+    (registration_id is None for tokens from new_qr_token)
     """
     try:
         if qr_data and isinstance(qr_data, str) and qr_data.startswith(('http://', 'https://')):
@@ -74,7 +86,7 @@ def validate_qr_code(qr_data):
         parts = qr_data.split('-')
         if len(parts) >= 7 and parts[0] == 'REG' and parts[2] == 'EVT' and parts[4] == 'STU':
             return {
-                'registration_id': int(parts[1]),
+                'registration_id': int(parts[1]) if parts[1].isdigit() else None,
                 'event_id': int(parts[3]),
                 'student_id': int(parts[5])
             }
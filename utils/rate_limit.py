@@ -0,0 +1,135 @@
+"""
+Rate Limit - sliding-window counters keyed by an arbitrary string
+
+`hit(key, limit, window)` records one attempt for `key` and says whether it
+is within `limit` attempts over the last `window` seconds. Every attempt is
+timestamped, so the window slides with each request instead of resetting
+on a fixed boundary; refused attempts are not recorded, so a client that
+keeps hammering is let back in once its earlier attempts age out.
+
+Backend (RATE_LIMIT_BACKEND):
+    memory  in-process counters (default; each worker process counts alone)
+    redis   a sorted set per key on any Redis-compatible server at
+            RATE_LIMIT_URL, shared by every worker
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from itertools import islice
+
+
+class MemoryBackend:
+    """Per-process sliding windows: a deque of timestamps per key, with the key's window."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._hits = {}   # key -> (window, deque); least recently hit first
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._hits.pop(key, None)
+            if entry is None and len(self._hits) >= self.max_keys:
+                self._prune(now)
+            hits = entry[1] if entry else deque()
+            # Re-inserted on every hit, so the dict stays in recency order
+            self._hits[key] = (window, hits)
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) >= limit:
+                return False, hits[0] + window - now
+            hits.append(now)
+            return True, 0
+
+    def _prune(self, now):
+        # Drop keys whose newest attempt is outside that key's own window
+        for key in [k for k, (window, hits) in self._hits.items() if not hits or hits[-1] <= now - window]:
+            del self._hits[key]
+        # Still full of live keys: evict the least recently hit, with some headroom
+        # so the scan above does not run again for every new key
+        excess = len(self._hits) - int(self.max_keys * 0.9)
+        for key in list(islice(self._hits, max(excess, 0))):
+            del self._hits[key]
+
+    def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                self._hits.clear()
+            else:
+                self._hits.pop(key, None)
+
+
+class RedisBackend:
+    """Redis (or any server speaking its protocol); needs the `redis` package."""
+
+    def __init__(self, url, prefix='campus:rl:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RATE_LIMIT_BACKEND=redis needs the redis package (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def hit(self, key, limit, window, now=None):
+        now = time.time() if now is None else now
+        name = self.prefix + key
+        member = f'{now:.6f}:{uuid.uuid4().hex[:8]}'
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(name, 0, now - window)
+        pipe.zadd(name, {member: now})
+        pipe.zcard(name)
+        pipe.expire(name, int(window) + 1)
+        _, _, count, _ = pipe.execute()
+        if count <= limit:
+            return True, 0
+        # Over the limit: take this attempt back out and report when the oldest one expires
+        self.client.zrem(name, member)
+        oldest = self.client.zrange(name, 0, 0, withscores=True)
+        return False, (oldest[0][1] + window - now) if oldest else window
+
+    def reset(self, key=None):
+        if key is not None:
+            self.client.delete(self.prefix + key)
+            return
+        for name in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(name)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _create_backend():
+    if os.getenv('RATE_LIMIT_BACKEND', 'memory').lower() == 'redis':
+        return RedisBackend(os.getenv('RATE_LIMIT_URL', 'redis://localhost:6379/0'))
+    return MemoryBackend()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend()
+    return _backend
+
+
+def configure(backend):
+    """Swap the backend (tests and benchmarks)."""
+    global _backend
+    with _backend_lock:
+        _backend = backend
+
+
+def hit(key, limit, window):
+    """Record an attempt for `key`. Returns (allowed, retry_after_seconds)."""
+    return get_backend().hit(key, limit, window)
+
+
+def reset(key=None):
+    """Forget the attempts for `key`, or for every key."""
+    get_backend().reset(key)
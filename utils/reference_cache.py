@@ -0,0 +1,87 @@
+"""
+Reference Data Cache - process-local cache for rarely changing lookup lists
+
+Departments, venues, roles and organizers are read on almost every page.
+Each list is loaded once into immutable tuples and kept for
+REFERENCE_CACHE_TTL seconds (default 300, 0 disables caching). Routes that
+change this data call `invalidate(...)`, so the current process sees the
+write at once; other worker processes pick it up within the TTL.
+"""
+
+import os
+import threading
+import time
+from collections import namedtuple
+from functools import wraps
+from models import db
+from models.models import Department, Venue, Role, User
+
+DepartmentRef = namedtuple('DepartmentRef', 'dept_id dept_name')
+VenueRef = namedtuple('VenueRef', 'venue_id venue_name dept_id capacity')
+RoleRef = namedtuple('RoleRef', 'role_id role_name')
+OrganizerRef = namedtuple('OrganizerRef', 'user_id full_name email dept_id')
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def _ttl():
+    return float(os.getenv('REFERENCE_CACHE_TTL', '300'))
+
+
+def _cached(name):
+    def decorator(loader):
+        @wraps(loader)
+        def get():
+            now = time.monotonic()
+            entry = _cache.get(name)
+            if entry and entry[0] > now:
+                return entry[1]
+            value = loader()
+            with _lock:
+                _cache[name] = (now + _ttl(), value)
+            return value
+        return get
+    return decorator
+
+
+def invalidate(*names):
+    """Drop the named lists (all of them when called without names)."""
+    with _lock:
+        if names:
+            for name in names:
+                _cache.pop(name, None)
+        else:
+            _cache.clear()
+
+
+@_cached('departments')
+def departments():
+    rows = db.session.query(Department.dept_id, Department.dept_name).order_by(Department.dept_name.asc())
+    return tuple(DepartmentRef(*row) for row in rows)
+
+
+@_cached('venues')
+def venues():
+    rows = db.session.query(Venue.venue_id, Venue.venue_name, Venue.dept_id, Venue.capacity).order_by(Venue.venue_id)
+    return tuple(VenueRef(*row) for row in rows)
+
+
+@_cached('roles')
+def roles():
+    rows = db.session.query(Role.role_id, Role.role_name).order_by(Role.role_name.asc())
+    return tuple(RoleRef(*row) for row in rows)
+
+
+@_cached('organizers')
+def organizers():
+    organizer_role_ids = [r.role_id for r in roles() if (r.role_name or '').strip().lower() in ('event organizer', 'organizer')]
+    if not organizer_role_ids:
+        return ()
+    rows = (
+        db.session.query(User.user_id, User.full_name, User.email, User.dept_id)
+        .filter(User.role_id.in_(organizer_role_ids))
+        .order_by(User.full_name.asc())
+    )
+    return tuple(OrganizerRef(*row) for row in rows)
+
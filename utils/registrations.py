@@ -0,0 +1,274 @@
+"""
+Registrations - single-transaction event sign-up, venue capacity and waitlist
+
+A registration is written once, with its QR token already set: the token is
+derived from the event and student plus a random nonce
+(utils.qr_utils.new_qr_token) instead of the registration id, so there is
+no placeholder insert, no second commit and no shared 'temp' value for the
+unique qr_code index to trip over. No QR image is rendered while
+registering; the QR page draws it on demand.
+
+Event.registered_count counts the registrations holding a seat. A seat is
+taken with one conditional UPDATE (registered_count + 1 WHERE
+registered_count < capacity) in the transaction that writes the
+registration, as team seats are in utils.team_membership; the row lock it
+holds until commit serializes everyone registering at once. The unique
+(event_id, student_id) index turns a student's second concurrent request into
+an IntegrityError, whose rollback gives the seat back. The capacity is the
+venue's; events without a venue are not limited. When an individual
+event is full the student joins its waitlist, served in entry order. A
+cancelled registration hands its seat to the head of the waitlist in the
+same transaction, so a newcomer can never take it ahead of the queue; only
+an approved event under its capacity seats anyone from the waitlist.
+Every path locks the event row before the waitlist.
+"""
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.models import Event, Registration, Team, User, Venue, WaitlistEntry
+from utils.email_utils import queue_email
+from utils.qr_utils import new_qr_token
+
+REGISTERED = 'registered'
+WAITLISTED = 'waitlisted'
+ALREADY_REGISTERED = 'already_registered'
+
+# Core table rather than the model: an ORM bulk UPDATE of events would flush
+# the whole response cache, and the registration row already tags the event
+_events = Event.__table__
+
+
+def seat_limit(event):
+    """Seats at `event`, or None when it has no venue to fill."""
+    return event.venue.capacity if event.venue is not None else None
+
+
+def _seat_limit_for(event_id):
+    return db.session.execute(
+        select(Venue.capacity).join(Event, Event.venue_id == Venue.venue_id).where(Event.event_id == event_id)
+    ).scalar()
+
+
+def _is_approved(event_id):
+    return db.session.execute(select(Event.status).where(Event.event_id == event_id)).scalar() == 'approved'
+
+
+def claim_event_seat(event_id, limit):
+    """Take one seat at the event inside the current transaction. Returns True if one was free."""
+    statement = update(_events).where(_events.c.event_id == event_id)
+    if limit is not None:
+        statement = statement.where(_events.c.registered_count < limit)
+    return db.session.execute(statement.values(registered_count=_events.c.registered_count + 1)).rowcount == 1
+
+
+def _release_event_seat(event_id):
+    db.session.execute(
+        update(_events)
+        .where(_events.c.event_id == event_id, _events.c.registered_count > 0)
+        .values(registered_count=_events.c.registered_count - 1)
+    )
+
+
+def add_registration(event_id, student_id, team_id=None):
+    """Stage a registration in the current transaction; the caller commits."""
+    registration = Registration(event_id=event_id, student_id=student_id, team_id=team_id,
+                                qr_code=new_qr_token(event_id, student_id))
+    db.session.add(registration)
+    return registration
+
+
+def register_student(event_id, student_id, limit=None):
+    """Register a student for an individual event, or waitlist them if it is full.
+
+    Returns (REGISTERED, registration), (WAITLISTED, position in the queue) or
+    (ALREADY_REGISTERED, None).
+    """
+    try:
+        if claim_event_seat(event_id, limit):
+            registration = add_registration(event_id, student_id)
+            db.session.commit()
+            return REGISTERED, registration
+        db.session.add(WaitlistEntry(event_id=event_id, student_id=student_id))
+        db.session.commit()
+    except IntegrityError:
+        # Already registered or waitlisted (a double submit); anything else is a real error
+        db.session.rollback()
+        if is_registered(event_id, student_id):
+            return ALREADY_REGISTERED, None
+        if waitlist_position(event_id, student_id) is None:
+            raise
+    except Exception:
+        db.session.rollback()
+        raise
+    return WAITLISTED, waitlist_position(event_id, student_id)
+
+
+def create_team(event_id, leader_id, team_name, limit=None):
+    """Create a team and register its leader in one commit.
+
+    Returns (REGISTERED, team), (None, None) if the event is full or
+    (ALREADY_REGISTERED, None) if the leader registered in the meantime.
+    """
+    try:
+        if not claim_event_seat(event_id, limit):
+            db.session.rollback()
+            return None, None
+        team = Team(event_id=event_id, team_name=team_name, leader_id=leader_id,
+                    member_count=1)  # the leader's registration
+        db.session.add(team)
+        db.session.flush()
+        add_registration(event_id, leader_id, team.team_id)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        if is_registered(event_id, leader_id):
+            return ALREADY_REGISTERED, None
+        raise
+    except Exception:
+        db.session.rollback()
+        raise
+    return REGISTERED, team
+
+
+def is_registered(event_id, student_id):
+    """True if the student holds a registration for the event."""
+    return db.session.execute(
+        select(Registration.registration_id).where(Registration.event_id == event_id,
+                                                   Registration.student_id == student_id).limit(1)
+    ).first() is not None
+
+
+def waitlist_position(event_id, student_id):
+    """1-based place of the student in the event's waitlist, or None if not on it."""
+    entry_id = db.session.execute(
+        select(WaitlistEntry.entry_id).where(WaitlistEntry.event_id == event_id,
+                                             WaitlistEntry.student_id == student_id)
+    ).scalar()
+    if entry_id is None:
+        return None
+    return db.session.execute(
+        select(func.count()).where(WaitlistEntry.event_id == event_id, WaitlistEntry.entry_id <= entry_id)
+    ).scalar()
+
+
+def waitlisted_events(student_id):
+    """(event, position) for every waitlist the student is on, soonest event first."""
+    entries = (
+        db.session.query(WaitlistEntry, Event)
+        .join(Event, Event.event_id == WaitlistEntry.event_id)
+        .filter(WaitlistEntry.student_id == student_id)
+        .order_by(Event.date, Event.start_time)
+        .all()
+    )
+    return [(event, waitlist_position(event.event_id, student_id)) for _, event in entries]
+
+
+def leave_waitlist(event_id, student_id):
+    """Drop the student from the event's waitlist. Returns True if they were on it."""
+    left = db.session.execute(
+        delete(WaitlistEntry).where(WaitlistEntry.event_id == event_id, WaitlistEntry.student_id == student_id),
+        execution_options={'synchronize_session': False},
+    ).rowcount == 1
+    db.session.commit()
+    return left
+
+
+def _pop_waitlist(event_id):
+    """Remove the head of the event's waitlist and return its student id (None if empty)."""
+    head = db.session.execute(
+        select(WaitlistEntry.entry_id, WaitlistEntry.student_id)
+        .where(WaitlistEntry.event_id == event_id)
+        .order_by(WaitlistEntry.entry_id)
+        .limit(1)
+        .with_for_update()
+    ).first()
+    if head is None:
+        return None
+    db.session.execute(delete(WaitlistEntry).where(WaitlistEntry.entry_id == head.entry_id),
+                       execution_options={'synchronize_session': False})
+    return head.student_id
+
+
+def _seat_promoted(event_id, student_id):
+    """Register a promoted student and queue their email, in the current transaction."""
+    registration = add_registration(event_id, student_id)
+    row = db.session.execute(
+        select(User.email, User.full_name, Event.title)
+        .join(Event, Event.event_id == event_id)
+        .where(User.user_id == student_id)
+    ).first()
+    if row and row.email:
+        queue_email(row.email, f'You are registered for {row.title}',
+                    f"Hello {row.full_name},\n\n"
+                    f"A seat opened up and you have been moved from the waitlist to the "
+                    f"registrations for \"{row.title}\".\n\n"
+                    f"Your QR ticket is under My Registrations.\n",
+                    idempotency_key=f'waitlist-promoted:{registration.qr_code}')
+    return registration
+
+
+def cancel_registration(registration):
+    """Cancel an individual registration and give its seat to the head of the waitlist.
+
+    Returns (cancelled, promoted student id or None).
+    """
+    event_id, registration_id = registration.event_id, registration.registration_id
+    try:
+        # Seat first: it locks the event row before the waitlist is read
+        _release_event_seat(event_id)
+        deleted = db.session.execute(
+            delete(Registration).where(Registration.registration_id == registration_id),
+            execution_options={'synchronize_session': False},
+        ).rowcount
+        if not deleted:
+            db.session.rollback()
+            return False, None
+        promoted = None
+        # Only an approved event seats the waitlist, and only below its venue's capacity
+        # (after a move to a smaller venue the freed seat may not exist any more)
+        if _is_approved(event_id) and claim_event_seat(event_id, _seat_limit_for(event_id)):
+            promoted = _pop_waitlist(event_id)
+            if promoted is None:
+                _release_event_seat(event_id)
+            else:
+                _seat_promoted(event_id, promoted)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.expire_all()
+    return True, promoted
+
+
+def promote_waitlist(event_id):
+    """Move waitlisted students into any free seats (after a purge or a venue change). Returns their ids."""
+    if not _is_approved(event_id):
+        return []   # seated once the event is approved (routes.hod / routes.principal)
+    limit = _seat_limit_for(event_id)
+    promoted = []
+    while True:
+        try:
+            if not claim_event_seat(event_id, limit):
+                db.session.rollback()
+                break
+            student_id = _pop_waitlist(event_id)
+            if student_id is None:
+                db.session.rollback()
+                break
+            _seat_promoted(event_id, student_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        promoted.append(student_id)
+    return promoted
+
+
+def recount_seats(event_ids):
+    """Reset registered_count from the registrations table for `event_ids`."""
+    if not event_ids:
+        return
+    seats = (select(func.count(Registration.registration_id))
+             .where(Registration.event_id == _events.c.event_id).scalar_subquery())
+    db.session.execute(update(_events).where(_events.c.event_id.in_(event_ids)).values(registered_count=seats))
@@ -0,0 +1,322 @@
+"""
+Response Cache - whole-response caching for read-mostly pages
+
+Views decorated with `@cached_response(...)` are stored under a key built
+from the endpoint, its URL/query arguments and a scope (the user, their
+role, or nobody). Every entry records the version token of each tag it
+depends on ('events', 'event:12', ...); commits that touch Event,
+Registration, Feedback, Approval or Attendance rows replace those tokens,
+so stale entries are skipped on the next read without having to find
+them. Bulk UPDATE/DELETE statements on those models reset every tag.
+
+Backend (RESPONSE_CACHE_BACKEND):
+    lru         in-process LRU (default; invalidation is per process)
+    filesystem  pickled files under RESPONSE_CACHE_DIR (shared by workers)
+    redis       any Redis-compatible server at RESPONSE_CACHE_URL
+    none        caching disabled
+Entries live for RESPONSE_CACHE_TTL seconds (default 300), which also
+bounds staleness for data no tag covers (user names, venues).
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from functools import wraps
+from itertools import chain
+from flask import current_app, request, session, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models.models import Event, Registration, Feedback, Approval, Attendance
+from utils.auth_utils import current_role
+
+ALL = '*'   # carried by every entry; reset by bulk writes
+
+
+class LRUBackend:
+    """Bounded in-process store; least recently used entries go first."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl if ttl else None, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class FileSystemBackend:
+    """One pickle per key; writes are atomic renames, so workers can share it."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._file(key), 'rb') as fh:
+                expires, value = pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires is not None and expires < time.time():
+            return None
+        return value
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ttl=None):
+        fd, tmp = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump((time.time() + ttl if ttl else None, value), fh, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._file(key))
+
+    def clear(self):
+        for name in os.listdir(self.path):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+
+
+class RedisBackend:
+    """Redis (or any server speaking its protocol); needs the `redis` package."""
+
+    def __init__(self, url, prefix='campus:rc:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('RESPONSE_CACHE_BACKEND=redis needs the redis package (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return pickle.loads(raw) if raw is not None else None
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        return [pickle.loads(raw) if raw is not None else None
+                for raw in self.client.mget([self.prefix + key for key in keys])]
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=int(ttl) if ttl else None)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def ttl():
+    return float(os.getenv('RESPONSE_CACHE_TTL', '300'))
+
+
+def _create_backend():
+    kind = os.getenv('RESPONSE_CACHE_BACKEND', 'lru').lower()
+    if kind == 'none':
+        return None
+    if kind == 'filesystem':
+        return FileSystemBackend(os.getenv('RESPONSE_CACHE_DIR') or os.path.join(current_app.instance_path, 'response_cache'))
+    if kind == 'redis':
+        return RedisBackend(os.getenv('RESPONSE_CACHE_URL', 'redis://localhost:6379/0'))
+    return LRUBackend(int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512')))
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_backend() or False
+    return _backend or None
+
+
+def configure(backend):
+    """Swap the backend (None disables caching) and reset the metrics."""
+    global _backend
+    with _backend_lock:
+        _backend = backend if backend is not None else False
+    with _stats_lock:
+        _stats.clear()
+
+
+def _count(endpoint, outcome):
+    with _stats_lock:
+        _stats[(endpoint, outcome)] += 1
+
+
+def stats():
+    """Counters for this process: hit/miss/bypass per endpoint, totals and invalidations."""
+    with _stats_lock:
+        snapshot = dict(_stats)
+    per_endpoint = {}
+    totals = Counter()
+    for (endpoint, outcome), count in snapshot.items():
+        if endpoint is not None:
+            per_endpoint.setdefault(endpoint, Counter())[outcome] += count
+        totals[outcome] += count
+    lookups = totals['hit'] + totals['miss']
+    return {
+        'endpoints': {name: dict(counts) for name, counts in per_endpoint.items()},
+        'totals': dict(totals),
+        'hit_ratio': round(totals['hit'] / lookups, 3) if lookups else None,
+    }
+
+
+def _tag_tokens(backend, tags):
+    """Current token per tag, creating tokens for tags never seen before."""
+    tokens = dict(zip(tags, backend.get_many(['tag:' + tag for tag in tags])))
+    for tag, token in tokens.items():
+        if token is None:
+            tokens[tag] = uuid.uuid4().hex
+            backend.set('tag:' + tag, tokens[tag])
+    return tokens
+
+
+def invalidate(*tags):
+    """Make every entry depending on any of `tags` stale."""
+    backend = get_backend()
+    if backend is None:
+        return
+    for tag in tags:
+        backend.set('tag:' + tag, uuid.uuid4().hex)
+    _count(None, 'invalidations')
+
+
+def _scope_value(scope):
+    if scope == 'user':
+        return f"user:{session.get('user_id')}"
+    if scope == 'role':
+        return f'role:{current_role()}'
+    return 'public'
+
+
+def cached_response(tags=(), scope='user', timeout=None):
+    """Cache a GET view's 200 response.
+
+    `tags` is a tuple of tag names or a callable receiving the view kwargs
+    and returning one. `scope='user'` (the default) is right for any page
+    rendered with base.html, whose header shows the signed-in user; 'role'
+    and 'public' are for fragments and JSON that do not.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            backend = get_backend()
+            endpoint = request.endpoint
+            if backend is None or request.method != 'GET' or '_flashes' in session or ttl() <= 0:
+                _count(endpoint, 'bypass')
+                return view(*args, **kwargs)
+
+            entry_tags = (ALL,) + tuple(tags(**kwargs) if callable(tags) else tags)
+            key = 'page:' + '|'.join((
+                endpoint,
+                repr(sorted(kwargs.items())),
+                repr(sorted(request.args.items(multi=True))),
+                _scope_value(scope),
+            ))
+            tokens = _tag_tokens(backend, entry_tags)
+            entry = backend.get(key)
+            if entry is not None and entry['tags'] == tokens:
+                _count(endpoint, 'hit')
+                response = current_app.response_class(entry['body'], status=entry['status'], headers=entry['headers'])
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            _count(endpoint, 'miss')
+            response = current_app.make_response(view(*args, **kwargs))
+            # Only plain 200s, and never a response that touched the session or cookies
+            if (response.status_code == 200 and not response.direct_passthrough and not response.is_streamed
+                    and not session.modified and 'Set-Cookie' not in response.headers):
+                headers = [(k, v) for k, v in response.headers.items() if k.lower() != 'content-length']
+                backend.set(key, {'tags': tokens, 'status': response.status_code, 'headers': headers,
+                                  'body': response.get_data()}, timeout or ttl())
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+# --- invalidation: collect tags during flush, reset them after commit ---
+
+def _tags_for(obj):
+    if isinstance(obj, Event):
+        return ('events', f'event:{obj.event_id}')
+    if isinstance(obj, Registration):
+        return ('registrations', f'event:{obj.event_id}')
+    if isinstance(obj, Feedback):
+        return ('feedback', f'event:{obj.event_id}')
+    if isinstance(obj, Approval):
+        return ('approvals', f'event:{obj.event_id}')
+    if isinstance(obj, Attendance):
+        return ('attendance',)
+    return ()
+
+
+_TRACKED = (Event, Registration, Feedback, Approval, Attendance)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_tags(session, flush_context):
+    pending = session.info.setdefault('cache_tags', set())
+    for obj in chain(session.new, session.dirty, session.deleted):
+        pending.update(_tags_for(obj))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_tags(orm_execute_state):
+    # Query.delete()/update() and bulk inserts skip the flush; their rows are unknown
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and issubclass(mapper.class_, _TRACKED):
+        orm_execute_state.session.info.setdefault('cache_tags', set()).add(ALL)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_tags(session):
+    pending = session.info.pop('cache_tags', None)
+    if pending and has_app_context():
+        invalidate(*sorted(pending))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_tags(session):
+    session.info.pop('cache_tags', None)
@@ -0,0 +1,217 @@
+"""
+Search Index - admin global search over events, users, teams and venues
+
+A small SQLite FTS5 side index (instance/search_index.db by default,
+override with SEARCH_INDEX_PATH) kept next to the main database, whatever
+that database is. Documents are refreshed after every commit that adds,
+changes or deletes one of the indexed models; rows written with bulk
+INSERTs must call `index_documents()` themselves, and
+tools/rebuild_search_index.py rebuilds everything from scratch.
+
+Each document's FTS rowid encodes (kind, id), so upserts and deletes are
+primary-key operations.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+from itertools import islice
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+from models.models import Event, User, Team, Venue
+
+logger = logging.getLogger(__name__)
+
+KINDS = ('event', 'user', 'team', 'venue')
+_KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+CANDIDATES = 200
+_local = threading.local()
+_disabled = False
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_docs USING fts5(
+    title, keywords,
+    kind UNINDEXED, ref_id UNINDEXED, subtitle UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '1 2 3'
+)
+"""
+
+
+def index_path():
+    return os.getenv('SEARCH_INDEX_PATH') or os.path.join(current_app.instance_path, 'search_index.db')
+
+
+def _connect():
+    """Per-thread connection to the index (created on first use)."""
+    global _disabled
+    path = index_path()
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.path == path:
+        return conn
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(SCHEMA)
+    except sqlite3.Error:
+        # e.g. SQLite built without FTS5: run without search rather than break writes
+        logger.exception('Search index unavailable; admin search is disabled')
+        _disabled = True
+        return None
+    _local.conn, _local.path = conn, path
+    return conn
+
+
+def _rowid(kind, ref_id):
+    return int(ref_id) * len(KINDS) + _KIND_CODES[kind]
+
+
+def _join(*parts):
+    return ' '.join(str(p) for p in parts if p)
+
+
+def _event_doc(event_id, title, description, day, status):
+    return ('event', event_id, title, (description or '')[:500], f'{day} · {status}')
+
+
+def _user_doc(user_id, full_name, username, email, mobile_number):
+    return ('user', user_id, full_name, _join(username, email, mobile_number),
+            email or mobile_number or username or '')
+
+
+def _team_doc(team_id, team_name, event_id):
+    return ('team', team_id, team_name, '', f'Team · event #{event_id}')
+
+
+def _venue_doc(venue_id, venue_name, capacity):
+    return ('venue', venue_id, venue_name, '', f'Capacity {capacity}')
+
+
+# model -> (columns read for the document, document builder)
+SOURCES = {
+    Event: ((Event.event_id, Event.title, Event.description, Event.date, Event.status), _event_doc),
+    User: ((User.user_id, User.full_name, User.username, User.email, User.mobile_number), _user_doc),
+    Team: ((Team.team_id, Team.team_name, Team.event_id), _team_doc),
+    Venue: ((Venue.venue_id, Venue.venue_name, Venue.capacity), _venue_doc),
+}
+
+
+def document_for(obj):
+    """(kind, ref_id, title, keywords, subtitle) for an indexed model instance, else None."""
+    source = SOURCES.get(type(obj))
+    if source is None:
+        return None
+    columns, build = source
+    return build(*(getattr(obj, column.key) for column in columns))
+
+
+def documents(model, *criteria, chunk_size=2000):
+    """Stream documents for `model` rows (optionally filtered) straight from column tuples."""
+    columns, build = SOURCES[model]
+    query = db.session.query(*columns).filter(*criteria).execution_options(yield_per=chunk_size)
+    for row in query:
+        yield build(*row)
+
+
+def index_documents(docs, delete=()):
+    """Upsert documents and remove (kind, ref_id) pairs in one index transaction."""
+    if _disabled:
+        return
+    conn = _connect()
+    if conn is None:
+        return
+    with conn:
+        conn.executemany('DELETE FROM search_docs WHERE rowid = ?',
+                         [(_rowid(kind, ref_id),) for kind, ref_id in delete])
+        rows = [(_rowid(kind, ref_id), title or '', keywords or '', kind, ref_id, subtitle or '')
+                for kind, ref_id, title, keywords, subtitle in docs]
+        conn.executemany('DELETE FROM search_docs WHERE rowid = ?', [(row[0],) for row in rows])
+        conn.executemany('INSERT INTO search_docs (rowid, title, keywords, kind, ref_id, subtitle) '
+                         'VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+
+def rebuild(chunk_size=2000):
+    """Replace the whole index from the database. Returns {kind: count}, or None if unavailable."""
+    conn = _connect()
+    if conn is None:
+        return None
+    with conn:
+        conn.execute('DELETE FROM search_docs')
+    counts = {}
+    for model in SOURCES:
+        stream = documents(model, chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(stream, chunk_size))
+            if not chunk:
+                break
+            index_documents(chunk)
+            counts[chunk[0][0]] = counts.get(chunk[0][0], 0) + len(chunk)
+    with conn:
+        conn.execute("INSERT INTO search_docs (search_docs) VALUES ('optimize')")
+    return counts
+
+
+def search(q, limit=10, kinds=None):
+    """Prefix-match every word of `q`; best matches (title weighted) first.
+
+    Only the newest CANDIDATES matches are ranked: a one- or two-letter
+    prefix can match most of the index, and ranking all of it would blow
+    the type-ahead budget. Each further keystroke narrows the set again.
+    """
+    words = _TOKEN.findall(q or '')
+    conn = None if _disabled or not words else _connect()
+    if conn is None:
+        return []
+    match = ' '.join('"%s"*' % w for w in words)
+    kind_filter = ' AND kind IN (%s)' % ','.join('?' * len(kinds)) if kinds else ''
+    sql = ('SELECT kind, ref_id, title, subtitle FROM ('
+           '  SELECT kind, ref_id, title, subtitle, bm25(search_docs, 10.0, 1.0) AS score'
+           '  FROM search_docs WHERE search_docs MATCH ?' + kind_filter +
+           '  ORDER BY rowid DESC LIMIT ?'
+           ') ORDER BY score LIMIT ?')
+    params = [match, *(kinds or ()), CANDIDATES, limit]
+    return [
+        {'kind': kind, 'id': ref_id, 'title': title, 'subtitle': subtitle}
+        for kind, ref_id, title, subtitle in conn.execute(sql, params)
+    ]
+
+
+# --- change hooks: collect during flush, apply only after a successful commit ---
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    pending = session.info.setdefault('search_pending', {})
+    for obj in session.new.union(session.dirty):
+        doc = document_for(obj)
+        if doc:
+            pending[doc[:2]] = doc
+    for obj in session.deleted:
+        doc = document_for(obj)
+        if doc:
+            pending[doc[:2]] = None
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_changes(session):
+    pending = session.info.pop('search_pending', None)
+    if not pending or not has_app_context():
+        return
+    docs = [doc for doc in pending.values() if doc]
+    deleted = [key for key, doc in pending.items() if doc is None]
+    try:
+        index_documents(docs, delete=deleted)
+    except sqlite3.Error:
+        # The index is rebuildable; never fail the request over it
+        logger.exception('Search index update failed')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop('search_pending', None)
@@ -0,0 +1,328 @@
+"""
+Server Session - server-side session store with a compact payload
+
+The session cookie carries only a short random id; the session itself is
+stored on the server and holds just user_id, role_id and is_guest (plus
+flashed messages). Profile fields that used to be copied into the cookie
+at login (full_name, email, role_name, dept_id, mobile_number, username,
+guest_code) are read from the user's row the first time a request asks
+for them (utils.auth_utils.current_user, cached for the request), so
+`session['full_name']` and `{{ session.full_name }}` keep working and
+always show current data.
+
+Backend (SESSION_BACKEND):
+    database  user_sessions table (default)
+    redis     any Redis-compatible server at SESSION_REDIS_URL
+    cookie    Flask's signed cookie, still with the compact payload
+Server-side sessions can be revoked: `revoke_user_sessions()` logs a user
+out everywhere, e.g. after a password or role change or a purge.
+"""
+
+import os
+import secrets
+import threading
+from datetime import datetime, timedelta
+from flask import current_app, g, has_request_context, session
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SecureCookieSessionInterface, SessionInterface, SessionMixin
+from sqlalchemy import create_engine, delete, insert, select, update
+from werkzeug.datastructures import CallbackDict
+from models import db
+from models.models import UserSession
+from utils.auth_utils import current_user, display_role, role_key_for_id
+
+# Derived from the user's row on demand, never stored
+USER_FIELDS = ('full_name', 'email', 'role_name', 'dept_id', 'mobile_number', 'username', 'guest_code')
+# Expired database sessions are swept after every this many new sessions
+GC_EVERY = 200
+
+_serializer = TaggedJSONSerializer()
+
+
+class LazyUserFields:
+    """Session mixin resolving USER_FIELDS from the logged-in user."""
+
+    def __missing__(self, key):
+        if key not in USER_FIELDS or 'user_id' not in self or not has_request_context():
+            raise KeyError(key)
+        user = current_user()
+        if user is None:
+            raise KeyError(key)
+        if key == 'role_name':
+            return 'Guest' if self.get('is_guest') else display_role(role_key_for_id(user.role_id))
+        if key == 'guest_code':
+            return user.username
+        return getattr(user, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+def _compact(data):
+    return {key: value for key, value in data.items() if key not in USER_FIELDS}
+
+
+class ServerSession(LazyUserFields, CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False, expires_at=None):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+        self.rotate = False
+        self.readonly = False
+
+    def regenerate(self):
+        """Move the session to a fresh id on the next save (call at login)."""
+        self.rotate = True
+
+
+class DatabaseBackend:
+    """Sessions as rows of user_sessions, through a small engine of their own.
+
+    The session is saved after the view, while the request's scoped session
+    still holds its pooled connection; a separate pool (SESSION_DB_POOL_SIZE)
+    keeps that second connection from competing with requests for the app's
+    pool, and saving a session never commits or rolls back the request's work.
+    """
+
+    def __init__(self):
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def engine(self):
+        engine = current_app.extensions.get('session_engine')
+        if engine is None:
+            with self._lock:
+                engine = current_app.extensions.get('session_engine')
+                if engine is None:
+                    if db.engine.url.database in (None, '', ':memory:'):
+                        engine = db.engine   # an in-memory database exists only in its own pool
+                    else:
+                        options = dict(current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+                        # This pool is sized on its own, whatever the app's pool uses
+                        options.pop('pool_size', None)
+                        options.pop('max_overflow', None)
+                        engine = create_engine(db.engine.url, pool_size=int(os.getenv('SESSION_DB_POOL_SIZE', '5')),
+                                               max_overflow=5, **options)
+                    current_app.extensions['session_engine'] = engine
+        return engine
+
+    def load(self, sid, now):
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(UserSession.data, UserSession.expires_at).where(UserSession.session_id == sid)
+            ).first()
+        if row is None or row.expires_at <= now:
+            return None
+        return _serializer.loads(row.data), row.expires_at
+
+    def save(self, sid, data, expires_at, new):
+        values = {'data': _serializer.dumps(data), 'user_id': data.get('user_id'), 'expires_at': expires_at}
+        with self.engine.begin() as conn:
+            if new:
+                conn.execute(insert(UserSession).values(session_id=sid, created_at=datetime.utcnow(), **values))
+            elif not conn.execute(update(UserSession).where(UserSession.session_id == sid).values(**values)).rowcount:
+                return False   # revoked while the request ran
+        if new:
+            with self._lock:
+                self._created += 1
+                sweep = self._created % GC_EVERY == 0
+            if sweep:
+                self.purge_expired()
+        return True
+
+    def delete(self, sid):
+        with self.engine.begin() as conn:
+            conn.execute(delete(UserSession).where(UserSession.session_id == sid))
+
+    def revoke_user(self, user_ids, keep=None):
+        statement = delete(UserSession).where(UserSession.user_id.in_(user_ids))
+        if keep:
+            statement = statement.where(UserSession.session_id != keep)
+        with self.engine.begin() as conn:
+            return conn.execute(statement).rowcount
+
+    def purge_expired(self, limit=1000):
+        with self.engine.begin() as conn:
+            ids = conn.execute(
+                select(UserSession.session_id).where(UserSession.expires_at <= datetime.utcnow()).limit(limit)
+            ).scalars().all()
+            if ids:
+                conn.execute(delete(UserSession).where(UserSession.session_id.in_(ids)))
+        return len(ids)
+
+
+class RedisBackend:
+    """Redis (or any server speaking its protocol); needs the `redis` package."""
+
+    def __init__(self, url, prefix='campus:sess:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('SESSION_BACKEND=redis needs the redis package (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _user_key(self, user_id):
+        return f'{self.prefix}user:{user_id}'
+
+    def load(self, sid, now):
+        pipe = self.client.pipeline()
+        pipe.get(self.prefix + sid)
+        pipe.ttl(self.prefix + sid)
+        raw, ttl = pipe.execute()
+        if raw is None:
+            return None
+        return _serializer.loads(raw), now + timedelta(seconds=max(ttl, 0))
+
+    def save(self, sid, data, expires_at, new):
+        ttl = max(int((expires_at - datetime.utcnow()).total_seconds()), 1)
+        key = self.prefix + sid
+        # xx: only overwrite a live session, so a revoked one stays revoked
+        if not self.client.set(key, _serializer.dumps(data), ex=ttl, nx=new, xx=not new):
+            return False
+        if data.get('user_id') is not None:
+            pipe = self.client.pipeline()
+            pipe.sadd(self._user_key(data['user_id']), sid)
+            pipe.expire(self._user_key(data['user_id']), ttl)
+            pipe.execute()
+        return True
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+    def revoke_user(self, user_ids, keep=None):
+        revoked = 0
+        for user_id in user_ids:
+            sids = [s.decode() for s in self.client.smembers(self._user_key(user_id)) if s.decode() != keep]
+            if sids:
+                revoked += self.client.delete(*[self.prefix + sid for sid in sids])
+                self.client.srem(self._user_key(user_id), *sids)
+        return revoked
+
+    def purge_expired(self, limit=1000):
+        return 0   # keys expire on their own
+
+
+class ServerSessionInterface(SessionInterface):
+    """Keeps sessions in `backend`; the cookie holds only the session id."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def _new_sid(self):
+        return secrets.token_urlsafe(24)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid and app.static_url_path and request.path.startswith(app.static_url_path + '/'):
+            # Static files never use the session: skip the lookup and the save
+            static = ServerSession(sid=sid)
+            static.readonly = True
+            return static
+        if sid:
+            now = datetime.utcnow()
+            stored = self.backend.load(sid, now)
+            if stored is not None:
+                data, expires_at = stored
+                return ServerSession(data, sid=sid, expires_at=expires_at)
+        return ServerSession(sid=self._new_sid(), new=True)
+
+    def save_session(self, app, session, response):
+        if session.readonly:
+            return
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        data = _compact(session)
+
+        if not data:
+            if not session.new:
+                self.backend.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.rotate and not session.new:
+            self.backend.delete(session.sid)
+            session.sid, session.new = self._new_sid(), True
+
+        lifetime = app.permanent_session_lifetime
+        now = datetime.utcnow()
+        # Unchanged sessions are only rewritten once half their lifetime has passed
+        due = session.expires_at is None or session.expires_at - now < lifetime / 2
+        if not (session.new or session.modified or due):
+            return
+        if not self.backend.save(session.sid, data, now + lifetime, session.new):
+            response.delete_cookie(name, domain=domain, path=path)
+            return
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        response.vary.add('Cookie')
+
+
+class CompactCookieSession(LazyUserFields, SecureCookieSession):
+    def regenerate(self):
+        pass   # a signed cookie has no id to rotate
+
+
+class CompactCookieSessionInterface(SecureCookieSessionInterface):
+    """Flask's signed cookie with USER_FIELDS left out of it."""
+    session_class = CompactCookieSession
+
+    def save_session(self, app, session, response):
+        for key in USER_FIELDS:
+            if dict.__contains__(session, key):
+                del session[key]
+        super().save_session(app, session, response)
+
+
+def create_interface():
+    kind = os.getenv('SESSION_BACKEND', 'database').lower()
+    if kind == 'cookie':
+        return CompactCookieSessionInterface()
+    if kind == 'redis':
+        return ServerSessionInterface(RedisBackend(os.getenv('SESSION_REDIS_URL', 'redis://localhost:6379/0')))
+    return ServerSessionInterface(DatabaseBackend())
+
+
+def init_app(app):
+    app.session_interface = create_interface()
+
+
+def start_session(user, is_guest=False):
+    """Log `user` in on a fresh session id with the compact payload."""
+    session.clear()
+    session.regenerate()
+    session.permanent = True
+    session['user_id'] = user.user_id
+    session['role_id'] = user.role_id
+    if is_guest:
+        session['is_guest'] = True
+    g._current_user = (user.user_id, user)
+
+
+def revoke_user_sessions(user_ids, keep_current=False):
+    """Log the given users out of every server-side session. Returns the count.
+
+    With `keep_current`, the session of the request in progress survives.
+    """
+    interface = current_app.session_interface
+    if not isinstance(interface, ServerSessionInterface):
+        return 0
+    keep = session.sid if keep_current and has_request_context() and hasattr(session, 'sid') else None
+    return interface.backend.revoke_user([int(i) for i in user_ids], keep=keep)
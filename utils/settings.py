@@ -0,0 +1,128 @@
+"""
+Settings - typed, in-memory snapshot of the app_config table
+
+All rows are loaded once into an immutable `Settings` object. Writes go
+through `update_settings()`, which also bumps a `settings_version` row;
+every process re-checks that single row at most once per
+SETTINGS_CHECK_INTERVAL seconds (default 5) and reloads when it changed,
+so other workers see admin changes within that delay without querying
+app_config on each request.
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from models import db
+from models.models import AppConfig
+
+VERSION_KEY = 'settings_version'
+CLEANUP_POLICIES = ('archive', 'delete')
+
+
+def _parse_bool(value, default):
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _parse_int(value, default):
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_days(value, default):
+    days = _parse_int(value, default)
+    return days if days > 0 else default
+
+
+def _parse_policy(value, default):
+    value = (value or '').strip().lower()
+    return value if value in CLEANUP_POLICIES else default
+
+
+# setting name -> (parser, default)
+FIELDS = {
+    'guest_enabled': (_parse_bool, False),
+    'guest_validity_days': (_parse_days, 30),
+    'guest_cleanup_policy': (_parse_policy, 'archive'),
+}
+
+
+@dataclass(frozen=True)
+class Settings:
+    guest_enabled: bool = False
+    guest_validity_days: int = 30
+    guest_cleanup_policy: str = 'archive'
+    version: int = 0
+
+
+_snapshot = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def _check_interval():
+    return float(os.getenv('SETTINGS_CHECK_INTERVAL', '5'))
+
+
+def _stored_version():
+    return _parse_int(db.session.query(AppConfig.value).filter(AppConfig.key == VERSION_KEY).scalar(), 0)
+
+
+def _load():
+    rows = dict(db.session.query(AppConfig.key, AppConfig.value).all())
+    values = {name: parse(rows.get(name), default) for name, (parse, default) in FIELDS.items()}
+    return Settings(version=_parse_int(rows.get(VERSION_KEY), 0), **values)
+
+
+def get_settings():
+    """The current settings snapshot (re-validated at most every few seconds)."""
+    global _snapshot, _checked_at
+    now = time.monotonic()
+    snapshot = _snapshot
+    if snapshot is not None and now - _checked_at < _check_interval():
+        return snapshot
+    with _lock:
+        if _snapshot is None or _stored_version() != _snapshot.version:
+            _snapshot = _load()
+        _checked_at = now
+        return _snapshot
+
+
+def reload():
+    """Drop the snapshot so the next `get_settings()` reads app_config again."""
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+def _serialize(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    return str(value)
+
+
+def update_settings(**values):
+    """Validate and store settings, bump the version and commit."""
+    for name, value in values.items():
+        if name not in FIELDS:
+            raise KeyError(f'Unknown setting: {name}')
+        parse, default = FIELDS[name]
+        stored = _serialize(parse(_serialize(value), default))
+        row = db.session.get(AppConfig, name)
+        if row:
+            row.value = stored
+        else:
+            db.session.add(AppConfig(key=name, value=stored))
+
+    version_row = db.session.get(AppConfig, VERSION_KEY, with_for_update=True)
+    if version_row:
+        version_row.value = str(_parse_int(version_row.value, 0) + 1)
+    else:
+        db.session.add(AppConfig(key=VERSION_KEY, value='1'))
+    db.session.commit()
+    reload()
+    return get_settings()
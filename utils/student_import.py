@@ -0,0 +1,274 @@
+"""
+Student Import - streaming bulk creation of student accounts from CSV/XLSX
+
+The upload is read row by row and handled in chunks: each chunk resolves
+existing emails/usernames with a single IN query, hashes passwords in the
+process pool and inserts the new users with one bulk INSERT. Created
+credentials and skipped rows are streamed into an XLSX results file.
+
+The results file holds the new students' initial passwords, so it is
+handed out once: `take_results()` deletes it as it is downloaded, and
+`purge_expired_results()` deletes files nobody fetched within
+IMPORT_RESULTS_TTL seconds (default one hour).
+"""
+
+import csv
+import os
+from datetime import datetime, timedelta
+from itertools import islice
+from openpyxl import Workbook, load_workbook
+from sqlalchemy import select, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from models import db
+from models.models import User, Role, Department, BackgroundJob
+from utils.password_utils import hash_passwords
+from utils import search_index
+
+CHUNK_SIZE = 500
+# Seconds an undownloaded results file (it contains passwords) is kept
+RESULTS_TTL = int(os.getenv('IMPORT_RESULTS_TTL', '3600'))
+
+
+def normalize_headers(headers):
+    return [str(h or '').strip().lower().replace(' ', '_').replace('-', '_') for h in headers]
+
+
+def resolve_department(dept_id, dept_name, dept_map):
+    if dept_id:
+        try:
+            return int(dept_id)
+        except (TypeError, ValueError):
+            return None
+    if dept_name:
+        return dept_map.get(str(dept_name).strip().lower())
+    return None
+
+
+def iter_rows(path):
+    """Yield each data row of a CSV/XLSX file as a dict keyed by normalized header."""
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8', errors='ignore') as f:
+            reader = csv.DictReader(f)
+            reader.fieldnames = normalize_headers(reader.fieldnames or [])
+            yield from reader
+        return
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = next(rows, None)
+        if not headers:
+            return
+        normalized = normalize_headers(headers)
+        for row in rows:
+            yield {normalized[idx]: (row[idx] if idx < len(row) else None) for idx in range(len(normalized))}
+    finally:
+        wb.close()
+
+
+def count_rows(path):
+    """Cheap row count for progress reporting (None when unknown)."""
+    if path.lower().endswith('.csv'):
+        with open(path, 'rb') as f:
+            return max(sum(1 for _ in f) - 1, 0)
+    wb = load_workbook(path, read_only=True)
+    try:
+        max_row = wb.active.max_row
+        return max_row - 1 if max_row else None
+    finally:
+        wb.close()
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _cell(value):
+    return str(value).strip() if value is not None else ''
+
+
+def import_students(progress, path, default_password='', chunk_size=CHUNK_SIZE):
+    """Background job: create student users from the uploaded file at `path`."""
+    student_role = Role.query.filter_by(role_name='Student').first()
+    if not student_role:
+        raise RuntimeError('Student role not found in database.')
+
+    departments = Department.query.all()
+    dept_map = {d.dept_name.strip().lower(): d.dept_id for d in departments}
+    dept_name_map = {d.dept_id: d.dept_name for d in departments}
+
+    result_path = os.path.join(os.path.dirname(path), f'import_{progress.job_id}_results.xlsx')
+    wb = Workbook(write_only=True)
+    created_ws = wb.create_sheet('Created Students')
+    created_ws.append(['Full Name', 'Username', 'Email', 'Password', 'Department'])
+    skipped_ws = wb.create_sheet('Skipped Rows')
+    skipped_ws.append(['Row', 'Email', 'Reason'])
+
+    progress.update(total=count_rows(path))
+
+    seen_emails = set()
+    seen_usernames = set()   # lowercased, as uq_users_username compares them on MySQL
+    processed = created = skipped = 0
+
+    try:
+        # Row numbers start at 2: row 1 is the header
+        for chunk in _chunks(enumerate(iter_rows(path), start=2), chunk_size):
+            candidates = []
+            for row_no, row in chunk:
+                full_name = _cell(row.get('full_name'))
+                username = _cell(row.get('username') or row.get('reg_no') or row.get('registration_no')) or None
+                email = _cell(row.get('email')).lower()
+                password = _cell(row.get('password')) or default_password
+                dept_name = row.get('dept_name') or row.get('department')
+
+                reason = None
+                if not full_name or not email:
+                    reason = 'Missing full_name or email'
+                elif not password:
+                    reason = 'Missing password'
+                elif email in seen_emails:
+                    reason = 'Duplicate email in file'
+                elif username and username.lower() in seen_usernames:
+                    reason = 'Duplicate username in file'
+                if reason:
+                    skipped += 1
+                    skipped_ws.append([row_no, email, reason])
+                    continue
+
+                seen_emails.add(email)
+                if username:
+                    seen_usernames.add(username.lower())
+                resolved_dept_id = resolve_department(row.get('dept_id'), dept_name, dept_map)
+                candidates.append({
+                    'row_no': row_no,
+                    'full_name': full_name,
+                    'username': username,
+                    'email': email,
+                    'password': password,
+                    'dept_id': resolved_dept_id,
+                    'dept_name': dept_name_map.get(resolved_dept_id, _cell(dept_name)),
+                })
+
+            if candidates:
+                emails = [c['email'] for c in candidates]
+                usernames = [c['username'] for c in candidates if c['username']]
+                conditions = [User.email.in_(emails)]
+                if usernames:
+                    conditions.append(User.username.in_(usernames))
+                existing = db.session.execute(select(User.email, User.username).where(or_(*conditions))).all()
+                existing_emails = {(e or '').lower() for e, _ in existing}
+                existing_usernames = {u.lower() for _, u in existing if u}
+
+                to_create = []
+                for c in candidates:
+                    if c['email'] in existing_emails:
+                        skipped += 1
+                        skipped_ws.append([c['row_no'], c['email'], 'Email already exists'])
+                    elif c['username'] and c['username'].lower() in existing_usernames:
+                        skipped += 1
+                        skipped_ws.append([c['row_no'], c['email'], 'Duplicate username'])
+                    else:
+                        to_create.append(c)
+
+                if to_create:
+                    hashes = hash_passwords([c['password'] for c in to_create])
+                    rows = [
+                        {
+                            'full_name': c['full_name'],
+                            'username': c['username'],
+                            'email': c['email'],
+                            'password': hashed,
+                            'role_id': student_role.role_id,
+                            'dept_id': c['dept_id'],
+                        }
+                        for c, hashed in zip(to_create, hashes)
+                    ]
+                    try:
+                        db.session.execute(insert(User), rows)
+                        db.session.commit()
+                    except IntegrityError:
+                        # Taken since the check above (or a collation the IN query missed): row by row
+                        db.session.rollback()
+                        inserted = []
+                        for c, values in zip(to_create, rows):
+                            try:
+                                db.session.execute(insert(User), [values])
+                                db.session.commit()
+                            except IntegrityError:
+                                db.session.rollback()
+                                skipped += 1
+                                skipped_ws.append([c['row_no'], c['email'], 'Email or username already exists'])
+                            else:
+                                inserted.append(c)
+                        to_create = inserted
+
+                if to_create:
+                    # Bulk INSERTs bypass the ORM change hooks
+                    search_index.index_documents(search_index.documents(User, User.email.in_([c['email'] for c in to_create])))
+                    for c in to_create:
+                        created_ws.append([c['full_name'], c['username'] or '', c['email'], c['password'], c['dept_name']])
+                    created += len(to_create)
+
+            processed += len(chunk)
+            progress.update(processed=processed, succeeded=created, skipped=skipped)
+    finally:
+        # Every chunk commits its users, so their passwords must reach the results file even if a later one fails
+        wb.save(result_path)
+        db.session.rollback()
+        progress.update(result_path=result_path)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    return f'Bulk upload completed. Created: {created}, Skipped: {skipped}.'
+
+
+def _discard_result(job_id, path):
+    """Detach `path` from the job; True for the one caller that got to it."""
+    taken = db.session.execute(
+        update(BackgroundJob).where(BackgroundJob.job_id == job_id, BackgroundJob.result_path == path)
+        .values(result_path=None),
+        execution_options={'synchronize_session': False},
+    ).rowcount == 1
+    db.session.commit()
+    return taken
+
+
+def take_results(job):
+    """Read a job's results file and delete it. Returns the bytes, or None if it is gone."""
+    path = job.result_path
+    if not path or not _discard_result(job.job_id, path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def purge_expired_results(now=None):
+    """Delete results files of jobs finished more than RESULTS_TTL ago. Returns the count."""
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=RESULTS_TTL)
+    stale = db.session.execute(
+        select(BackgroundJob.job_id, BackgroundJob.result_path)
+        .where(BackgroundJob.result_path.isnot(None), BackgroundJob.finished_at < cutoff)
+    ).all()
+    purged = 0
+    for job_id, path in stale:
+        if _discard_result(job_id, path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            purged += 1
+    return purged
@@ -0,0 +1,171 @@
+"""
+Team Membership - batched invitations and race-free team capacity
+
+Team.member_count mirrors the number of registrations in the team. A seat is
+taken with one conditional UPDATE (member_count + 1 WHERE member_count <
+max_team_size); the row lock it holds until commit serializes invitees
+accepting at the same moment, so a team can never grow past
+max_team_size. The member also takes one of the event's seats
+(utils.registrations.claim_event_seat), and the registration is written in
+the same transaction, so a failed join gives both seats back on rollback.
+
+`invite_members()` takes any number of usernames and checks them with a
+fixed number of queries (one IN query for the users and their roles, one for
+existing registrations, one for pending invitations) before inserting all
+the invitations at once.
+"""
+
+import re
+from datetime import datetime
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import contains_eager
+from models import db
+from models.models import User, Team, TeamInvitation, Registration
+from utils.auth_utils import role_key_for_id
+from utils.registrations import add_registration, claim_event_seat, is_registered, seat_limit
+
+
+def parse_usernames(raw):
+    """Usernames from a comma/space/newline separated string, deduplicated in order."""
+    seen = set()
+    usernames = []
+    for name in re.split(r'[\s,;]+', raw or ''):
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            usernames.append(name)
+    return usernames
+
+
+def _invitable(user):
+    # Students and guests (role-based) or legacy guest flag
+    return role_key_for_id(user.role_id) in ('student', 'guest') or bool(user.is_guest)
+
+
+def invite_members(team, leader_id, usernames):
+    """Invite `usernames` to `team`. Returns (invited users, error messages)."""
+    max_size = team.event.max_team_size
+    if team.member_count >= max_size:
+        return [], [f'Team already has maximum {max_size} members']
+
+    users = (
+        db.session.query(User)
+        .outerjoin(User.role)
+        .options(contains_eager(User.role))
+        .filter(User.username.in_(usernames))
+        .all()
+    )
+    by_name = {(u.username or '').lower(): u for u in users}
+    ids = [u.user_id for u in users]
+    registered = set(db.session.execute(
+        select(Registration.student_id).where(Registration.event_id == team.event_id, Registration.student_id.in_(ids))
+    ).scalars()) if ids else set()
+    pending = set(db.session.execute(
+        select(TeamInvitation.invitee_id).where(TeamInvitation.team_id == team.team_id,
+                                                TeamInvitation.status == 'pending',
+                                                TeamInvitation.invitee_id.in_(ids))
+    ).scalars()) if ids else set()
+
+    invited, errors = [], []
+    for name in usernames:
+        invitee = by_name.get(name.lower())
+        if invitee is None:
+            errors.append(f'User "{name}" not found')
+        elif not _invitable(invitee):
+            errors.append(f'{name}: you can only invite students or guest users by username')
+        elif invitee.user_id == leader_id:
+            errors.append('You cannot invite yourself')
+        elif invitee.user_id in registered:
+            errors.append(f'{invitee.full_name} is already registered for this event')
+        elif invitee.user_id in pending:
+            errors.append(f'{invitee.full_name} already has a pending invitation')
+        else:
+            pending.add(invitee.user_id)
+            invited.append(invitee)
+
+    if invited:
+        now = datetime.utcnow()
+        db.session.execute(insert(TeamInvitation), [
+            {'team_id': team.team_id, 'invitee_id': u.user_id, 'status': 'pending', 'created_at': now}
+            for u in invited
+        ])
+        db.session.commit()
+    return invited, errors
+
+
+def claim_seat(team_id, max_size):
+    """Take one seat in the team inside the current transaction. Returns True if one was free."""
+    return db.session.execute(
+        update(Team)
+        .where(Team.team_id == team_id, Team.member_count < max_size)
+        .values(member_count=Team.member_count + 1),
+        execution_options={'synchronize_session': False},
+    ).rowcount == 1
+
+
+def _close(invitation_id, status):
+    """Move a pending invitation to `status`; False if it was already answered."""
+    return db.session.execute(
+        update(TeamInvitation)
+        .where(TeamInvitation.invitation_id == invitation_id, TeamInvitation.status == 'pending')
+        .values(status=status, responded_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False},
+    ).rowcount == 1
+
+
+def accept_invitation(invitation, student_id):
+    """Join the invitation's team. Returns (joined, message)."""
+    team = invitation.team
+    event = team.event
+    team_id, event_id, team_name = team.team_id, event.event_id, team.team_name
+    limit = seat_limit(event)
+    already = db.session.execute(
+        select(Registration.registration_id).where(Registration.event_id == event_id,
+                                                   Registration.student_id == student_id).limit(1)
+    ).first()
+    try:
+        if already:
+            _close(invitation.invitation_id, 'rejected')
+            db.session.commit()
+            return False, 'You are already registered for this event'
+        if not _close(invitation.invitation_id, 'accepted'):
+            db.session.rollback()
+            return False, 'This invitation has already been responded to'
+        if not claim_seat(team_id, event.max_team_size):
+            db.session.rollback()
+            _close(invitation.invitation_id, 'rejected')
+            db.session.commit()
+            return False, 'Team is already full'
+        if not claim_event_seat(event_id, limit):
+            db.session.rollback()
+            return False, 'This event is full'
+        add_registration(event_id, student_id, team_id)
+        db.session.commit()
+    except IntegrityError:
+        # Registered for the event by another request meanwhile; the rollback returns both seats
+        db.session.rollback()
+        if not is_registered(event_id, student_id):
+            raise
+        _close(invitation.invitation_id, 'rejected')
+        db.session.commit()
+        return False, 'You are already registered for this event'
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.expire_all()
+    return True, f'You have joined team "{team_name}"!'
+
+
+def reject_invitation(invitation):
+    _close(invitation.invitation_id, 'rejected')
+    db.session.commit()
+
+
+def recount_members(team_ids):
+    """Reset member_count from the registrations table for `team_ids`."""
+    if not team_ids:
+        return
+    members = (select(func.count(Registration.registration_id))
+               .where(Registration.team_id == Team.team_id).scalar_subquery())
+    db.session.execute(update(Team).where(Team.team_id.in_(team_ids)).values(member_count=members),
+                       execution_options={'synchronize_session': False})
@@ -0,0 +1,112 @@
+"""
+User Directory - keyset-paginated user listing for the admin users page
+
+Users are listed newest first by user_id (which follows creation order) and
+continue from an opaque cursor instead of loading the whole table, with
+role and department joined into the same query. Search matches a prefix of
+the full name, email or username, so each branch is a range scan on its
+index (ix_users_full_name, uq_users_username, the unique email index)
+instead of a %like% scan of every row.
+"""
+
+import base64
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+from models.models import User
+
+PAGE_SIZE = 100
+_BADGES = {
+    'admin': 'badge-danger',
+    'principal': 'badge-warning',
+    'hod': 'badge-warning',
+    'event organizer': 'badge-success',
+    'organizer': 'badge-success',
+}
+
+
+def encode_cursor(user):
+    return base64.urlsafe_b64encode(str(user.user_id).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the last user_id seen, or None for a missing/garbled cursor."""
+    if not cursor:
+        return None
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def parse_filters(args):
+    """Directory filters from request args (all optional strings)."""
+    return {
+        'q': (args.get('q') or '').strip(),
+        'role_id': args.get('role_id') or '',
+        'dept_id': args.get('dept_id') or '',
+    }
+
+
+def _prefix(q):
+    escaped = q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
+
+
+def directory_query(filters):
+    query = User.query
+    if filters.get('q'):
+        # LIKE (not ILIKE): MySQL collations already ignore case and lower()
+        # would hide the columns from their indexes
+        pattern = _prefix(filters['q'])
+        query = query.filter(or_(
+            User.full_name.like(pattern, escape='\\'),
+            User.email.like(pattern, escape='\\'),
+            User.username.like(pattern, escape='\\'),
+        ))
+    if str(filters.get('role_id') or '').isdigit():
+        query = query.filter(User.role_id == int(filters['role_id']))
+    if str(filters.get('dept_id') or '').isdigit():
+        query = query.filter(User.dept_id == int(filters['dept_id']))
+    return query
+
+
+def directory_page(filters, cursor=None, limit=PAGE_SIZE):
+    """One page of users after `cursor`. Returns (users, next_cursor or None)."""
+    query = directory_query(filters)
+    last_id = decode_cursor(cursor)
+    if last_id is not None:
+        query = query.filter(User.user_id < last_id)
+    rows = (
+        query.options(joinedload(User.role), joinedload(User.department))
+        .order_by(User.user_id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    users = rows[:limit]
+    next_cursor = encode_cursor(users[-1]) if len(rows) > limit else None
+    return users, next_cursor
+
+
+def role_label(user):
+    """Display name of the user's role ('Guest' also for legacy is_guest rows)."""
+    role_name = user.role.role_name if user.role else None
+    if (role_name or '').lower() == 'guest' or user.is_guest:
+        return 'Guest'
+    return role_name or 'Unknown'
+
+
+def user_row(user):
+    """JSON row for the users table."""
+    role_name = role_label(user)
+    return {
+        'id': user.user_id,
+        'full_name': user.full_name,
+        'username': user.username,
+        'mobile_number': user.mobile_number,
+        'email': user.email,
+        'role': role_name,
+        'badge': _BADGES.get(role_name.lower(), 'badge-secondary'),
+        'department': user.department.dept_name if user.department else None,
+        'created': user.created_at.strftime('%Y-%m-%d') if user.created_at else None,
+        'protected': role_name.lower() == 'admin',
+    }
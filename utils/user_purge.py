@@ -0,0 +1,131 @@
+"""
+User Purge - set-based deletion of users and everything that references them
+
+`purge_users()` takes any set of user ids and deletes them in chunks. Each
+chunk is one transaction of a fixed series of set-wise DELETE/UPDATE
+statements (one per dependent table, filtered with IN on the chunk's ids
+and the events they organize), so locks are held for one bounded chunk at
+a time instead of per-row loops over the whole set. Removal follows the
+same rules as the ORM cascades: an organizer's events go with their
+approvals, registrations, attendance, teams, certificates and feedback;
+registrations in a deleted team stay but lose the team, and teams and
+events that lose members get their member_count/registered_count
+recounted, with freed event seats going to the waitlist. Admin accounts
+are never purged.
+"""
+
+from sqlalchemy import delete, func, or_, select, update
+from models import db
+from models.models import (
+    User, Role, Event, Approval, Registration, Team, TeamInvitation,
+    Attendance, Certificate, CertificateTemplate, Feedback, WaitlistEntry,
+)
+from utils import reference_cache, search_index
+from utils.server_session import revoke_user_sessions
+from utils.team_membership import recount_members
+from utils.registrations import recount_seats, promote_waitlist
+
+DEFAULT_CHUNK_SIZE = 200
+
+
+def _chunks(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def purgeable_ids(user_ids):
+    """The given ids that exist and do not belong to admin accounts, sorted."""
+    ids = sorted({int(i) for i in user_ids})
+    result = []
+    for chunk in _chunks(ids, 1000):
+        result += db.session.execute(
+            select(User.user_id).join(Role, Role.role_id == User.role_id)
+            .where(User.user_id.in_(chunk), func.lower(Role.role_name) != 'admin')
+        ).scalars().all()
+    return sorted(result)
+
+
+def _purge_chunk(ids):
+    """Delete one chunk of users and their dependent rows; caller commits."""
+    events = select(Event.event_id).where(Event.organizer_id.in_(ids))
+    teams = select(Team.team_id).where(or_(Team.leader_id.in_(ids), Team.event_id.in_(events)))
+    registrations = select(Registration.registration_id).where(
+        or_(Registration.student_id.in_(ids), Registration.event_id.in_(events)))
+    templates = select(CertificateTemplate.template_id).where(CertificateTemplate.organizer_id.in_(ids))
+
+    # Ids for the search index, read before the rows disappear
+    event_ids = db.session.execute(events).scalars().all()
+    team_ids = db.session.execute(teams).scalars().all()
+    # Other teams the purged users were members of; their seat counters are redone below
+    joined_teams = db.session.execute(
+        select(Registration.team_id).distinct().where(Registration.student_id.in_(ids), Registration.team_id.isnot(None))
+    ).scalars().all()
+    # Other events they held seats at; recounted below and refilled from the waitlist after commit
+    seated_events = db.session.execute(
+        select(Registration.event_id).distinct().where(Registration.student_id.in_(ids),
+                                                       Registration.event_id.notin_(events))
+    ).scalars().all()
+
+    statements = [
+        delete(Attendance).where(or_(Attendance.scanned_by.in_(ids), Attendance.registration_id.in_(registrations))),
+        delete(TeamInvitation).where(or_(TeamInvitation.invitee_id.in_(ids), TeamInvitation.team_id.in_(teams))),
+        delete(WaitlistEntry).where(or_(WaitlistEntry.student_id.in_(ids), WaitlistEntry.event_id.in_(events))),
+        # Team members keep their registration, as when the ORM deletes a team
+        update(Registration).where(Registration.team_id.in_(teams)).values(team_id=None),
+        # Other organizers' rows may point at templates that are about to go
+        update(Registration).where(Registration.prize_certificate_template_id.in_(templates))
+        .values(prize_certificate_template_id=None),
+        update(Team).where(Team.prize_certificate_template_id.in_(templates))
+        .values(prize_certificate_template_id=None),
+        update(Event).where(Event.certificate_template_id.in_(templates)).values(certificate_template_id=None),
+        delete(Registration).where(or_(Registration.student_id.in_(ids), Registration.event_id.in_(events))),
+        delete(Team).where(Team.team_id.in_(team_ids)),
+        delete(Certificate).where(or_(Certificate.student_id.in_(ids), Certificate.event_id.in_(events))),
+        delete(Feedback).where(or_(Feedback.student_id.in_(ids), Feedback.event_id.in_(events))),
+        delete(Approval).where(or_(Approval.approver_id.in_(ids), Approval.event_id.in_(events))),
+        delete(Event).where(Event.organizer_id.in_(ids)),
+        delete(CertificateTemplate).where(CertificateTemplate.organizer_id.in_(ids)),
+    ]
+    options = {'synchronize_session': False}
+    for statement in statements:
+        db.session.execute(statement, execution_options=options)
+    recount_members(sorted(set(joined_teams) - set(team_ids)))
+    recount_seats(seated_events)
+    deleted = db.session.execute(delete(User).where(User.user_id.in_(ids)), execution_options=options).rowcount
+    return deleted, event_ids, team_ids, seated_events
+
+
+def purge_users(user_ids, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """Delete `user_ids` (admins excepted) chunk by chunk, one commit per chunk.
+
+    `progress`, if given, is a utils.jobs progress handle. Returns a stats dict.
+    """
+    requested = {int(i) for i in user_ids}
+    ids = purgeable_ids(requested)
+    stats = {'requested': len(requested), 'deleted': 0, 'skipped': len(requested) - len(ids), 'events': 0}
+    processed = stats['skipped']
+    if progress:
+        progress.update(total=len(requested), processed=processed, skipped=stats['skipped'])
+    for chunk in _chunks(ids, chunk_size):
+        try:
+            deleted, event_ids, team_ids, seated_events = _purge_chunk(chunk)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        # Rows went away behind the ORM's back: forget anything loaded
+        db.session.expire_all()
+        revoke_user_sessions(chunk)
+        for event_id in seated_events:
+            promote_waitlist(event_id)
+        search_index.index_documents((), delete=[('user', i) for i in chunk]
+                                     + [('event', i) for i in event_ids]
+                                     + [('team', i) for i in team_ids])
+        stats['deleted'] += deleted
+        stats['events'] += len(event_ids)
+        processed += len(chunk)
+        if progress:
+            progress.update(processed=processed, succeeded=stats['deleted'])
+    if stats['deleted']:
+        reference_cache.invalidate('organizers')
+    return stats